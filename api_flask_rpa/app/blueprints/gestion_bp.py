@@ -1,11 +1,17 @@
-from flask import Blueprint, jsonify, render_template, request
+import threading
+import time
+from flask import Blueprint, jsonify, render_template, request, url_for
 from app.services.workflows.proceso_consulta_wf import ProcesoConsultaWF
 from app.infrastructure.nocodb_client import NocoDBClient
-from app.infrastructure.web_client import WebClient
+from app.infrastructure.nocodb_async_client import AsyncNocoDBClient
+from app.infrastructure.driver_manager import get_driver_manager
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+from app.services.jobs_service import JobManager, get_job_manager
 from config import settings
 from datetime import datetime
 from app.utils.horarios_utils import puede_ejecutar_en_fecha
 from app.utils.logging_utils import get_logger
+from app.utils.lote_lock import LoteEnCursoError, candado_lote
 
 bp = Blueprint("gestion", __name__, template_folder="../templates")
 
@@ -13,13 +19,74 @@ logger = get_logger("gestion_bp")
 
 # Inicializa cliente de NocoDB una sola vez
 nocodb = NocoDBClient(base_url=settings.NOCODB_URL, api_key=settings.NOCO_XC_TOKEN)
+# Cliente async compartido (pool keep-alive) para escrituras concurrentes
+nocodb_async = (
+    AsyncNocoDBClient(
+        base_url=settings.NOCODB_URL,
+        api_key=settings.NOCO_XC_TOKEN,
+        circuit_breaker=nocodb.circuit_breaker,
+    )
+    if settings.NOCO_ASYNC_WRITES == "True"
+    else None
+)
+
+
+# Caché corta del conteo de pendientes para no golpear NocoDB desde dashboards
+PENDIENTES_CACHE_SECONDS = float(settings.PENDIENTES_CACHE_SECONDS or 10)
+_pendientes_cache = {"valor": None, "leido_en": 0.0}
+_pendientes_lock = threading.Lock()
+
+
+def _contar_pendientes_cache() -> int:
+    with _pendientes_lock:
+        edad = time.monotonic() - _pendientes_cache["leido_en"]
+        if _pendientes_cache["valor"] is None or edad >= PENDIENTES_CACHE_SECONDS:
+            _pendientes_cache["valor"] = NocoDbSourceRepository(nocodb).contar_pendientes()
+            _pendientes_cache["leido_en"] = time.monotonic()
+        return _pendientes_cache["valor"]
+
+
+# Un solo lote a la vez por proceso (jobs del API, webhook): comparten driver
+_lote_lock = threading.Lock()
+
+
+def ejecutar_lote_en_proceso() -> dict:
+    """
+    Ejecuta un lote completo con los clientes compartidos del blueprint.
+    Lanza LoteEnCursoError si ya hay otro lote corriendo en este proceso o,
+    sin leases, en otro (p. ej. python -m app.worker).
+    """
+    if not _lote_lock.acquire(blocking=False):
+        raise LoteEnCursoError("Ya hay un lote en ejecución")
+    try:
+        with candado_lote():
+            # Driver caliente compartido: sin arranque en frío ni Chrome huérfanos por lote
+            wf = ProcesoConsultaWF(
+                nocodb_client=nocodb,
+                web_client=None,
+                async_client=nocodb_async,
+                driver_manager=get_driver_manager(settings.RUNT_URL),
+            )
+            return wf.ejecutar_lote()
+    finally:
+        _lote_lock.release()
+
+
+def get_jobs() -> JobManager:
+    """Gestor de jobs del proceso; cada job ejecuta un lote completo."""
+    return get_job_manager(ejecutar_lote_en_proceso)
+
+
+def _prefiere_html() -> bool:
+    return request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html"
 
 
 @bp.route("/ejecutar", methods=["POST", "GET"])
 def ejecutar():
     """
     Ejecuta el flujo completo: obtiene pendientes y procesa el lote.
-    POST → ejecuta la automatización
+    POST → encola el lote y responde 202 con el id del job (si ya hay uno
+           activo se devuelve ese mismo)
     GET  → muestra una página con estado del proceso
     """
     if request.method == "GET":
@@ -39,25 +106,68 @@ def ejecutar():
             status="running",
         )
     try:
-        web_client = WebClient(base_url=settings.RUNT_URL)
-        wf = ProcesoConsultaWF(nocodb_client=nocodb, web_client=web_client)
-        result = wf.ejecutar_lote()
-        return render_template(
-            "ejecutar.html",
-            title="Consulta RUNT",
-            message="Resultado del proceso:",
-            status="ok",
-            detail=result.get("mensaje"),
-        )
+        job, creado = get_jobs().lanzar(origen=request.args.get("origen", "api"))
     except Exception as e:
-        logger.error(f"Error al ejecutar: {e}")
+        logger.error(f"Error al encolar la ejecución: {e}")
+        return jsonify({"error": f"Error al encolar la ejecución: {e}"}), 500
+
+    if _prefiere_html():
         return render_template(
             "ejecutar.html",
             title="Consulta RUNT",
-            message="Ocurrió un error al ejecutar el proceso.",
-            status="error",
-            detail=str(e),
-        ), 500
+            message="Ejecutando proceso..." if creado else "Ya hay un proceso en ejecución.",
+            status="running",
+            detail=f"Job {job.id}",
+        ), 202
+    return jsonify({
+        "job_id": job.id,
+        "estado": job.estado,
+        "nuevo": creado,
+        "status_url": url_for("gestion.estado_job", job_id=job.id),
+    }), 202
+
+
+@bp.route("/jobs", methods=["GET"])
+def listar_jobs():
+    """
+    Lista los jobs recientes (más nuevo primero).
+    Endpoint: GET /api/gestion/jobs
+    """
+    return jsonify({"jobs": [j.resumen() for j in get_jobs().listar()]}), 200
+
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def estado_job(job_id: str):
+    """
+    Estado de un job de ejecución.
+    Endpoint: GET /api/gestion/jobs/<job_id>
+    """
+    job = get_jobs().obtener(job_id)
+    if job is None:
+        return jsonify({"error": "Job no encontrado"}), 404
+    return jsonify(job.resumen()), 200
+
+
+@bp.route("/jobs/<job_id>/resultados", methods=["GET"])
+def resultados_job(job_id: str):
+    """
+    Resultados por registro de un job, paginados.
+    Endpoint: GET /api/gestion/jobs/<job_id>/resultados?page=1&per_page=50
+    """
+    job = get_jobs().obtener(job_id)
+    if job is None:
+        return jsonify({"error": "Job no encontrado"}), 404
+    pagina = max(1, request.args.get("page", 1, type=int))
+    por_pagina = min(500, max(1, request.args.get("per_page", 50, type=int)))
+    resumen = job.resumen()
+    return jsonify({
+        "job_id": job.id,
+        "estado": job.estado,
+        "page": pagina,
+        "per_page": por_pagina,
+        "total": resumen["total_resultados"],
+        "resultados": job.resultados(pagina, por_pagina),
+    }), 200
 
 
 @bp.route("/pendientes", methods=["GET"])
@@ -67,10 +177,7 @@ def obtener_pendientes():
     Endpoint: GET /api/gestion/pendientes
     """
     try:
-        tabla = settings.NOCO_INSUMO_TABLE
-        filtro = "EstadoGestion,eq,Sin Procesar"
-        registros = nocodb.list_records(tabla, where=filtro)
-        cantidad = len(registros) if registros else 0
+        cantidad = _contar_pendientes_cache()
 
         if request.accept_mimetypes.accept_html:
             return render_template(
@@ -0,0 +1,79 @@
+"""
+Webhooks de NocoDB.
+
+NocoDB llama a POST /api/webhooks/nocodb/insumo en cada "after insert" de la
+tabla Insumo. El evento solo despierta al disparador (con debounce), que
+lanza el lote como job en segundo plano dentro de este proceso. Así el trabajo
+arranca en ~1 s en lugar de esperar el siguiente ciclo del poller, que queda
+como red de seguridad con un intervalo largo.
+"""
+import hmac
+import threading
+from flask import Blueprint, jsonify, request
+from app.blueprints.gestion_bp import get_jobs
+from app.services.disparador_service import DisparadorLotes
+from config import settings
+from app.utils.logging_utils import get_logger
+
+bp = Blueprint("webhooks", __name__)
+
+logger = get_logger("webhook_bp")
+
+_disparador = None
+_disparador_lock = threading.Lock()
+
+
+def _lote_por_webhook():
+    # Mismo gestor de jobs que /ejecutar
+    job, creado = get_jobs().lanzar(origen="webhook")
+    job.esperar()
+    if not creado:
+        # El lote activo pudo leer pendientes antes de la inserción: uno más
+        job, creado = get_jobs().lanzar(origen="webhook")
+        job.esperar()
+    logger.info("Lote por webhook (job %s, nuevo=%s) terminado: %s", job.id, creado, job.estado)
+
+
+def get_disparador() -> DisparadorLotes:
+    """Disparador compartido por el proceso (Singleton)."""
+    global _disparador
+    with _disparador_lock:
+        if _disparador is None:
+            _disparador = DisparadorLotes(
+                _lote_por_webhook,
+                debounce=float(settings.WEBHOOK_DEBOUNCE_SECONDS or 1.0),
+                espera_maxima=float(settings.WEBHOOK_MAX_WAIT_SECONDS or 5.0),
+            )
+    return _disparador
+
+
+def _token_valido() -> bool:
+    secreto = settings.NOCO_WEBHOOK_SECRET
+    recibido = request.headers.get("X-Webhook-Token", "")
+    return hmac.compare_digest(recibido, secreto)
+
+
+@bp.route("/nocodb/insumo", methods=["POST"])
+def nocodb_insumo():
+    """
+    Recibe el webhook "after insert" de Insumo y despierta al disparador.
+    Endpoint: POST /api/webhooks/nocodb/insumo
+    """
+    if not settings.NOCO_WEBHOOK_SECRET:
+        # Sin secreto el endpoint quedaría abierto a cualquiera que alcance el API
+        logger.warning("Webhook rechazado: NOCO_WEBHOOK_SECRET no está configurado")
+        return jsonify({"error": "webhook deshabilitado: falta NOCO_WEBHOOK_SECRET"}), 503
+    if not _token_valido():
+        logger.warning("Webhook rechazado: token inválido desde %s", request.remote_addr)
+        return jsonify({"error": "token inválido"}), 401
+
+    evento = request.get_json(silent=True) or {}
+    filas = (evento.get("data") or {}).get("rows") or []
+    # Solo interesan las filas nuevas que quedan pendientes de consulta
+    pendientes = [f for f in filas if f.get("EstadoGestion", "Sin Procesar") == "Sin Procesar"]
+    if filas and not pendientes:
+        return jsonify({"aceptado": False, "motivo": "sin filas pendientes"}), 200
+
+    get_disparador().notificar(evento.get("type", "webhook"))
+    logger.info("Webhook %s: %d filas pendientes", evento.get("type"), len(pendientes))
+    return jsonify({"aceptado": True, "filas": len(pendientes)}), 202
@@ -0,0 +1,168 @@
+"""
+DriverManager: ciclo de vida de un WebDriver caliente y reutilizable.
+
+- Prearranca Chrome en segundo plano para que el lote no pague el arranque.
+- Antes de entregar el driver hace un ping (``driver.title``); si no
+  responde, lo descarta y crea otro.
+- Lo recicla tras DRIVER_MAX_RECORDS registros o cuando el árbol de
+  procesos de Chrome supera DRIVER_MAX_RSS_MB (requiere psutil).
+- Garantiza el cierre de Chrome al salir del proceso (atexit).
+"""
+import atexit
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+from config import settings
+from app.infrastructure.web_client import WebClient
+from app.utils.logging_utils import get_logger
+
+try:
+    import psutil
+except ImportError:  # sin psutil no se mide RSS; solo se recicla por conteo
+    psutil = None
+
+logger = get_logger("driver_manager")
+
+DEFAULT_MAX_REGISTROS = 200
+DEFAULT_MAX_RSS_MB = 1500
+
+
+class DriverManager:
+    def __init__(
+        self,
+        base_url: str,
+        max_registros: Optional[int] = None,
+        max_rss_mb: Optional[float] = None,
+        fabrica: Optional[Callable[[], WebClient]] = None,
+    ):
+        self.base_url = base_url
+        self.max_registros = int(
+            max_registros or settings.DRIVER_MAX_RECORDS or DEFAULT_MAX_REGISTROS
+        )
+        self.max_rss_mb = float(max_rss_mb or settings.DRIVER_MAX_RSS_MB or DEFAULT_MAX_RSS_MB)
+        self._fabrica = fabrica or (lambda: WebClient(base_url=self.base_url))
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="driver-warmup")
+        self._lock = threading.RLock()
+        self._actual: Optional[WebClient] = None
+        self._siguiente: Optional[Future] = None
+        self._registros = 0
+        self._cerrado = False
+        atexit.register(self.cerrar)
+
+    # ------------------------------------------------------------------
+    # Arranque
+    # ------------------------------------------------------------------
+    def calentar(self) -> None:
+        """Arranca un driver en segundo plano si no hay uno listo o en camino."""
+        with self._lock:
+            if self._cerrado or self._actual is not None or self._siguiente is not None:
+                return
+            logger.info("Prearrancando WebDriver en segundo plano")
+            self._siguiente = self._executor.submit(self._fabrica)
+
+    def obtener(self) -> WebClient:
+        """Driver sano listo para usar (espera el prearranque si está en curso)."""
+        with self._lock:
+            if self._cerrado:
+                raise RuntimeError("DriverManager cerrado")
+            if self._actual is not None and not self._sano(self._actual):
+                logger.warning("WebDriver sin respuesta; se reemplaza")
+                self._descartar()
+            if self._actual is None:
+                self.calentar()
+                futuro, self._siguiente = self._siguiente, None
+                self._actual = futuro.result()
+                self._registros = 0
+            return self._actual
+
+    @staticmethod
+    def _sano(web_client: WebClient) -> bool:
+        try:
+            web_client.driver.title
+            return True
+        except Exception:
+            return False
+
+    # ------------------------------------------------------------------
+    # Reciclaje
+    # ------------------------------------------------------------------
+    def registrar_registro(self) -> bool:
+        """
+        Cuenta un registro procesado con el driver actual y lo recicla si
+        superó los límites. Retorna True si se recicló (la sesión RUNT se pierde).
+        """
+        with self._lock:
+            self._registros += 1
+            motivo = None
+            if self._registros >= self.max_registros:
+                motivo = f"{self._registros} registros"
+            else:
+                rss = self.rss_mb()
+                if rss is not None and rss >= self.max_rss_mb:
+                    motivo = f"RSS {rss:.0f} MB"
+            if motivo is None:
+                return False
+            logger.info("Reciclando WebDriver (%s)", motivo)
+            self.reciclar()
+            return True
+
+    def rss_mb(self) -> Optional[float]:
+        """RSS del árbol chromedriver + Chrome en MB, o None si no se puede medir."""
+        if psutil is None or self._actual is None:
+            return None
+        try:
+            proceso = psutil.Process(self._actual.driver.service.process.pid)
+            total = proceso.memory_info().rss
+            for hijo in proceso.children(recursive=True):
+                try:
+                    total += hijo.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    def reciclar(self) -> None:
+        """Cierra el driver actual y deja otro arrancando en segundo plano."""
+        with self._lock:
+            self._descartar()
+            self.calentar()
+
+    def _descartar(self):
+        if self._actual is not None:
+            self._actual.close()
+        self._actual = None
+        self._registros = 0
+
+    # ------------------------------------------------------------------
+    # Cierre
+    # ------------------------------------------------------------------
+    def cerrar(self) -> None:
+        with self._lock:
+            if self._cerrado:
+                return
+            self._cerrado = True
+            self._descartar()
+            siguiente, self._siguiente = self._siguiente, None
+        atexit.unregister(self.cerrar)
+        if siguiente is not None:
+            try:
+                siguiente.result().close()
+            except Exception:
+                pass
+        self._executor.shutdown(wait=False)
+        logger.info("DriverManager cerrado")
+
+
+# Singleton helper
+_instance: Optional[DriverManager] = None
+_instance_lock = threading.Lock()
+
+
+def get_driver_manager(base_url: Optional[str] = None) -> DriverManager:
+    """Gestor de WebDriver del proceso (Singleton)."""
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = DriverManager(base_url or settings.RUNT_URL)
+    return _instance
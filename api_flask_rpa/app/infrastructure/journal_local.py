@@ -0,0 +1,357 @@
+"""
+JournalLocal: bitácora embebida (SQLite en modo WAL) para reanudar lotes.
+
+Guarda:
+- progreso por registro de Insumo y por placa (detalle extraído + captura),
+  para que un lote reiniciado tras una caída no vuelva a consultar RUNT;
+- una cola (spool) de escrituras hacia NocoDB que fallaron, para
+  reenviarlas en orden cuando NocoDB vuelva a estar disponible;
+- las escrituras descartadas del spool (rechazadas por NocoDB o con los
+  reintentos agotados), para revisión manual.
+
+El progreso se indexa por fecha local: igual que NumUnicoProceso, una
+consulta de otro día se considera trabajo nuevo.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.infrastructure.nocodb_client import NocoDBBulkError
+from app.utils.logging_utils import get_logger
+from app.utils.retry_utils import es_fallo_transitorio
+
+logger = get_logger("journal_local")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    record_id   TEXT NOT NULL,
+    fecha       TEXT NOT NULL,
+    estado      TEXT NOT NULL,
+    pdf_path    TEXT,
+    actualizado TEXT NOT NULL,
+    PRIMARY KEY (record_id, fecha)
+);
+CREATE TABLE IF NOT EXISTS placas (
+    record_id    TEXT NOT NULL,
+    fecha        TEXT NOT NULL,
+    placa        TEXT NOT NULL,
+    detalle      TEXT NOT NULL,
+    png_path     TEXT,
+    fecha_inicio TEXT,
+    fecha_fin    TEXT,
+    persistido   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (record_id, fecha, placa)
+);
+CREATE TABLE IF NOT EXISTS spool (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabla        TEXT NOT NULL,
+    operacion    TEXT NOT NULL,
+    registros    TEXT NOT NULL,
+    creado       TEXT NOT NULL,
+    intentos     INTEGER NOT NULL DEFAULT 0,
+    ultimo_error TEXT,
+    clave        TEXT
+);
+CREATE TABLE IF NOT EXISTS descartadas (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    spool_id     INTEGER,
+    tabla        TEXT NOT NULL,
+    operacion    TEXT NOT NULL,
+    registros    TEXT NOT NULL,
+    creado       TEXT NOT NULL,
+    intentos     INTEGER NOT NULL,
+    error        TEXT,
+    descartado   TEXT NOT NULL
+);
+"""
+
+# Operaciones de NocoDB que se pueden encolar en el spool
+OP_CREATE = "create"
+OP_UPDATE = "update"
+
+# Reenvíos fallidos (por causa transitoria) antes de descartar una entrada
+MAX_INTENTOS_SPOOL = 5
+
+
+def _hoy() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+class JournalLocal:
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columnas = {c["name"] for c in self._conn.execute("PRAGMA table_info(spool)")}
+        if "clave" not in columnas:
+            # Journal creado antes de que el spool se indexara por Id
+            self._conn.execute("ALTER TABLE spool ADD COLUMN clave TEXT")
+        logger.info("Journal local abierto en %s", path)
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Progreso por registro / placa
+    # ------------------------------------------------------------------
+    def registrar_registro(self, record_id: Any, estado: str, pdf_path: Optional[str] = None):
+        self._execute(
+            "INSERT INTO registros (record_id, fecha, estado, pdf_path, actualizado) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(record_id, fecha) DO UPDATE SET "
+            "estado = excluded.estado, pdf_path = excluded.pdf_path, "
+            "actualizado = excluded.actualizado",
+            (str(record_id), _hoy(), estado, pdf_path, datetime.now().isoformat()),
+        )
+
+    def registro_completado(self, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Datos del registro si ya terminó con éxito hoy, si no None."""
+        filas = self._execute(
+            "SELECT estado, pdf_path FROM registros "
+            "WHERE record_id = ? AND fecha = ? AND estado = 'exitoso'",
+            (str(record_id), _hoy()),
+        )
+        return dict(filas[0]) if filas else None
+
+    def registrar_placa(
+        self,
+        record_id: Any,
+        placa: str,
+        detalle: Dict[str, Any],
+        png_path: Optional[str],
+        fecha_inicio: Optional[str] = None,
+        fecha_fin: Optional[str] = None,
+        persistido: bool = False,
+    ):
+        self._execute(
+            "INSERT OR REPLACE INTO placas "
+            "(record_id, fecha, placa, detalle, png_path, fecha_inicio, fecha_fin, persistido) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(record_id), _hoy(), placa, json.dumps(detalle, ensure_ascii=False),
+                png_path, fecha_inicio, fecha_fin, int(persistido),
+            ),
+        )
+
+    def marcar_placas_persistidas(self, record_id: Any, placas: Optional[List[str]] = None):
+        if placas is None:
+            self._execute(
+                "UPDATE placas SET persistido = 1 WHERE record_id = ? AND fecha = ?",
+                (str(record_id), _hoy()),
+            )
+            return
+        for placa in placas:
+            self._execute(
+                "UPDATE placas SET persistido = 1 WHERE record_id = ? AND fecha = ? AND placa = ?",
+                (str(record_id), _hoy(), placa),
+            )
+
+    def placa_completada(self, record_id: Any, placa: str) -> Optional[Dict[str, Any]]:
+        """Detalle ya extraído hoy para la placa (con su captura), o None."""
+        filas = self._execute(
+            "SELECT * FROM placas WHERE record_id = ? AND fecha = ? AND placa = ?",
+            (str(record_id), _hoy(), placa),
+        )
+        if not filas:
+            return None
+        fila = dict(filas[0])
+        fila["detalle"] = json.loads(fila["detalle"])
+        fila["persistido"] = bool(fila["persistido"])
+        return fila
+
+    # ------------------------------------------------------------------
+    # Spool de escrituras hacia NocoDB
+    # ------------------------------------------------------------------
+    def encolar_escritura(
+        self,
+        tabla: str,
+        operacion: str,
+        registros: List[Dict[str, Any]],
+        clave: Optional[str] = None,
+    ):
+        """
+        Guarda una escritura para reenvío. Con ``clave`` (el Id del registro)
+        la entrada reemplaza a las actualizaciones pendientes del mismo Id:
+        sus campos se fusionan debajo de los nuevos, así nunca se reenvía un
+        estado viejo después de uno más reciente.
+        """
+        with self._lock:
+            if clave is not None:
+                previas = self._conn.execute(
+                    "SELECT id, registros FROM spool WHERE tabla = ? AND clave = ? ORDER BY id",
+                    (tabla, clave),
+                ).fetchall()
+                fusion: Dict[str, Any] = {}
+                for fila in previas:
+                    for registro in json.loads(fila["registros"]):
+                        fusion.update(registro)
+                    self._conn.execute("DELETE FROM spool WHERE id = ?", (fila["id"],))
+                if fusion:
+                    registros = [{**fusion, **r} for r in registros]
+            self._conn.execute(
+                "INSERT INTO spool (tabla, operacion, registros, creado, clave) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (tabla, operacion, json.dumps(registros, ensure_ascii=False, default=str),
+                 datetime.now().isoformat(), clave),
+            )
+        logger.warning(
+            "Spool: %d registros (%s %s) guardados para reenvío", len(registros), operacion, tabla
+        )
+
+    def descartar_superadas(self, tabla: str, clave: str) -> int:
+        """
+        Elimina las actualizaciones pendientes de ``clave`` porque una escritura
+        más reciente del mismo Id ya llegó a NocoDB. Retorna cuántas quitó.
+        """
+        with self._lock:
+            n = self._conn.execute(
+                "DELETE FROM spool WHERE tabla = ? AND clave = ?", (tabla, clave)
+            ).rowcount
+        if n:
+            logger.info("Spool: %d escrituras de %s superadas por una más reciente", n, clave)
+        return n
+
+    def escrituras_pendientes(
+        self, tabla: Optional[str] = None, clave: Optional[str] = None
+    ) -> int:
+        """Entradas en spool; con ``tabla``/``clave`` solo las de esa tabla/Id."""
+        if tabla is None:
+            return self._execute("SELECT COUNT(*) AS n FROM spool")[0]["n"]
+        if clave is None:
+            return self._execute(
+                "SELECT COUNT(*) AS n FROM spool WHERE tabla = ?", (tabla,)
+            )[0]["n"]
+        return self._execute(
+            "SELECT COUNT(*) AS n FROM spool WHERE tabla = ? AND clave = ?", (tabla, clave)
+        )[0]["n"]
+
+    def escrituras_descartadas(self) -> int:
+        return self._execute("SELECT COUNT(*) AS n FROM descartadas")[0]["n"]
+
+    def reproducir(self, client) -> int:
+        """
+        Reenvía el spool a NocoDB en orden de llegada con las operaciones bulk
+        del cliente. Un fallo transitorio (conexión, 5xx, circuito abierto)
+        detiene el reenvío para conservar el orden; lo que NocoDB rechaza (4xx)
+        y las entradas que agotan MAX_INTENTOS_SPOOL pasan a ``descartadas``
+        para que no bloqueen a las siguientes.
+        Retorna cuántas entradas se aplicaron.
+        """
+        if not client.disponible():
+            logger.warning("Spool: circuito NocoDB abierto; reenvío aplazado")
+            return 0
+        aplicadas = 0
+        for fila in self._execute("SELECT * FROM spool ORDER BY id"):
+            registros = json.loads(fila["registros"])
+            try:
+                if fila["operacion"] == OP_CREATE:
+                    client.create_records_bulk(fila["tabla"], registros)
+                else:
+                    client.update_records_bulk(fila["tabla"], registros)
+            except Exception as e:
+                if not self._registrar_fallo_reenvio(fila, registros, e):
+                    break
+                continue
+            self._execute("DELETE FROM spool WHERE id = ?", (fila["id"],))
+            aplicadas += 1
+        if aplicadas:
+            logger.info("Spool: %d escrituras reenviadas a NocoDB", aplicadas)
+        return aplicadas
+
+    def _registrar_fallo_reenvio(
+        self, fila: sqlite3.Row, registros: List[Dict[str, Any]], error: Exception
+    ) -> bool:
+        """
+        Actualiza la entrada del spool tras un reenvío fallido.
+        Retorna True si el reenvío puede seguir con la entrada siguiente.
+        """
+        if isinstance(error, NocoDBBulkError):
+            # Solo quedan pendientes los chunks que fallaron por causa transitoria
+            rechazados = error.registros(transitorios=False)
+            pendientes = error.registros(transitorios=True)
+        elif es_fallo_transitorio(error):
+            rechazados, pendientes = [], registros
+        else:
+            rechazados, pendientes = registros, []
+        intentos = fila["intentos"] + 1
+        if rechazados:
+            self._descartar(fila, rechazados, intentos, error)
+        if pendientes and intentos < MAX_INTENTOS_SPOOL:
+            self._execute(
+                "UPDATE spool SET registros = ?, intentos = ?, ultimo_error = ? WHERE id = ?",
+                (json.dumps(pendientes, ensure_ascii=False, default=str), intentos,
+                 str(error)[:500], fila["id"]),
+            )
+            logger.warning(
+                "Spool: reenvío detenido en la entrada %s (intento %d/%d): %s",
+                fila["id"], intentos, MAX_INTENTOS_SPOOL, error,
+            )
+            return False
+        if pendientes:
+            self._descartar(fila, pendientes, intentos, error)
+        self._execute("DELETE FROM spool WHERE id = ?", (fila["id"],))
+        # Agotar reintentos también fue un fallo transitorio: se espera al próximo reenvío
+        return not pendientes
+
+    def _descartar(
+        self, fila: sqlite3.Row, registros: List[Dict[str, Any]], intentos: int, error: Exception
+    ):
+        self.descartar_escritura(
+            fila["tabla"], fila["operacion"], registros, intentos, error,
+            spool_id=fila["id"], creado=fila["creado"],
+        )
+
+    def descartar_escritura(
+        self,
+        tabla: str,
+        operacion: str,
+        registros: List[Dict[str, Any]],
+        intentos: int,
+        error: Exception,
+        spool_id: Optional[int] = None,
+        creado: Optional[str] = None,
+    ):
+        """Guarda en ``descartadas`` una escritura que no se reintentará más."""
+        ahora = datetime.now().isoformat()
+        self._execute(
+            "INSERT INTO descartadas "
+            "(spool_id, tabla, operacion, registros, creado, intentos, error, descartado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (spool_id, tabla, operacion,
+             json.dumps(registros, ensure_ascii=False, default=str), creado or ahora,
+             intentos, str(error)[:500], ahora),
+        )
+        logger.error(
+            "%d registros (%s %s) descartados tras %d intento(s): %s",
+            len(registros), operacion, tabla, intentos, error,
+        )
+
+
+# Singleton helper
+_instance: Optional[JournalLocal] = None
+_instance_lock = threading.Lock()
+
+
+def get_journal(path: Optional[str]) -> Optional[JournalLocal]:
+    """
+    Journal compartido por el proceso; None si no hay ruta configurada
+    (JOURNAL_PATH), con lo que el flujo funciona como antes.
+    """
+    global _instance
+    if not path:
+        return None
+    with _instance_lock:
+        if _instance is None:
+            _instance = JournalLocal(path)
+    return _instance
@@ -0,0 +1,232 @@
+"""
+AsyncNocoDBClient: cliente asyncio para NocoDB API v2.
+
+Misma superficie que NocoDBClient (list_records, create_record, update_record,
+update_record_by_id y variantes bulk) sobre una única aiohttp.ClientSession
+con keep-alive y concurrencia acotada por semáforo.
+
+Como el flujo Selenium es síncrono, el cliente puede levantar su propio event
+loop en un hilo (start) y recibir corrutinas con submit (no bloquea, devuelve
+un concurrent.futures.Future) o run (bloquea hasta el resultado).
+
+Comparte el CircuitBreaker del cliente síncrono si se le pasa, de modo que
+ambos clientes abren y cierran el mismo circuito hacia NocoDB.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional
+
+import aiohttp
+
+from app.infrastructure.nocodb_client import (
+    BULK_CHUNK_SIZE,
+    RETRY_STATUS,
+    NocoDBBulkError,
+    build_where_params,
+)
+from app.utils.logging_utils import get_logger
+from app.utils.retry_utils import CircuitBreaker, CircuitOpenError, es_fallo_transitorio
+
+logger = get_logger("nocodb_async_client")
+
+
+class AsyncNocoDBClient:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_concurrency: int = 8,
+        timeout: int = 30,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"xc-token": api_key, "Content-Type": "application/json"}
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker("nocodb")
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency, keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers, connector=connector, timeout=self.timeout
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def aclose(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "AsyncNocoDBClient":
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def start(self) -> "AsyncNocoDBClient":
+        """Levanta un event loop propio en un hilo daemon (uso desde código síncrono)."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="nocodb-async", daemon=True
+            )
+            self._thread.start()
+            logger.info("Event loop de AsyncNocoDBClient iniciado")
+        return self
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Programa la corrutina en el loop de fondo sin esperar el resultado."""
+        if self._loop is None:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Ejecuta la corrutina en el loop de fondo y espera el resultado."""
+        return self.submit(coro).result(timeout)
+
+    def close(self):
+        """Cierra la sesión HTTP y detiene el loop de fondo, si existe."""
+        if self._loop is None:
+            return
+        try:
+            self.run(self.aclose(), timeout=10)
+        except Exception as e:
+            logger.warning("Error cerrando sesión de AsyncNocoDBClient: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Peticiones
+    # ------------------------------------------------------------------
+    def _url(self, table: str) -> str:
+        return f"{self.base_url}/api/v2/tables/{table}/records"
+
+    async def _request(self, method: str, url: str, **kwargs) -> Any:
+        """Petición única (sin reintentos) que registra su resultado en el breaker."""
+        if not self.circuit_breaker.permitir():
+            raise CircuitOpenError(f"Circuito NocoDB abierto; se rechaza {method} {url}")
+        sano = False
+        try:
+            session = await self._get_session()
+            async with self._semaphore:
+                async with session.request(method, url, **kwargs) as r:
+                    sano = r.status not in RETRY_STATUS
+                    if r.status >= 400:
+                        logger.error("Error %s %s: %s", method, url, (await r.text())[:500])
+                    r.raise_for_status()
+                    try:
+                        return await r.json(content_type=None)
+                    except ValueError:
+                        return {"msg": "OK", "status_code": r.status}
+        finally:
+            if sano:
+                self.circuit_breaker.registrar_exito()
+            else:
+                self.circuit_breaker.registrar_fallo()
+
+    async def list_records(
+        self,
+        table: str,
+        where: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        params = build_where_params(where)
+        params["limit"] = limit
+        if fields:
+            params["fields"] = ",".join(fields)
+        data = await self._request("GET", self._url(table), params=params)
+        return data.get("list", data) if isinstance(data, dict) else data
+
+    async def iter_records(
+        self,
+        table: str,
+        where: Optional[str] = None,
+        page_size: int = 100,
+        fields: Optional[List[str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        params = build_where_params(where)
+        params["limit"] = page_size
+        if fields:
+            params["fields"] = ",".join(fields)
+        offset = 0
+        while True:
+            data = await self._request(
+                "GET", self._url(table), params={**params, "offset": offset}
+            )
+            rows = data.get("list", []) if isinstance(data, dict) else data
+            for row in rows:
+                yield row
+            page_info = data.get("pageInfo", {}) if isinstance(data, dict) else {}
+            if page_info.get("isLastPage", True) or not rows:
+                break
+            offset += len(rows)
+
+    async def create_record(self, table: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("POST", self._url(table), json=payload)
+
+    async def update_record(self, table: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request("PATCH", self._url(table), json=payload)
+
+    async def update_record_by_id(
+        self, table: str, row_id: str | int, payload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        payload = {k: v for k, v in payload.items() if k.lower() != "id"}  # no tocar el Id
+        payload["Id"] = row_id
+        return await self._request("PATCH", self._url(table), json=payload)
+
+    async def _bulk(
+        self, method: str, table: str, records: List[Dict[str, Any]], chunk_size: int
+    ) -> List[Dict[str, Any]]:
+        """Envía los chunks de forma concurrente (acotado por el semáforo)."""
+        chunks = [
+            (start, records[start:start + chunk_size])
+            for start in range(0, len(records), chunk_size)
+        ]
+        results = await asyncio.gather(
+            *(self._request(method, self._url(table), json=chunk) for _, chunk in chunks),
+            return_exceptions=True,
+        )
+        responses: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        for (start, chunk), result in zip(chunks, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Chunk %d-%d fallido en %s bulk: %s",
+                    start, start + len(chunk) - 1, method, result,
+                )
+                failed.append({
+                    "offset": start, "records": chunk, "error": str(result),
+                    "transitorio": es_fallo_transitorio(result),
+                })
+            else:
+                responses.extend(result if isinstance(result, list) else [result])
+        if failed:
+            raise NocoDBBulkError(failed, responses)
+        return responses
+
+    async def create_records_bulk(
+        self, table: str, records: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Any]]:
+        return await self._bulk("POST", table, records, chunk_size)
+
+    async def update_records_bulk(
+        self, table: str, records: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Any]]:
+        return await self._bulk("PATCH", table, records, chunk_size)
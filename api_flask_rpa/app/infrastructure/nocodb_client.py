@@ -1,100 +1,403 @@
 import requests
 import json
-from typing import Any, Dict, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Iterator, List, Optional
 from app.utils.logging_utils import get_logger
+from app.utils.retry_utils import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    backoff_con_jitter,
+    es_fallo_transitorio,
+)
 
 logger = get_logger("nocodb_client")
 
+# Máximo de registros por petición en las operaciones bulk.
+BULK_CHUNK_SIZE = 100
+
+# Códigos que se consideran fallos transitorios del servidor.
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Métodos idempotentes: se reintentan ante timeouts y errores de conexión.
+# POST solo se reintenta si la conexión ni siquiera se estableció o ante 503.
+IDEMPOTENT_METHODS = {"GET", "PATCH"}
+
+
+class NocoDBBulkError(Exception):
+    """
+    Error en una operación bulk. Conserva qué chunks fallaron (con sus
+    registros y si el fallo fue transitorio) y las respuestas de los que sí
+    se aplicaron.
+    """
+    def __init__(self, failed_chunks: List[Dict[str, Any]], responses: List[Dict[str, Any]]):
+        self.failed_chunks = failed_chunks
+        self.responses = responses
+        total = sum(len(c["records"]) for c in failed_chunks)
+        super().__init__(
+            f"{len(failed_chunks)} chunk(s) fallidos ({total} registros): "
+            + "; ".join(c["error"] for c in failed_chunks)
+        )
+
+    def registros(self, transitorios: bool) -> List[Dict[str, Any]]:
+        """
+        Registros de los chunks fallidos por causa transitoria (reenviables)
+        o definitiva (rechazados por NocoDB, p. ej. 4xx).
+        """
+        return [
+            r
+            for c in self.failed_chunks
+            if c.get("transitorio", True) == transitorios
+            for r in c["records"]
+        ]
+
+
+def build_where_params(where: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Traduce el filtro recibido a los parámetros de query que espera NocoDB.
+    """
+    params = {}
+    if where:
+        # Accept either a dict (to be JSON-encoded) or a pre-built
+        # string filter. Some call sites pass a string like
+        # "EstadoGestion,eq,Sin Procesar" — convert that into the
+        # JSON array form that NocoDB expects (array of arrays)
+        # e.g. [["EstadoGestion","eq","Sin Procesar"]]
+        if isinstance(where, dict):
+            params["where"] = json.dumps(where)
+        else:
+            s = str(where)
+            if s.startswith("("):
+                # Filtro ya armado, p. ej. "(a,eq,1)~and(b,eq,2)"
+                params["filter"] = s
+                return params
+            # if filter looks like 'col,op,value' convert to JSON array
+            parts = [p.strip() for p in s.split(",")]
+            if len(parts) >= 3:
+                # join remaining parts as the value (in case value contains commas)
+                col = parts[0]
+                op = parts[1].lower()  # aseguramos que el operador esté en minúsculas
+                val = ",".join(parts[2:]).strip()
+
+                # Convertir a query string format que espera NocoDB
+                filter_str = f"({col},{op},{val})"
+                params["filter"] = filter_str
+                logger.debug("Usando filtro: %s", filter_str)
+            else:
+                # fallback: send raw string
+                params["where"] = s
+                logger.warning("Filtro no tiene formato col,op,val: %s", s)
+    return params
+
 
 class NocoDBClient:
     """
     Cliente para NocoDB API v2.
     Compatible con:
-    GET  /api/v2/tables/{table_id}/records
-    POST /api/v2/tables/{table_id}/records
-    PATCH /api/v2/tables/{table_id}/records
+    GET  /api/v2/tables/{table_id}/records  (paginado con limit/offset)
+    GET  /api/v2/tables/{table_id}/records/count
+    POST /api/v2/tables/{table_id}/records  (objeto o array de objetos)
+    PATCH /api/v2/tables/{table_id}/records (objeto o array de objetos)
     """
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_retries: int = 3,
+        pool_maxsize: int = 10,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
         self.session.headers.update(
             {"xc-token": api_key, "Content-Type": "application/json"}
         )
+        # Pool dimensionado para los envíos bulk en paralelo; los reintentos
+        # los gestiona _request (no urllib3) para aplicar jitter y presupuesto.
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.max_retries = max_retries
+        self.retry_budget = RetryBudget()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker("nocodb")
 
-    def list_records(
-        self, table: str, where: Optional[str] = None, limit: int = 100
-    ) -> List[Dict[str, Any]]:
+    def disponible(self) -> bool:
+        """False mientras el circuito hacia NocoDB esté abierto."""
+        return not self.circuit_breaker.abierto
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
         """
-        Obtiene registros desde una tabla en NocoDB API v2.
+        Envía la petición con circuit breaker y reintentos (backoff con jitter
+        limitado por el presupuesto de reintentos). Devuelve la última respuesta;
+        el caller decide si llama raise_for_status.
+
+        El breaker cuenta un éxito o un fallo por petición lógica (no por
+        reintento). Cualquier excepción cuenta como fallo, así una petición de
+        prueba en half_open siempre libera el circuito.
         """
-        url = f"{self.base_url}/api/v2/tables/{table}/records"
-        params = {}
-        if where:
-            # Accept either a dict (to be JSON-encoded) or a pre-built
-            # string filter. Some call sites pass a string like
-            # "EstadoGestion,eq,Sin Procesar" — convert that into the
-            # JSON array form that NocoDB expects (array of arrays)
-            # e.g. [["EstadoGestion","eq","Sin Procesar"]]
-            if isinstance(where, dict):
-                params["where"] = json.dumps(where)
+        kwargs.setdefault("timeout", 30)
+        self.retry_budget.registrar_peticion()
+        if not self.circuit_breaker.permitir():
+            raise CircuitOpenError(f"Circuito NocoDB abierto; se rechaza {method} {url}")
+        sano = False
+        try:
+            r = self._enviar_con_reintentos(method, url, **kwargs)
+            sano = r.status_code not in RETRY_STATUS
+            return r
+        finally:
+            if sano:
+                self.circuit_breaker.registrar_exito()
             else:
-                s = str(where)
-                # if filter looks like 'col,op,value' convert to JSON array
-                parts = [p.strip() for p in s.split(",")]
-                if len(parts) >= 3:
-                    # join remaining parts as the value (in case value contains commas)
-                    col = parts[0]
-                    op = parts[1].lower()  # aseguramos que el operador esté en minúsculas
-                    val = ",".join(parts[2:]).strip()
-
-                    # Prueba con formato de filtro array usando corchetes
-                    where_json = {
-                        "fk_column_id": col,
-                        "status": "enable",
-                        "logical_op": "and",
-                        "comparison_op": op,
-                        "value": val
-                    }
-
-                    # Convertir a query string format que espera NocoDB
-                    filter_str = f"({col},{op},{val})"
-                    params["filter"] = filter_str
-                    logger.debug("Usando filtro: %s", filter_str)
-                else:
-                    # fallback: send raw string
-                    params["where"] = s
-                    logger.warning("Filtro no tiene formato col,op,val: %s", s)
+                self.circuit_breaker.registrar_fallo()
 
-        params["limit"] = limit
+    def _enviar_con_reintentos(self, method: str, url: str, **kwargs) -> requests.Response:
+        intento = 0
+        while True:
+            intento += 1
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                reintentable = (
+                    method in IDEMPOTENT_METHODS
+                    or isinstance(e, requests.exceptions.ConnectTimeout)
+                )
+                if not reintentable or not self._puede_reintentar(intento):
+                    raise
+                espera = backoff_con_jitter(intento)
+                logger.warning(
+                    "%s %s falló (%s); reintento %d/%d en %.2fs",
+                    method, url, e, intento, self.max_retries, espera,
+                )
+                time.sleep(espera)
+                continue
+
+            if r.status_code not in RETRY_STATUS:
+                return r
+            reintentable = method in IDEMPOTENT_METHODS or r.status_code == 503
+            if not reintentable or not self._puede_reintentar(intento):
+                return r
+            espera = backoff_con_jitter(intento)
+            retry_after = r.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                espera = max(espera, float(retry_after))
+            logger.warning(
+                "%s %s respondió %d; reintento %d/%d en %.2fs",
+                method, url, r.status_code, intento, self.max_retries, espera,
+            )
+            time.sleep(espera)
+
+    def _puede_reintentar(self, intento: int) -> bool:
+        if intento > self.max_retries:
+            return False
+        if not self.retry_budget.consumir():
+            logger.warning("Presupuesto de reintentos agotado; no se reintenta")
+            return False
+        return True
+
+    def _get_page(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ejecuta un GET sobre /records y devuelve el cuerpo JSON completo
+        (``list`` + ``pageInfo``).
+        """
         logger.debug("GET %s params=%s", url, params)
         try:
             # Construir y loggear la URL completa antes de la petición
             prepared_request = requests.Request('GET', url, params=params).prepare()
             logger.debug("URL completa: %s", prepared_request.url)
-            r = self.session.get(url, params=params, timeout=30)
+            r = self._request("GET", url, params=params)
             logger.debug("Response status=%d headers=%s", r.status_code, dict(r.headers))
             if r.status_code >= 400:
                 logger.error("Error response: %s", r.text[:1000])
             r.raise_for_status()
-            data = r.json()
-            result = data.get("list", data)
-            logger.debug("Registros obtenidos: %d", len(result) if result else 0)
-            if result:
-                logger.debug("Ejemplo primer registro: %s", result[0])
-            return result
+            return r.json()
         except requests.exceptions.RequestException as e:
             logger.error("Error en request: %s", str(e))
             raise
 
+    def list_records(
+        self,
+        table: str,
+        where: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Obtiene registros desde una tabla en NocoDB API v2.
+        ``fields`` limita las columnas devueltas (None trae todas) y ``sort``
+        ordena con la sintaxis de NocoDB (p. ej. "-Id").
+        """
+        url = f"{self.base_url}/api/v2/tables/{table}/records"
+        params = build_where_params(where)
+        params["limit"] = limit
+        if fields:
+            params["fields"] = ",".join(fields)
+        if sort:
+            params["sort"] = sort
+        data = self._get_page(url, params)
+        result = data.get("list", data)
+        logger.debug("Registros obtenidos: %d", len(result) if result else 0)
+        if result:
+            logger.debug("Ejemplo primer registro: %s", result[0])
+        return result
+
+    def count_records(self, table: str, where: Optional[str] = None) -> int:
+        """
+        Cuenta los registros que cumplen el filtro sin descargarlos.
+        GET /api/v2/tables/{table}/records/count
+        """
+        url = f"{self.base_url}/api/v2/tables/{table}/records/count"
+        data = self._get_page(url, build_where_params(where))
+        count = int(data.get("count", 0))
+        logger.debug("Conteo %s where=%s -> %d", table, where, count)
+        return count
+
+    def iter_records(
+        self,
+        table: str,
+        where: Optional[str] = None,
+        page_size: int = 100,
+        fields: Optional[List[str]] = None,
+        prefetch: bool = False,
+        sort: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todos los registros de una tabla página a página siguiendo
+        ``pageInfo.isLastPage`` y los entrega de forma perezosa.
+
+        :param page_size: Registros por página (``limit`` de NocoDB).
+        :param fields: Columnas a devolver; None trae todas.
+        :param prefetch: Si es True, pide la página siguiente en segundo plano
+            mientras se consumen los registros de la actual.
+        :param sort: Orden en sintaxis NocoDB (p. ej. "-Id").
+        """
+        url = f"{self.base_url}/api/v2/tables/{table}/records"
+        base_params = build_where_params(where)
+        base_params["limit"] = page_size
+        if fields:
+            base_params["fields"] = ",".join(fields)
+        if sort:
+            base_params["sort"] = sort
+
+        def fetch(offset: int) -> Dict[str, Any]:
+            return self._get_page(url, {**base_params, "offset": offset})
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            offset = 0
+            data = fetch(offset)
+            while True:
+                rows = data.get("list", []) if isinstance(data, dict) else data
+                page_info = data.get("pageInfo", {}) if isinstance(data, dict) else {}
+                # Sin pageInfo no hay forma de paginar: se asume página única.
+                last_page = page_info.get("isLastPage", True) or not rows
+                offset += len(rows)
+
+                siguiente = None
+                if not last_page and executor:
+                    siguiente = executor.submit(fetch, offset)
+
+                yield from rows
+
+                if last_page:
+                    break
+                data = siguiente.result() if siguiente else fetch(offset)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
     def create_record(self, table: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Crea un nuevo registro en la tabla indicada.
         """
         url = f"{self.base_url}/api/v2/tables/{table}/records"
-        r = self.session.post(url, json=payload, timeout=30)
+        r = self._request("POST", url, json=payload)
         r.raise_for_status()
         return r.json()
 
+    def create_records_bulk(
+        self, table: str, records: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE
+    ) -> List[Dict[str, Any]]:
+        """
+        Crea varios registros enviando arrays a POST /records, en chunks de
+        ``chunk_size``. Si algún chunk falla se sigue con los demás y al final
+        se lanza NocoDBBulkError con el detalle de los registros no creados.
+        """
+        url = f"{self.base_url}/api/v2/tables/{table}/records"
+        responses: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            try:
+                r = self._request("POST", url, json=chunk)
+                if r.status_code >= 400:
+                    logger.error("Error en create_records_bulk: %s", r.text[:500])
+                r.raise_for_status()
+                data = r.json()
+                responses.extend(data if isinstance(data, list) else [data])
+            except requests.exceptions.RequestException as e:
+                logger.error(
+                    "Chunk %d-%d fallido en create_records_bulk: %s",
+                    start, start + len(chunk) - 1, str(e),
+                )
+                failed.append({
+                    "offset": start, "records": chunk, "error": str(e),
+                    "transitorio": es_fallo_transitorio(e),
+                })
+        if failed:
+            raise NocoDBBulkError(failed, responses)
+        return responses
+
+    def update_records_bulk(
+        self,
+        table: str,
+        records: List[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        max_workers: int = 1,
+    ) -> List[Dict[str, Any]]:
+        """
+        Actualiza varios registros enviando arrays a PATCH /records. Cada
+        registro debe incluir su ``Id``. Con ``max_workers`` > 1 los chunks se
+        envían en paralelo. Los chunks fallidos se reportan con NocoDBBulkError.
+        """
+        url = f"{self.base_url}/api/v2/tables/{table}/records"
+        chunks = [
+            (start, records[start:start + chunk_size])
+            for start in range(0, len(records), chunk_size)
+        ]
+
+        def send(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            r = self._request("PATCH", url, json=chunk)
+            if r.status_code >= 400:
+                logger.error("Error en update_records_bulk: %s", r.text[:500])
+            r.raise_for_status()
+            try:
+                data = r.json()
+            except ValueError:
+                return [{"msg": "OK", "status_code": r.status_code}]
+            return data if isinstance(data, list) else [data]
+
+        responses: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [(start, chunk, executor.submit(send, chunk)) for start, chunk in chunks]
+            for start, chunk, future in futures:
+                try:
+                    responses.extend(future.result())
+                except requests.exceptions.RequestException as e:
+                    logger.error(
+                        "Chunk %d-%d fallido en update_records_bulk: %s",
+                        start, start + len(chunk) - 1, str(e),
+                    )
+                    failed.append({
+                        "offset": start, "records": chunk, "error": str(e),
+                        "transitorio": es_fallo_transitorio(e),
+                    })
+        if failed:
+            raise NocoDBBulkError(failed, responses)
+        return responses
+
     def update_record(
         self, table: str, payload: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -102,7 +405,7 @@ class NocoDBClient:
         Actualiza un registro en la tabla indicada.
         """
         url = f"{self.base_url}/api/v2/tables/{table}/records"
-        r = self.session.patch(url, json=payload, timeout=30)
+        r = self._request("PATCH", url, json=payload)
         r.raise_for_status()
         return r.json()
 
@@ -119,7 +422,7 @@ class NocoDBClient:
         logger.info("PATCH %s?where=%s", url, where)
 
         try:
-            r = self.session.patch(url, params=params, json=payload, timeout=30)
+            r = self._request("PATCH", url, params=params, json=payload)
             logger.debug(
                 "Response status=%d headers=%s", r.status_code, dict(r.headers)
             )
@@ -142,7 +445,7 @@ class NocoDBClient:
         url = f"{self.base_url}/api/v2/tables/{table}/records"
         payload = {k: v for k, v in payload.items() if k.lower() != "id"}  # no tocar el Id
         payload["Id"] = row_id
-        r = self.session.patch(url, json=payload, timeout=30)
+        r = self._request("PATCH", url, json=payload)
         r.raise_for_status()
         try:
             return r.json()
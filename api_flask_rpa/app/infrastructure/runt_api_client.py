@@ -0,0 +1,121 @@
+"""
+Cliente HTTP del backend de RUNT PRO (el mismo que consume la app Angular).
+
+No hace login propio: toma el token bearer y las cookies de un WebDriver
+que ya inició sesión (cargar_credenciales_desde_driver) y los reutiliza en
+una requests.Session con pool de conexiones.
+"""
+import re
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Optional
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("runt_api_client")
+
+# Busca el token en localStorage/sessionStorage: claves con "token" o
+# valores con forma de JWT (MSAL guarda objetos JSON con "secret").
+JS_BUSCAR_TOKEN = """
+    var esJwt = function (v) {
+        return typeof v === 'string' && /^eyJ[\\w-]+\\.[\\w-]+\\.[\\w-]*$/.test(v);
+    };
+    var almacenes = [window.localStorage, window.sessionStorage];
+    for (var a = 0; a < almacenes.length; a++) {
+        var s = almacenes[a];
+        for (var i = 0; i < s.length; i++) {
+            var clave = s.key(i), valor = s.getItem(clave);
+            if (esJwt(valor)) return valor;
+            if (/token/i.test(clave) || /accesstoken/i.test(valor || '')) {
+                try {
+                    var obj = JSON.parse(valor);
+                    var candidato = obj && (
+                        obj.secret || obj.access_token || obj.accessToken || obj.token
+                    );
+                    if (esJwt(candidato)) return candidato;
+                } catch (e) {}
+            }
+        }
+    }
+    return null;
+"""
+
+
+class RuntApiError(Exception):
+    """Respuesta inesperada del backend RUNT (no JSON, 5xx, etc.)."""
+
+
+class RuntApiAuthError(RuntApiError):
+    """Token/cookies vencidos o rechazados (401/403)."""
+
+
+class RuntApiClient:
+    def __init__(self, base_url: str, timeout: float = 15, pool_maxsize: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.token: Optional[str] = None
+
+    @property
+    def autenticado(self) -> bool:
+        return bool(self.token) or bool(self.session.cookies)
+
+    def cargar_credenciales_desde_driver(self, driver) -> bool:
+        """
+        Copia cookies y token bearer del navegador con sesión RUNT activa.
+        Retorna True si quedó alguna credencial utilizable.
+        """
+        self.invalidar()
+        try:
+            for cookie in driver.get_cookies():
+                self.session.cookies.set(
+                    cookie["name"], cookie["value"],
+                    domain=cookie.get("domain"), path=cookie.get("path", "/"),
+                )
+            self.token = driver.execute_script(JS_BUSCAR_TOKEN)
+        except Exception as e:
+            logger.warning("No se pudieron leer credenciales del navegador: %s", e)
+            return False
+        if self.token:
+            self.session.headers["Authorization"] = f"Bearer {self.token}"
+        logger.info(
+            "Credenciales RUNT tomadas del navegador (token=%s, cookies=%d)",
+            "sí" if self.token else "no", len(self.session.cookies),
+        )
+        return self.autenticado
+
+    def invalidar(self) -> None:
+        self.token = None
+        self.session.headers.pop("Authorization", None)
+        self.session.cookies.clear()
+
+    def get_json(self, ruta: str, **valores) -> Any:
+        """
+        GET a la ruta (plantilla con {placeholders} rellenados con ``valores``).
+        Lanza RuntApiAuthError en 401/403 y RuntApiError en otros fallos.
+        """
+        escapados = {k: requests.utils.quote(str(v)) for k, v in valores.items()}
+        url = self.base_url + ruta.format(**escapados)
+        try:
+            r = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise RuntApiError(f"Error de conexión con RUNT: {e}") from e
+        if r.status_code in (401, 403):
+            raise RuntApiAuthError(f"RUNT rechazó las credenciales ({r.status_code})")
+        if r.status_code >= 400:
+            raise RuntApiError(f"RUNT respondió {r.status_code} en {_sin_query(url)}")
+        try:
+            return r.json()
+        except ValueError as e:
+            raise RuntApiError(f"Respuesta no JSON en {_sin_query(url)}") from e
+
+    def close(self):
+        self.session.close()
+
+
+def _sin_query(url: str) -> str:
+    """URL sin parámetros (no registrar documentos en los logs)."""
+    return re.sub(r"\?.*$", "", url)
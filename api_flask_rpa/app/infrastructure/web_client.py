@@ -3,28 +3,65 @@ WebClient: wrapper Selenium para RUNT PRO.
 Modificado para usar rutas de entorno en lugar de ChromeDriverManager.
 """
 import os  # Importa 'os' para leer las variables de entorno
+import json
+import re
+import shutil
+import tempfile
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 # Se elimina ChromeDriverManager, ya no es necesario
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from typing import Optional
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from typing import Any, Dict, List, Optional, Tuple
 import time
 
+PERFIL_COMPLETO = "completo"
+PERFIL_LIGERO = "ligero"
+
+# Bloqueados en el perfil ligero (Network.setBlockedURLs). Fuentes e imágenes
+# del portal NO se bloquean: Material Icons y logos salen en las evidencias.
+URLS_BLOQUEADAS_DEFECTO = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*newrelic.com*",
+    "*nr-data.net*",
+    "*.mp4",
+    "*.webm",
+]
+
 
 class WebClient:
     def __init__(
         self, base_url: str,
-        browser=None, timeout: int = 20
+        browser=None, timeout: int = 20,
+        perfil: Optional[str] = None,
     ):
         """
         Constructor modificado. 
         El modo headless se controla por variables de entorno (SELENIUM_HEADLESS).
+        perfil: "completo" (por defecto) o "ligero" (SELENIUM_PERFIL): carga
+        eager, URLs no esenciales bloqueadas y perfil de Chrome en tmpfs.
         """
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.perfil = (perfil or os.environ.get("SELENIUM_PERFIL") or PERFIL_COMPLETO).lower()
+        self._perfil_dir: Optional[str] = None
+        # Esperas resueltas dentro de la página (MutationObserver) en lugar
+        # de sondear por WebDriver cada 500 ms. Opcional: SELENIUM_JS_WAITS=True
+        self.js_waits = os.environ.get("SELENIUM_JS_WAITS") == "True"
+        # Timeout de scripts de la sesión, leído en el primer _async_script
+        self._script_timeout_previo: Optional[float] = None
+        # Captura de respuestas XHR/JSON desde el log de rendimiento de Chrome
+        self.captura_xhr = os.environ.get("SELENIUM_CAPTURA_XHR") == "True"
+        self._capturas: List[Tuple[str, Any]] = []
+        # requestId -> URL de respuestas JSON cuyo cuerpo aún no terminó de llegar
+        self._json_en_curso: Dict[str, str] = {}
         self.driver = browser or self._create_driver()
         self.wait = WebDriverWait(self.driver, self.timeout)
 
@@ -60,6 +97,11 @@ class WebClient:
         options.add_argument("--no-zygote")
         options.add_argument("--ignore-certificate-errors")
         options.add_argument("--window-size=1920,1080")
+        if self.captura_xhr:
+            # Eventos Network.* de DevTools disponibles vía driver.get_log("performance")
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        if self.perfil == PERFIL_LIGERO:
+            self._aplicar_perfil_ligero(options)
 
         # --- 3. Usar el ChromeDriver instalado en el Dockerfile ---
         driver_path = os.environ.get("CHROMEDRIVER_PATH", "/usr/local/bin/chromedriver")
@@ -75,8 +117,42 @@ class WebClient:
         print(f"Usando ChromeDriver desde: {driver_path}")
         
         driver = webdriver.Chrome(service=service, options=options)
+        if self.perfil == PERFIL_LIGERO:
+            self._bloquear_urls(driver)
         return driver
 
+    def _aplicar_perfil_ligero(self, options):
+        """Opciones del perfil ligero; la ventana se mantiene en 1920x1080 para las evidencias."""
+        # driver.get retorna en DOMContentLoaded; las esperas por condición cubren el resto
+        options.page_load_strategy = "eager"
+        for arg in (
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--no-first-run",
+            "--metrics-recording-only",
+            "--mute-audio",
+        ):
+            options.add_argument(arg)
+        # Perfil en memoria (tmpfs): sin E/S de disco por caché/historial
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self._perfil_dir = tempfile.mkdtemp(prefix="runt-chrome-", dir=base)
+        options.add_argument(f"--user-data-dir={self._perfil_dir}")
+
+    def _bloquear_urls(self, driver):
+        patrones = os.environ.get("SELENIUM_BLOCKED_URLS")
+        if patrones:
+            urls = [p.strip() for p in patrones.split(",") if p.strip()]
+        else:
+            urls = URLS_BLOQUEADAS_DEFECTO
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+        except WebDriverException as e:
+            print(f"Advertencia: no se pudo aplicar Network.setBlockedURLs: {e}")
+
     def open(self, path: str = "/"):
         url = self.base_url + (path if path.startswith("/") else f"/{path}")
         self.driver.get(url)
@@ -198,18 +274,25 @@ class WebClient:
             self.driver.quit()
         except Exception:
             pass
+        if self._perfil_dir:
+            shutil.rmtree(self._perfil_dir, ignore_errors=True)
+            self._perfil_dir = None
 
     def find_by_selector(self, selector: dict, timeout: Optional[int] = None):
         """
         Recibe un diccionario de selector del YAML, por ejemplo:
         {"by": "xpath", "value": "//*[@id='signInName']"}
         """
-        by = selector.get("by", "xpath").lower()
-        value = selector.get("value")
-        return self.find_element(By.XPATH if by == "xpath" else By.CSS_SELECTOR, value, timeout=timeout)
+        if self.js_waits:
+            el = self._wait_js_o_none(selector, timeout, "presente")
+            if el is not None:
+                return el
+        return self.find_element(self._by(selector), selector.get("value"), timeout=timeout)
 
     def click_selector(self, selector: dict, timeout: Optional[int] = None):
-        el = self.find_by_selector(selector, timeout)
+        el = self._wait_js_o_none(selector, timeout, "clicable") if self.js_waits else None
+        if el is None:
+            el = self.wait_clickable(selector, timeout)
         self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
         el.click()
         return el
@@ -244,12 +327,285 @@ class WebClient:
         Espera hasta que un elemento es visible en el DOM.
         Retorna True si aparece, False si no.
         """
-        by = selector.get("by", "xpath").lower()
+        if self.js_waits:
+            try:
+                if self._wait_js_o_none(selector, timeout, "visible") is not None:
+                    return True
+            except TimeoutException:
+                return False
+            # El script no pudo esperar (p. ej. navegación): se usa WebDriverWait
         value = selector.get("value")
         try:
-            WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located((by, value))
+            WebDriverWait(self.driver, timeout or self.timeout).until(
+                EC.visibility_of_element_located((self._by(selector), value))
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    # ------------------------------------------------------------------
+    # Esperas por condición (el timeout es solo un tope)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _by(selector: dict):
+        by = selector.get("by", "xpath").lower()
+        return {"xpath": By.XPATH, "tag": By.TAG_NAME}.get(by, By.CSS_SELECTOR)
+
+    def wait_clickable(self, selector: dict, timeout: Optional[float] = None):
+        """Espera a que el elemento sea visible y esté habilitado; lo retorna."""
+        return WebDriverWait(self.driver, timeout or self.timeout).until(
+            EC.element_to_be_clickable((self._by(selector), selector.get("value")))
+        )
+
+    def wait_invisible(self, selector: dict, timeout: Optional[float] = None) -> bool:
+        """True cuando el elemento no está (o no es visible); False si vence el tope."""
+        try:
+            WebDriverWait(self.driver, timeout or self.timeout).until(
+                EC.invisibility_of_element_located((self._by(selector), selector.get("value")))
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    def wait_any_visible(self, selectors: list, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Espera a que aparezca cualquiera de los selectores y retorna el índice
+        del primero visible, o None si vence el tope.
+        """
+        def alguno(driver):
+            for idx, selector in enumerate(selectors):
+                try:
+                    for el in driver.find_elements(self._by(selector), selector.get("value")):
+                        if el.is_displayed():
+                            return (idx,)
+                except Exception:
+                    continue
+            return False
+
+        espera = WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=0.2)
+        try:
+            return espera.until(alguno)[0]
+        except TimeoutException:
+            return None
+
+    def _async_script(self, script: str, timeout: float, *args):
+        """
+        execute_async_script con tope propio; al terminar restaura el timeout
+        de scripts de la sesión para no alterar otros execute_async_script.
+        """
+        if self._script_timeout_previo is None:
+            self._script_timeout_previo = self.driver.timeouts.script
+        self.driver.set_script_timeout(timeout)
+        try:
+            return self.driver.execute_async_script(script, *args)
+        finally:
+            self.driver.set_script_timeout(self._script_timeout_previo)
+
+    def wait_angular_stable(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que Angular no tenga tareas pendientes (XHR, timers) usando
+        las Testabilities de la página. En páginas sin Angular retorna de inmediato.
+        """
+        script = """
+            var listo = arguments[arguments.length - 1];
+            if (!window.getAllAngularTestabilities) { listo(true); return; }
+            var t = window.getAllAngularTestabilities();
+            if (!t.length) { listo(true); return; }
+            var pendientes = t.length;
+            t.forEach(function (x) {
+                x.whenStable(function () { if (--pendientes === 0) listo(true); });
+            });
+        """
+        try:
+            return bool(self._async_script(script, timeout or self.timeout))
+        except TimeoutException:
+            return False
+
+    def wait_document_ready(self, timeout: Optional[float] = None) -> bool:
+        try:
+            WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=0.2).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
             )
             return True
         except TimeoutException:
-            return False
\ No newline at end of file
+            return False
+
+    def wait_page_ready(
+        self, timeout: Optional[float] = None, spinner: Optional[dict] = None
+    ) -> bool:
+        """
+        Documento cargado, Angular estable y (si se indica) el spinner de
+        carga oculto, todo dentro del mismo tope de tiempo.
+        """
+        limite = time.monotonic() + (timeout or self.timeout)
+
+        def restante() -> float:
+            return max(0.1, limite - time.monotonic())
+
+        ok = self.wait_document_ready(restante()) and self.wait_angular_stable(restante())
+        if spinner:
+            ok = self.wait_invisible(spinner, restante()) and ok
+        return ok
+
+    def wait_repaint(self, timeout: float = 2.0) -> None:
+        """
+        Espera dos frames de animación: cambios de estilo ya pintados
+        (p. ej. antes de una captura).
+        """
+        script = """
+            var listo = arguments[arguments.length - 1];
+            requestAnimationFrame(function () {
+                requestAnimationFrame(function () { listo(true); });
+            });
+        """
+        try:
+            self._async_script(script, timeout)
+        except TimeoutException:
+            pass
+
+    # ------------------------------------------------------------------
+    # Espera dentro del navegador (una sola ida y vuelta a WebDriver)
+    # ------------------------------------------------------------------
+    _JS_ESPERA = """
+        var by = arguments[0], valor = arguments[1], modo = arguments[2], limiteMs = arguments[3];
+        var listo = arguments[arguments.length - 1];
+        function candidatos() {
+            if (by === 'xpath') {
+                var r = document.evaluate(
+                    valor, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+                );
+                var lista = [];
+                for (var i = 0; i < r.snapshotLength; i++) lista.push(r.snapshotItem(i));
+                return lista;
+            }
+            if (by === 'tag') return document.getElementsByTagName(valor);
+            return document.querySelectorAll(valor);
+        }
+        function cumple(n) {
+            if (modo === 'presente') return true;
+            var rect = n.getBoundingClientRect(), st = window.getComputedStyle(n);
+            var visible = (rect.width > 0 || rect.height > 0)
+                && st.visibility !== 'hidden' && st.display !== 'none';
+            return visible && (modo !== 'clicable' || !n.disabled);
+        }
+        function buscar() {
+            var nodos = candidatos();
+            for (var j = 0; j < nodos.length; j++) if (cumple(nodos[j])) return nodos[j];
+            return null;
+        }
+        var inicial = buscar();
+        if (inicial) { listo(inicial); return; }
+        var terminado = false, observador, sondeo, vencimiento;
+        function fin(valorFinal) {
+            if (terminado) return;
+            terminado = true;
+            observador.disconnect(); clearInterval(sondeo); clearTimeout(vencimiento);
+            listo(valorFinal);
+        }
+        function revisar() { var el = buscar(); if (el) fin(el); }
+        observador = new MutationObserver(revisar);
+        observador.observe(
+            document.documentElement, {childList: true, subtree: true, attributes: true}
+        );
+        // Cambios de visibilidad por CSS/animación no siempre mutan el DOM
+        sondeo = setInterval(revisar, 100);
+        vencimiento = setTimeout(function () { fin(null); }, limiteMs);
+    """
+
+    def wait_js(self, selector: dict, timeout: Optional[float] = None, modo: str = "visible"):
+        """
+        Espera el selector dentro de la página con un MutationObserver y
+        retorna el WebElement en cuanto aparece, sin sondeos desde Python.
+        modo: "presente" (en el DOM), "visible" o "clicable" (visible y habilitado).
+        Lanza TimeoutException si no aparece dentro del tope.
+        """
+        limite = float(timeout or self.timeout)
+        by = selector.get("by", "xpath").lower()
+        value = selector.get("value")
+        el = self._async_script(self._JS_ESPERA, limite + 2, by, value, modo, int(limite * 1000))
+        if el is None:
+            raise TimeoutException(f"Elemento no {modo} tras {limite}s: {value}")
+        return el
+
+    def _wait_js_o_none(self, selector: dict, timeout: Optional[float], modo: str):
+        """
+        wait_js tolerante: si el script falla (p. ej. la página navegó durante
+        la espera) retorna None para que el caller use WebDriverWait.
+        """
+        try:
+            return self.wait_js(selector, timeout, modo)
+        except TimeoutException:
+            raise
+        except WebDriverException:
+            return None
+
+    # ------------------------------------------------------------------
+    # Captura de respuestas JSON (DevTools / log de rendimiento)
+    # ------------------------------------------------------------------
+    def _leer_log_rendimiento(self) -> None:
+        """
+        Drena el log de rendimiento y guarda el cuerpo de cada respuesta
+        JSON recibida. get_log vacía el buffer de Chrome, por eso las
+        respuestas se acumulan en self._capturas hasta limpiar_capturas().
+
+        Network.responseReceived llega con los encabezados, antes que el
+        cuerpo: se anota el requestId y el cuerpo se pide solo al ver su
+        Network.loadingFinished (que puede llegar en una lectura posterior).
+        """
+        try:
+            entradas = self.driver.get_log("performance")
+        except WebDriverException:
+            return
+        for entrada in entradas:
+            try:
+                mensaje = json.loads(entrada["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            metodo = mensaje.get("method")
+            params = mensaje.get("params", {})
+            request_id = params.get("requestId")
+            if metodo == "Network.responseReceived":
+                respuesta = params.get("response", {})
+                if "json" in (respuesta.get("mimeType") or ""):
+                    self._json_en_curso[request_id] = respuesta.get("url", "")
+            elif metodo == "Network.loadingFailed":
+                self._json_en_curso.pop(request_id, None)
+            elif metodo == "Network.loadingFinished" and request_id in self._json_en_curso:
+                self._capturar_cuerpo(request_id, self._json_en_curso.pop(request_id))
+
+    def _capturar_cuerpo(self, request_id: str, url: str) -> None:
+        try:
+            cuerpo = self.driver.execute_cdp_cmd(
+                "Network.getResponseBody", {"requestId": request_id}
+            )
+            self._capturas.append((url, json.loads(cuerpo.get("body") or "null")))
+        except (WebDriverException, ValueError):
+            # El cuerpo ya no está en memoria o no es JSON válido
+            pass
+
+    def respuestas_json(self, patron_url: str, timeout: float = 0) -> List[Tuple[str, Any]]:
+        """
+        Respuestas JSON capturadas cuya URL coincide con el regex indicado.
+        Con timeout > 0 espera hasta que llegue al menos una.
+        """
+        if not self.captura_xhr:
+            return []
+        regex = re.compile(patron_url)
+        limite = time.monotonic() + timeout
+        while True:
+            self._leer_log_rendimiento()
+            encontradas = [(url, datos) for url, datos in self._capturas if regex.search(url)]
+            if encontradas or time.monotonic() >= limite:
+                return encontradas
+            time.sleep(0.2)
+
+    def limpiar_capturas(self) -> None:
+        """Descarta lo capturado hasta ahora (antes de disparar una nueva consulta)."""
+        if not self.captura_xhr:
+            return
+        try:
+            self.driver.get_log("performance")  # drenar sin pedir cuerpos
+        except WebDriverException:
+            pass
+        self._capturas.clear()
+        self._json_en_curso.clear()
@@ -0,0 +1,195 @@
+"""
+Write-behind para los cambios de estado de Insumo.
+
+Se ubica delante de NocoDbSourceRepository con la misma interfaz
+(marcar_en_proceso / marcar_exitoso / marcar_fallido): las transiciones se
+encolan en memoria, se fusionan por Id (gana el último estado) y un hilo las
+envía en PATCH en bloque cada ``intervalo`` segundos o al llegar a
+``max_pendientes``. Así el flujo Selenium nunca espera la latencia de NocoDB
+por tareas de bitácora. ``cerrar`` drena la cola (también al salir del proceso).
+
+Solo los fallos transitorios (conexión, 5xx, circuito abierto) se reintentan
+sin límite; un estado que NocoDB rechaza (4xx) se descarta tras
+MAX_INTENTOS_RECHAZO envíos.
+"""
+import atexit
+import threading
+from typing import Any, Dict, Tuple
+from app.infrastructure.nocodb_client import NocoDBBulkError
+from app.infrastructure.journal_local import OP_UPDATE
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+from app.utils.logging_utils import get_logger
+from app.utils.retry_utils import es_fallo_transitorio
+
+logger = get_logger("insumo_write_behind")
+
+# Envíos rechazados (4xx) de un mismo Id antes de descartar su estado
+MAX_INTENTOS_RECHAZO = 3
+
+
+class InsumoWriteBehind:
+    def __init__(
+        self,
+        source_repo: NocoDbSourceRepository,
+        intervalo: float = 2.0,
+        max_pendientes: int = 50,
+    ):
+        self.source_repo = source_repo
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self._pendientes: Dict[str, Dict[str, Any]] = {}
+        self._rechazos: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._loop, name="insumo-write-behind", daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def __getattr__(self, nombre):
+        # Lecturas y demás operaciones pasan directo al repositorio
+        return getattr(self.source_repo, nombre)
+
+    # ------------------------------------------------------------------
+    # Interfaz de estados (no bloqueante)
+    # ------------------------------------------------------------------
+    def _encolar(self, record: Dict[str, Any], cambios: Dict[str, Any]):
+        record_id = self.source_repo._get_record_id(record)
+        with self._lock:
+            self._pendientes.setdefault(record_id, {"Id": record_id}).update(cambios)
+            lleno = len(self._pendientes) >= self.max_pendientes
+        if lleno:
+            self._despertar.set()
+
+    def marcar_en_proceso(self, record: Dict[str, Any]) -> None:
+        self._encolar(record, {"EstadoGestion": "Procesando"})
+
+    def marcar_exitoso(self, record: Dict[str, Any]) -> None:
+        self._encolar(record, {"EstadoGestion": "Exitoso"})
+
+    def marcar_fallido(self, record: Dict[str, Any], motivo: str) -> None:
+        self._encolar(record, {"EstadoGestion": motivo})
+
+    # ------------------------------------------------------------------
+    # Envío
+    # ------------------------------------------------------------------
+    def flush(self) -> int:
+        """
+        Envía lo pendiente en PATCH en bloque. Retorna cuántos Ids salieron de
+        la cola (enviados, o descartados por rechazo).
+        """
+        with self._flush_lock:
+            with self._lock:
+                lote = self._pendientes
+                self._pendientes = {}
+            if not lote:
+                return 0
+            try:
+                self.source_repo.client.update_records_bulk(
+                    self.source_repo.table_insumo, list(lote.values())
+                )
+            except Exception as e:
+                reintentar = self._reintentables(*_clasificar_fallidos(lote, e), e)
+                logger.error(
+                    "Write-behind: no se enviaron %d estados (%d se reintentarán): %s",
+                    len(lote), len(reintentar), e,
+                )
+                with self._lock:
+                    # No pisar transiciones más nuevas que llegaron mientras tanto
+                    for record_id, payload in reintentar.items():
+                        nuevo = self._pendientes.get(record_id)
+                        self._pendientes[record_id] = {**payload, **(nuevo or {})}
+                return len(lote) - len(reintentar)
+            for record_id in lote:
+                self._rechazos.pop(record_id, None)
+            logger.debug("Write-behind: %d estados enviados", len(lote))
+            return len(lote)
+
+    def _reintentables(
+        self,
+        transitorios: Dict[str, Dict[str, Any]],
+        rechazados: Dict[str, Dict[str, Any]],
+        error: Exception,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Estados que vuelven a la cola: todos los transitorios y los rechazados
+        que no han agotado MAX_INTENTOS_RECHAZO. El resto se descarta (al
+        journal, si hay, para revisión manual).
+        """
+        reintentar = dict(transitorios)
+        descartados = []
+        for record_id, payload in rechazados.items():
+            intentos = self._rechazos.get(record_id, 0) + 1
+            if intentos < MAX_INTENTOS_RECHAZO:
+                self._rechazos[record_id] = intentos
+                reintentar[record_id] = payload
+            else:
+                self._rechazos.pop(record_id, None)
+                descartados.append(payload)
+        if descartados:
+            journal = self.source_repo.journal
+            if journal is not None:
+                journal.descartar_escritura(
+                    self.source_repo.table_insumo, OP_UPDATE, descartados,
+                    MAX_INTENTOS_RECHAZO, error,
+                )
+            else:
+                logger.error(
+                    "Write-behind: estados rechazados por NocoDB descartados: %s", descartados
+                )
+        return reintentar
+
+    def _loop(self):
+        while not self._detener.is_set():
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error inesperado en write-behind")
+
+    def esperar_escrituras(self, timeout=None) -> None:
+        """Envía de inmediato lo pendiente (punto de sincronización del lote)."""
+        self.flush()
+        self.source_repo.esperar_escrituras(timeout)
+
+    def cerrar(self):
+        """Detiene el hilo y drena la cola."""
+        if self._detener.is_set():
+            return
+        self._detener.set()
+        self._despertar.set()
+        atexit.unregister(self.cerrar)
+        self._hilo.join(timeout=self.intervalo + 5)
+        restantes = self.flush()
+        with self._lock:
+            perdidos = len(self._pendientes)
+        if perdidos:
+            journal = self.source_repo.journal
+            if journal is not None:
+                with self._lock:
+                    restantes_spool = list(self._pendientes.values())
+                    self._pendientes = {}
+                for payload in restantes_spool:
+                    journal.encolar_escritura(
+                        self.source_repo.table_insumo, OP_UPDATE, [payload],
+                        clave=str(payload["Id"]),
+                    )
+            else:
+                logger.error("Write-behind cerrado con %d estados sin enviar", perdidos)
+        logger.info("Write-behind drenado (%d estados finales)", restantes)
+
+
+def _clasificar_fallidos(
+    lote: Dict[str, Dict[str, Any]], error: Exception
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Separa los estados no enviados en (transitorios, rechazados por NocoDB)."""
+    if isinstance(error, NocoDBBulkError):
+        return (
+            {str(r["Id"]): r for r in error.registros(transitorios=True)},
+            {str(r["Id"]): r for r in error.registros(transitorios=False)},
+        )
+    if es_fallo_transitorio(error):
+        return lote, {}
+    return {}, lote
@@ -1,15 +1,138 @@
+import asyncio
+import os
+import socket
+import time
+from concurrent.futures import Future, wait
+from datetime import datetime, timedelta, timezone
 from app.infrastructure.nocodb_client import NocoDBClient
-from typing import List, Dict, Any
+from app.infrastructure.nocodb_async_client import AsyncNocoDBClient
+from app.infrastructure.journal_local import JournalLocal, OP_UPDATE
+from typing import List, Dict, Any, Optional, Tuple
 from config import settings
 from app.utils.logging_utils import get_logger
+from app.utils.retry_utils import CircuitOpenError, es_fallo_transitorio
+from app.repositories.nocodb_target_repository import ERRORES_NOCODB
 
 logger = get_logger("nocodb_source_repository")
 
+FILTRO_PENDIENTES = "EstadoGestion,eq,Sin Procesar"
+# Columnas de Insumo que usa el workflow (evita traer campos de texto anchos)
+CAMPOS_PENDIENTES = [
+    "Id",
+    "TipoIdentificacion",
+    "NumeroIdentificacion",
+    "NombrePropietario",
+    "FechaIngreso",
+]
+# Duración por defecto del lease de un registro reclamado
+LEASE_SECONDS = 1800
+# Columna de sistema usada como marca de agua en la lectura delta de Insumo
+COLUMNA_MARCA_AGUA = "UpdatedAt"
+
+
+def worker_id_por_defecto() -> str:
+    """Identificador del worker: WORKER_ID o hostname-pid."""
+    return settings.WORKER_ID or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _ahora_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_lease(valor: Any) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        fecha = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return fecha if fecha.tzinfo else fecha.replace(tzinfo=timezone.utc)
+
 class NocoDbSourceRepository:
-    def __init__(self, client: NocoDBClient):
+    def __init__(
+        self,
+        client: NocoDBClient,
+        async_client: Optional[AsyncNocoDBClient] = None,
+        journal: Optional[JournalLocal] = None,
+    ):
         self.client = client
+        # Si hay cliente async, los cambios de estado se envían sin bloquear
+        self.async_client = async_client
+        # Con journal, los estados que no se pueden escribir van al spool local
+        self.journal = journal
         self.table_insumo = settings.NOCO_INSUMO_TABLE
         self.table_parametros = settings.NOCO_PARAMETROS_TABLE
+        self._escrituras: Dict[str, Future] = {}
+
+    def _actualizar_estado(self, payload: Dict[str, Any]) -> None:
+        """
+        PATCH de estado sobre Insumo. Con cliente async se programa en segundo
+        plano, encadenado a la escritura previa del mismo Id para conservar el orden.
+        """
+        if self.journal is not None and self.journal.escrituras_pendientes(
+            self.table_insumo, str(payload["Id"])
+        ):
+            # Estado previo del mismo Id sin reenviar: se fusiona con él en el spool
+            # para no alterar el orden (lo pendiente de otros Ids o tablas no bloquea)
+            self._encolar_estado(payload)
+        elif self.async_client is None:
+            self._actualizar_estado_sync(payload)
+        else:
+            self._actualizar_estado_async(payload)
+
+    def _actualizar_estado_sync(self, payload: Dict[str, Any]) -> None:
+        try:
+            self.client.update_record(self.table_insumo, payload)
+        except ERRORES_NOCODB as e:
+            if self.journal is None or not es_fallo_transitorio(e):
+                logger.error("NocoDB rechazó el estado de Id=%s: %s", payload.get("Id"), e)
+                raise
+            logger.error("NocoDB no disponible al actualizar estado: %s", e)
+            self._encolar_estado(payload)
+
+    def _actualizar_estado_async(self, payload: Dict[str, Any]) -> None:
+        record_id = str(payload["Id"])
+        previa = self._escrituras.get(record_id)
+
+        async def escribir():
+            if previa is not None:
+                try:
+                    await asyncio.wrap_future(previa)
+                except Exception:
+                    pass  # ya se registró en el callback de la escritura previa
+            return await self.async_client.update_record(self.table_insumo, payload)
+
+        future = self.async_client.submit(escribir())
+        future.add_done_callback(lambda f: self._registrar_resultado(payload, f))
+        self._escrituras[record_id] = future
+
+    def _registrar_resultado(self, payload: Dict[str, Any], future: Future) -> None:
+        """Callback de una escritura async: spool si falló, limpieza si llegó."""
+        error = future.exception()
+        if error is None:
+            if self.journal is not None:
+                # Un estado anterior del mismo Id que quedó en spool ya no aplica
+                self.journal.descartar_superadas(self.table_insumo, str(payload["Id"]))
+            return
+        logger.error(
+            "Error actualizando estado de Id=%s a '%s': %s",
+            payload["Id"], payload.get("EstadoGestion"), error,
+        )
+        if self.journal is not None and es_fallo_transitorio(error):
+            self._encolar_estado(payload)
+
+    def _encolar_estado(self, payload: Dict[str, Any]) -> None:
+        """Spool del estado indexado por Id: reemplaza estados previos sin reenviar."""
+        self.journal.encolar_escritura(
+            self.table_insumo, OP_UPDATE, [payload], clave=str(payload["Id"])
+        )
+
+    def esperar_escrituras(self, timeout: Optional[float] = None) -> None:
+        """Bloquea hasta que terminen las escrituras de estado en segundo plano."""
+        pendientes = list(self._escrituras.values())
+        self._escrituras.clear()
+        if pendientes:
+            wait(pendientes, timeout=timeout)
 
     def _get_record_id(self, record: Dict[str, Any]) -> str:
         """Extrae el ID del registro de forma consistente."""
@@ -23,7 +146,7 @@ class NocoDbSourceRepository:
         Retorna los parámetros del sistema como un diccionario clave:valor.
         """
         tabla = self.table_parametros
-        registros = self.client.list_records(tabla)
+        registros = self.client.list_records(tabla, fields=["Nombre", "Valor"])
         return {r["Nombre"]: r["Valor"] for r in registros if "Nombre" in r and "Valor" in r}
 
     def obtener_pendientes(self, limit: int = 100) -> List[Dict[str, Any]]:
@@ -31,16 +154,200 @@ class NocoDbSourceRepository:
         Devuelve los registros pendientes en la tabla de insumo.
         Filtra por EstadoGestion = 'Sin Procesar'.
         """
-        where = "EstadoGestion,eq,Sin Procesar"
+        where = FILTRO_PENDIENTES
         try:
             logger.debug("Intentando obtener registros pendientes con where=%s limit=%d", where, limit)
-            result = self.client.list_records(self.table_insumo, where=where, limit=limit)
+            result = self.client.list_records(
+                self.table_insumo, where=where, limit=limit, fields=CAMPOS_PENDIENTES
+            )
             logger.debug("Registros obtenidos: %d", len(result) if result else 0)
             return result
+        except CircuitOpenError:
+            # NocoDB no está sano: no tiene sentido insistir con el fallback
+            raise
         except Exception as e:
             logger.error("Error aplicando filtro where='%s': %s", where, str(e))
             logger.warning("Intentando obtener registros sin filtro como fallback")
-            return self.client.list_records(self.table_insumo, limit=limit)
+            # El fallback trae filas ya procesadas: se filtran localmente
+            registros = self.client.list_records(
+                self.table_insumo, limit=limit, fields=CAMPOS_PENDIENTES + ["EstadoGestion"]
+            )
+            return [r for r in registros if r.get("EstadoGestion") == "Sin Procesar"]
+
+    def reclamar_pendientes(
+        self,
+        limit: int,
+        worker_id: str,
+        lease_seconds: int = LEASE_SECONDS,
+        espera_verificacion: float = 1.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Reclama hasta ``limit`` registros 'Sin Procesar' para este worker:
+        los pasa a 'Procesando' con WorkerId y LeaseExpira en un PATCH en bloque
+        y luego relee cuáles quedaron con nuestro WorkerId.
+
+        NocoDB no ofrece compare-and-set, así que el reclamo es optimista: si dos
+        workers escriben el mismo registro gana la última escritura, y la
+        relectura tras ``espera_verificacion`` descarta los que perdimos.
+        """
+        candidatos = self.obtener_pendientes(limit=limit)
+        if not candidatos:
+            return []
+        expira = (_ahora_utc() + timedelta(seconds=lease_seconds)).isoformat()
+        self.client.update_records_bulk(
+            self.table_insumo,
+            [
+                {
+                    "Id": self._get_record_id(r),
+                    "EstadoGestion": "Procesando",
+                    "WorkerId": worker_id,
+                    "LeaseExpira": expira,
+                }
+                for r in candidatos
+            ],
+        )
+        time.sleep(espera_verificacion)
+        # Solo los registros de este worker aún en 'Procesando': los ya terminados
+        # conservan el WorkerId y harían crecer la relectura sin límite
+        propios = {
+            str(r.get("Id"))
+            for r in self.client.iter_records(
+                self.table_insumo,
+                where=f"(WorkerId,eq,{worker_id})~and(EstadoGestion,eq,Procesando)",
+                fields=["Id"],
+            )
+        }
+        reclamados = [r for r in candidatos if self._get_record_id(r) in propios]
+        if len(reclamados) < len(candidatos):
+            logger.warning(
+                "Worker %s: %d de %d registros reclamados por otro worker",
+                worker_id, len(candidatos) - len(reclamados), len(candidatos),
+            )
+        logger.info(
+            "Worker %s reclamó %d registros (lease hasta %s)", worker_id, len(reclamados), expira
+        )
+        return reclamados
+
+    def renovar_lease(
+        self, record: Dict[str, Any], worker_id: str, lease_seconds: int = LEASE_SECONDS
+    ) -> bool:
+        """
+        Extiende el lease de un registro justo antes de procesarlo.
+        Retorna False si el registro ya no pertenece a este worker
+        (el lease venció y otro worker lo reclamó).
+        """
+        record_id = self._get_record_id(record)
+        filas = self.client.list_records(
+            self.table_insumo, where=f"Id,eq,{record_id}", limit=1, fields=["Id", "WorkerId"]
+        )
+        if not filas or filas[0].get("WorkerId") != worker_id:
+            logger.warning("Worker %s perdió el lease del registro %s", worker_id, record_id)
+            return False
+        expira = (_ahora_utc() + timedelta(seconds=lease_seconds)).isoformat()
+        self.client.update_record(self.table_insumo, {"Id": record_id, "LeaseExpira": expira})
+        return True
+
+    def _procesando(self) -> List[Dict[str, Any]]:
+        return list(self.client.iter_records(
+            self.table_insumo,
+            where="EstadoGestion,eq,Procesando",
+            fields=["Id", "LeaseExpira"],
+        ))
+
+    def _liberar(self, ids: List[Any]) -> None:
+        self.client.update_records_bulk(
+            self.table_insumo,
+            [
+                {
+                    "Id": rid, "EstadoGestion": "Sin Procesar",
+                    "WorkerId": None, "LeaseExpira": None,
+                }
+                for rid in ids
+            ],
+        )
+
+    def liberar_leases_vencidos(self) -> int:
+        """
+        Devuelve a 'Sin Procesar' los registros en 'Procesando' cuyo lease
+        existe y ya venció. Retorna cuántos.
+
+        Los 'Procesando' sin LeaseExpira no se tocan: pueden estar en curso en
+        una ejecución sin leases (gestion_bp o un despliegue anterior). Para
+        esos está liberar_procesando_sin_lease, como paso manual.
+        """
+        ahora = _ahora_utc()
+        vencidos = []
+        for r in self._procesando():
+            lease = _parse_lease(r.get("LeaseExpira"))
+            if lease is not None and lease <= ahora:
+                vencidos.append(r.get("Id"))
+        if vencidos:
+            self._liberar(vencidos)
+            logger.warning("Leases vencidos devueltos a la cola: %s", vencidos)
+        return len(vencidos)
+
+    def liberar_procesando_sin_lease(self) -> int:
+        """
+        Paso único al activar LEASE_ENABLED: devuelve a 'Sin Procesar' los
+        registros en 'Procesando' sin LeaseExpira (quedaron de ejecuciones
+        sin leases). Correr solo sin lotes en curso. Retorna cuántos.
+        """
+        sin_lease = [r.get("Id") for r in self._procesando() if not r.get("LeaseExpira")]
+        if sin_lease:
+            self._liberar(sin_lease)
+            logger.warning("Registros 'Procesando' sin lease devueltos a la cola: %s", sin_lease)
+        return len(sin_lease)
+
+    def devolver_a_cola(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Devuelve a 'Sin Procesar' registros reclamados que no se alcanzaron a
+        procesar (p. ej. al detener el worker) sin esperar a que venza el lease.
+        """
+        ids = [self._get_record_id(r) for r in records]
+        if ids:
+            self._liberar(ids)
+            logger.info("Registros devueltos a la cola: %s", ids)
+        return len(ids)
+
+    def contar_pendientes(self) -> int:
+        """Cantidad de registros 'Sin Procesar' (solo conteo, sin descargar filas)."""
+        return self.client.count_records(self.table_insumo, where=FILTRO_PENDIENTES)
+
+    def marca_agua_actual(self, columna: str = COLUMNA_MARCA_AGUA) -> Optional[str]:
+        """Valor más reciente de ``columna`` en Insumo (una fila, una columna)."""
+        filas = self.client.list_records(
+            self.table_insumo, limit=1, fields=[columna], sort=f"-{columna}"
+        )
+        return filas[0].get(columna) if filas else None
+
+    def cambios_desde(
+        self, marca: Optional[str], columna: str = COLUMNA_MARCA_AGUA
+    ) -> Tuple[int, Optional[str]]:
+        """
+        Lectura delta: solo las filas de Insumo con ``columna`` > ``marca``.
+        Retorna (cuántas de ellas están 'Sin Procesar', nueva marca). En
+        ciclos sin actividad la respuesta es vacía.
+
+        Con >= la fila de la marca se volvería a contar en cada ciclo y un
+        pendiente sin cambios dispararía lotes vacíos. Una fila modificada en
+        el mismo instante que la marca, pero no vista, la recoge la
+        reconciliación completa del poller.
+        """
+        where = f"{columna},gt,exactDate,{marca}" if marca else None
+        pendientes = 0
+        nueva_marca = marca
+        for fila in self.client.iter_records(
+            self.table_insumo,
+            where=where,
+            page_size=1000,
+            fields=["Id", "EstadoGestion", columna],
+        ):
+            if fila.get("EstadoGestion") == "Sin Procesar":
+                pendientes += 1
+            valor = fila.get(columna)
+            if valor and (nueva_marca is None or str(valor) > str(nueva_marca)):
+                nueva_marca = valor
+        return pendientes, nueva_marca
 
     def marcar_en_proceso(self, record: Dict[str, Any]) -> None:
         record_id = self._get_record_id(record)
@@ -48,13 +355,12 @@ class NocoDbSourceRepository:
             "Id": record_id,  # o "ID" según como lo maneje NocoDB
             "EstadoGestion": "Procesando",
         }
-        self.client.update_record(self.table_insumo, payload)
+        self._actualizar_estado(payload)
 
     def marcar_exitoso(self, record: Dict[str, Any]) -> None:
         record_id = self._get_record_id(record)
         payload = {"Id": record_id, "EstadoGestion": "Exitoso"}
-        self.client.update_record(
-            self.table_insumo, payload)
+        self._actualizar_estado(payload)
 
     def marcar_fallido(self, record: Dict[str, Any], motivo: str) -> None:
         record_id = self._get_record_id(record)
@@ -62,6 +368,4 @@ class NocoDbSourceRepository:
             "Id": record_id,
             "EstadoGestion": motivo,
         }
-        self.client.update_record(
-            self.table_insumo,
-            payload)
+        self._actualizar_estado(payload)
@@ -1,34 +1,77 @@
-from app.infrastructure.nocodb_client import NocoDBClient
-from typing import Dict, List
+from app.infrastructure.nocodb_client import NocoDBClient, NocoDBBulkError
+from app.infrastructure.nocodb_async_client import AsyncNocoDBClient
+from app.infrastructure.journal_local import JournalLocal, OP_CREATE
+from app.services.mapping_service import (
+    CAMPO_HASH,
+    MODO_EAV,
+    MODOS_VALIDOS,
+    campos_detalle,
+    hash_detalle,
+)
+from app.utils.retry_utils import es_fallo_transitorio
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from config import settings
 from datetime import datetime
+import asyncio
 import json
+import aiohttp
+import requests
 from app.utils.logging_utils import get_logger
 
 logger = get_logger("nocodb_target_repository")
 
+# Fallos de NocoDB (cliente sync o async). Solo los transitorios
+# (es_fallo_transitorio) van al spool; un 4xx se registra y se relanza.
+ERRORES_NOCODB = (
+    requests.exceptions.RequestException,  # incluye CircuitOpenError
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+)
+
+OBSERVACION_SIN_CAMBIOS = "Sin cambios desde la última consulta"
+# Identificaciones cuyos hashes se conservan en memoria (LRU)
+MAX_HASHES_EN_CACHE = 256
+
 class NocoDbTargetRepository:
-    def __init__(self, client: NocoDBClient):
+    def __init__(
+        self,
+        client: NocoDBClient,
+        async_client: Optional[AsyncNocoDBClient] = None,
+        journal: Optional[JournalLocal] = None,
+    ):
         self.client = client
-        self.table = settings.NOCO_BASE_TRABAJO_TABLE
+        # Con cliente async los chunks de un bulk se envían concurrentemente
+        self.async_client = async_client
+        # Con journal, las inserciones que fallan quedan en spool para reenvío
+        self.journal = journal
+        self.table_eav = settings.NOCO_BASE_TRABAJO_TABLE
+        # Modo de almacenamiento: eav (una fila por campo) o ancho (una fila por placa)
+        self.modo = (settings.DETALLE_STORAGE_MODE or MODO_EAV).strip().lower()
+        if self.modo not in MODOS_VALIDOS:
+            logger.warning("DETALLE_STORAGE_MODE '%s' no válido, se usa '%s'", self.modo, MODO_EAV)
+            self.modo = MODO_EAV
+        self.table = (
+            self.table_eav
+            if self.modo == MODO_EAV
+            else settings.NOCO_DETALLE_VEHICULO_TABLE or self.table_eav
+        )
+        # Detección de cambios: la ficha solo se reescribe si cambió su hash
+        self.solo_cambios = settings.DETALLE_SOLO_CAMBIOS == "True"
+        self._hashes: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
         self.date_format = "%Y-%m-%d %H:%M:%S%z"  # Formato ajustar si es necesario
 
-    def upsert_vehicle_detail(
+    def _campos_comunes(
         self,
         source_record: Dict,
-        vehicle_details: Dict,
         ruta_pdf: str | None = None,
         fecha_inicio: datetime = None,
         fecha_fin: datetime = None,
-    ) -> List[Dict]:
+    ) -> Dict | None:
         """
-        Inserta un registro por cada par NombreDetalle/ValorDetalle extraído.
-
-        :param source_record: El registro original de la tabla fuente (Insumo).
-        :param vehicle_details: El diccionario con los datos extraídos del vehículo.
-        :return: Una lista de las respuestas de creación de registros de NocoDB.
+        Campos de identificación y metadatos compartidos por todas las filas
+        de detalle de un registro. None si falta Id/NumIdentificacion.
         """
-
         # 1. Obtener campos comunes de la fuente
         record_id_insumo = (
             source_record.get("Id")
@@ -45,7 +88,7 @@ class NocoDbTargetRepository:
             logger.error(
                 f"Faltan campos esenciales (Id/NumIdentificacion) en el registro fuente: {source_record}"
             )
-            return []
+            return None
 
         # 2. Generar NumUnicoProceso: NumIdentificacion + Fecha (YYYY-MM-DD)
         fecha_actual = datetime.now().strftime("%Y-%m-%d")
@@ -54,39 +97,228 @@ class NocoDbTargetRepository:
         # 3. Usar FechaIngreso del insumo como FechaInsercion
         fecha_insercion = source_record.get("FechaIngreso") or datetime.now().isoformat()  # Si no hay FechaIngreso, usar fecha actual
 
+        return {
+            # Campos de identificación y contexto
+            "idBaseTrabajo": record_id_insumo,
+            "NumUnicoProceso": num_unico_proceso,
+            "NumIdentificacion": num_identificacion,
+            "NombrePropietario": nombre_propietario,
+            # Metadatos del proceso
+            "FechaInsercion": fecha_insercion,
+            "Estado": "Exitoso",  # O el estado que corresponda a la inserción del detalle
+            "Observacion": "Detalle de vehículo insertado",
+            "FechaHoraInicio": fecha_inicio,
+            "FechaHoraFin": fecha_fin,
+            "RutaPDF": ruta_pdf,
+        }
+
+    def _build_detail_rows(
+        self,
+        source_record: Dict,
+        vehicle_details: Dict,
+        ruta_pdf: str | None = None,
+        fecha_inicio: datetime = None,
+        fecha_fin: datetime = None,
+    ) -> List[Dict] | None:
+        """
+        Arma las filas de detalle de una placa según el modo de almacenamiento:
+        en EAV una por NombreDetalle/ValorDetalle; en modo ancho una sola fila.
+        Retorna None si el registro fuente no tiene Id/NumIdentificacion.
+        """
+        comunes = self._campos_comunes(source_record, ruta_pdf, fecha_inicio, fecha_fin)
+        if comunes is None:
+            return None
+        placa = vehicle_details.get("Placa", "")
+
+        huella = None
+        if self.solo_cambios:
+            huella = hash_detalle(vehicle_details)
+            previos = self._hashes_previos(comunes["NumIdentificacion"])
+            if previos.get(placa) == huella:
+                logger.info("Placa %s sin cambios desde la última consulta", placa)
+                return [self._fila_sin_cambios(comunes, placa, huella)]
+
+        if self.modo != MODO_EAV:
+            fila = {**comunes, **campos_detalle(vehicle_details, self.modo), "Placa": placa}
+            if huella:
+                fila[CAMPO_HASH] = huella
+            return [fila]
+
         records_to_create = []
 
         # Iterar sobre cada detalle (par clave-valor) extraído
         for nombre_detalle, valor_detalle in vehicle_details.items():
             record = {
-                # Campos de identificación y contexto
-                "idBaseTrabajo": record_id_insumo,
-                "NumUnicoProceso": num_unico_proceso,
-                "NumIdentificacion": num_identificacion,
-                "NombrePropietario": nombre_propietario,
-                "Placa": vehicle_details.get("Placa", ""),
+                **comunes,
+                "Placa": placa,
                 # Campos del detalle extraído
                 "NombreDetalle": nombre_detalle,
                 "ValorDetalle": str(
                     valor_detalle
                 ),  # Asegurar que es string si el campo NocoDB es 'T' (texto)
-                # Metadatos del proceso
-                "FechaInsercion": fecha_insercion,
-                "Estado": "Exitoso",  # O el estado que corresponda a la inserción del detalle
-                "Observacion": "Detalle de vehículo insertado",
-                "FechaHoraInicio": fecha_inicio,
-                "FechaHoraFin": fecha_fin,
-                "RutaPDF": ruta_pdf,
             }
             records_to_create.append(record)
+        if huella:
+            # Fila con el hash de la ficha, base de la comparación siguiente
+            records_to_create.append(
+                {**comunes, "Placa": placa, "NombreDetalle": CAMPO_HASH, "ValorDetalle": huella}
+            )
+        return records_to_create
 
-        # 4. Insertar los registros en NocoDB
-        responses = []
-        for record in records_to_create:
-            response = self.client.create_record(self.table, record)
-            responses.append(response)
+    def _fila_sin_cambios(self, comunes: Dict, placa: str, huella: str) -> Dict:
+        """Única fila que se escribe para una placa cuya ficha no cambió."""
+        fila = {**comunes, "Placa": placa, "Observacion": OBSERVACION_SIN_CAMBIOS}
+        if self.modo == MODO_EAV:
+            fila.update({"NombreDetalle": CAMPO_HASH, "ValorDetalle": huella})
+        else:
+            fila[CAMPO_HASH] = huella
+        return fila
 
-        return responses
+    def _hashes_previos(self, num_identificacion: str) -> Dict[str, str]:
+        """
+        Último hash guardado por placa para el propietario. Se consulta una vez
+        por identificación (las filas más recientes primero); si la lectura
+        falla se asume que todas las placas cambiaron.
+        """
+        if num_identificacion in self._hashes:
+            self._hashes.move_to_end(num_identificacion)
+            return self._hashes[num_identificacion]
+        if self.modo == MODO_EAV:
+            where = (
+                f"(NumIdentificacion,eq,{num_identificacion})"
+                f"~and(NombreDetalle,eq,{CAMPO_HASH})"
+            )
+            campo_valor = "ValorDetalle"
+        else:
+            where = f"NumIdentificacion,eq,{num_identificacion}"
+            campo_valor = CAMPO_HASH
+        hashes: Dict[str, str] = {}
+        try:
+            for fila in self.client.iter_records(
+                self.table, where=where, page_size=1000, fields=["Placa", campo_valor], sort="-Id"
+            ):
+                # La fila más reciente de cada placa manda, aunque no tenga hash
+                hashes.setdefault(fila.get("Placa"), fila.get(campo_valor) or "")
+        except ERRORES_NOCODB as e:
+            logger.warning(
+                "No se pudieron leer hashes previos de %s; se escribe todo: %s",
+                num_identificacion, e,
+            )
+            return {}
+        self._hashes[num_identificacion] = hashes
+        while len(self._hashes) > MAX_HASHES_EN_CACHE:
+            self._hashes.popitem(last=False)
+        return hashes
+
+    def _recordar_hashes(self, rows: List[Dict]) -> None:
+        """
+        Guarda en caché los hashes de las filas ya insertadas (o en spool).
+        Se llama solo tras la escritura: si fallara, la siguiente consulta
+        volvería a escribir la ficha completa y no solo la marca "sin cambios".
+        """
+        if not self.solo_cambios:
+            return
+        for fila in rows:
+            if self.modo == MODO_EAV:
+                es_hash = fila.get("NombreDetalle") == CAMPO_HASH
+                huella = fila.get("ValorDetalle") if es_hash else None
+            else:
+                huella = fila.get(CAMPO_HASH)
+            previos = self._hashes.get(fila["NumIdentificacion"])
+            if huella and previos is not None:
+                previos[fila["Placa"]] = huella
+
+    def _insert_rows(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Inserta filas de detalle con POST en bloque (por chunks). Si hay journal
+        local, lo que no se pudo insertar por un fallo transitorio queda en el
+        spool en vez de fallar; lo que NocoDB rechaza (4xx) se relanza.
+        """
+        try:
+            if self.async_client is not None:
+                return self.async_client.run(
+                    self.async_client.create_records_bulk(self.table, rows)
+                )
+            return self.client.create_records_bulk(self.table, rows)
+        except NocoDBBulkError as e:
+            for chunk in e.failed_chunks:
+                logger.error(
+                    "Placas %s: no se insertaron los detalles %s (%s)",
+                    sorted({r["Placa"] for r in chunk["records"]}),
+                    [r.get("NombreDetalle", "fila ancha") for r in chunk["records"]],
+                    chunk["error"],
+                )
+            if self.journal is None:
+                raise
+            reenviables = e.registros(transitorios=True)
+            if reenviables:
+                self.journal.encolar_escritura(self.table, OP_CREATE, reenviables)
+            if e.registros(transitorios=False):
+                raise
+            return e.responses
+        except ERRORES_NOCODB as e:
+            if self.journal is None or not es_fallo_transitorio(e):
+                logger.error("No se pudieron insertar los detalles en NocoDB: %s", e)
+                raise
+            logger.error("NocoDB no disponible al insertar detalles: %s", e)
+            self.journal.encolar_escritura(self.table, OP_CREATE, rows)
+            return []
+
+    def upsert_vehicle_detail(
+        self,
+        source_record: Dict,
+        vehicle_details: Dict,
+        ruta_pdf: str | None = None,
+        fecha_inicio: datetime = None,
+        fecha_fin: datetime = None,
+    ) -> List[Dict]:
+        """
+        Inserta un registro por cada par NombreDetalle/ValorDetalle extraído
+        (o una sola fila por placa en modo ancho, ver DETALLE_STORAGE_MODE).
+
+        :param source_record: El registro original de la tabla fuente (Insumo).
+        :param vehicle_details: El diccionario con los datos extraídos del vehículo.
+        :return: Una lista de las respuestas de creación de registros de NocoDB.
+        """
+        rows = self._build_detail_rows(
+            source_record, vehicle_details, ruta_pdf, fecha_inicio, fecha_fin
+        )
+        if not rows:
+            return []
+        respuestas = self._insert_rows(rows)
+        self._recordar_hashes(rows)
+        return respuestas
+
+    def upsert_vehicle_details_batch(
+        self,
+        source_record: Dict,
+        detalles: List[Dict],
+        ruta_pdf: str | None = None,
+    ) -> List[Dict]:
+        """
+        Inserta en una sola escritura los detalles de todas las placas de un
+        registro, con la RutaPDF final ya asignada.
+
+        :param detalles: Lista de dicts con claves ``detalle``, ``fecha_inicio``
+            y ``fecha_fin`` (uno por placa), en el orden de extracción.
+        """
+        rows: List[Dict] = []
+        for item in detalles:
+            placa_rows = self._build_detail_rows(
+                source_record,
+                item["detalle"],
+                ruta_pdf,
+                item.get("fecha_inicio"),
+                item.get("fecha_fin"),
+            )
+            if placa_rows is None:
+                return []
+            rows.extend(placa_rows)
+        if not rows:
+            return []
+        respuestas = self._insert_rows(rows)
+        self._recordar_hashes(rows)
+        return respuestas
 
     def update_ruta_pdf_by_proceso(self, source_record: Dict, ruta_pdf: str) -> Dict:
         """
@@ -114,23 +346,22 @@ class NocoDbTargetRepository:
 
         logger.info("Actualizando RutaPDF: NumUnicoProceso=%s  RutaPDF=%s", num_unico_proceso, ruta_web)
 
-        # 4) Listar filas y actualizar por Id (PATCH /records/{rowId})
+        # 4) Listar filas y actualizarlas por Id con PATCH en bloque
         try:
-            rows = self.client.list_records(self.table, where=where_filter, limit=1000)
-            # Tu cliente devuelve lista directa o {"list": [...]}; maneja ambos casos:
-            list_rows = rows.get("list") if isinstance(rows, dict) else rows
-            ids = [r.get("Id") for r in list_rows if r.get("Id")]
+            rows = self.client.iter_records(
+                self.table, where=where_filter, page_size=1000, fields=["Id"]
+            )
+            ids = [r.get("Id") for r in rows if r.get("Id")]
 
             if not ids:
                 logger.warning("Sin filas que actualizar (NumUnicoProceso=%s)", num_unico_proceso)
                 return {"msg": "Sin filas que actualizar", "count": 0, "NumUnicoProceso": num_unico_proceso}
 
-            updated = 0
-            for row_id in ids:
-                self.client.update_record_by_id(self.table, row_id, payload)
-                updated += 1
+            self.client.update_records_bulk(
+                self.table, [{"Id": row_id, **payload} for row_id in ids], max_workers=4
+            )
 
-            return {"msg": "OK (by-id)", "count": updated, "NumUnicoProceso": num_unico_proceso, "RutaPDF": ruta_web}
+            return {"msg": "OK (bulk)", "count": len(ids), "NumUnicoProceso": num_unico_proceso, "RutaPDF": ruta_web}
 
         except Exception as e:
             if hasattr(e, "response") and getattr(e.response, "text", None):
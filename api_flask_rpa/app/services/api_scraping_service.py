@@ -0,0 +1,176 @@
+"""
+ApiScrapingService: motor de consulta sin navegador por registro.
+
+Expone la misma interfaz que ScrapingService (login, consultar_por_propietario,
+abrir_ficha_y_extraer, volver_a_inicio) pero consulta directamente el backend
+de RUNT PRO con RuntApiClient. El navegador solo se usa para el login: las
+credenciales de esa sesión Selenium se reutilizan en la requests.Session.
+
+Si el backend no responde como se espera (o la respuesta no trae el nombre
+del propietario para validarlo), el registro en curso se resuelve con el
+ScrapingService de Selenium (respaldo); el siguiente registro vuelve a
+intentar por API.
+
+Sin pantalla que capturar, la evidencia del PDF es una transcripción de la
+respuesta del API, rotulada como tal. Por eso y porque las rutas de api_runt
+no están validadas, el motor es opt-in (RUNT_API_ENABLED=True).
+"""
+import io
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image, ImageDraw
+from app.infrastructure.runt_api_client import RuntApiAuthError, RuntApiClient, RuntApiError
+from app.services.scraping_service import ScrapingService, aplanar_json, placas_en_json
+from app.utils.homologacion_utils import homologar_tipo_documento
+from app.utils.logging_utils import get_logger
+from app.utils.string_utils import normalizar_nombre
+from app.utils.timing import medir_paso
+
+logger = get_logger("api_scraping_service")
+
+MOTOR_SELENIUM = "selenium"
+MOTOR_API = "api"
+ROTULO_EVIDENCIA = "Transcripción de la respuesta del API RUNT (no es captura de pantalla)"
+
+
+class ApiScrapingService:
+    def __init__(self, selenium: ScrapingService, api: RuntApiClient):
+        """
+        :param selenium: Scraper del navegador; hace el login y actúa de respaldo.
+        :param api: Cliente del backend, compartido entre registros del lote
+            para conservar el token y las conexiones.
+        """
+        self.selenium = selenium
+        self.api = api
+        rutas = selenium.selectors.get("api_runt") or {}
+        self.ruta_vehiculos = rutas.get("ruta_vehiculos_propietario", "")
+        self.ruta_detalle = rutas.get("ruta_detalle_vehiculo", "")
+        self.ruta_nombre = rutas.get("ruta_nombre_propietario", "")
+        # True mientras el registro en curso se resuelve por Selenium
+        self.en_respaldo = False
+        # Consulta en curso (tipo, número, nombre), para rehacerla en Selenium
+        self._consulta: Optional[Tuple[str, str, str]] = None
+
+    # ------------------------------------------------------------------
+    # Sesión
+    # ------------------------------------------------------------------
+    def login(self) -> bool:
+        """Login en el navegador y traspaso de token/cookies al cliente HTTP."""
+        if not self.selenium.login():
+            return False
+        if not self.api.cargar_credenciales_desde_driver(self.selenium.web_client.driver):
+            logger.warning("Sin credenciales reutilizables; las consultas irán por Selenium")
+        return True
+
+    def _get_json(self, ruta: str, **valores) -> Any:
+        """GET con un re-login si el token venció."""
+        if not self.api.autenticado and not self.login():
+            raise RuntApiAuthError("No se pudo iniciar sesión en RUNT")
+        try:
+            return self.api.get_json(ruta, **valores)
+        except RuntApiAuthError:
+            logger.info("Token RUNT vencido; se renueva con el navegador")
+            if not self.login():
+                raise
+            return self.api.get_json(ruta, **valores)
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def consultar_por_propietario(self, tipo_doc: str, numero_doc: str, nombre: str):
+        """Misma firma y retorno que ScrapingService: (placas, png_bytes)."""
+        self.en_respaldo = False
+        self._consulta = (tipo_doc, numero_doc, nombre)
+        if not self.ruta_vehiculos or not self.ruta_nombre:
+            return self._respaldo_consulta(tipo_doc, numero_doc, nombre, "ruta no configurada")
+        try:
+            with medir_paso("api.consulta"):
+                datos = self._get_json(
+                    self.ruta_vehiculos, tipo=homologar_tipo_documento(tipo_doc), numero=numero_doc
+                )
+        except RuntApiError as e:
+            return self._respaldo_consulta(tipo_doc, numero_doc, nombre, str(e))
+
+        plano = aplanar_json(datos)
+        nombre_runt = plano.get(self.ruta_nombre)
+        placas = placas_en_json(datos)
+        evidencia = {"Documento": f"{tipo_doc} {numero_doc}", "Propietario": nombre_runt or "-"}
+        evidencia["Placas"] = ", ".join(placas) or "Sin vehículos asociados"
+        png = _evidencia_png("Consulta de automotores por propietario (API)", evidencia)
+
+        if not placas:
+            logger.warning(f"ID {numero_doc} - Sin placas asociadas (API)")
+            return ([], png)
+        if not nombre_runt:
+            # Sin nombre no se puede validar el propietario: nunca aceptar las placas así
+            return self._respaldo_consulta(
+                tipo_doc, numero_doc, nombre, f"respuesta sin '{self.ruta_nombre}'"
+            )
+        if normalizar_nombre(nombre_runt) != normalizar_nombre(nombre):
+            logger.warning(
+                f"ID {numero_doc} - Nombre no coincide. "
+                f"Plataforma: '{nombre_runt}'. NocoDB: '{nombre}'."
+            )
+            return ([], png)
+        logger.info(f"ID {numero_doc} - Placas encontradas (API): {placas}")
+        return (placas, png)
+
+    def abrir_ficha_y_extraer(self, placa: str) -> Tuple[Dict[str, Any], bytes]:
+        """Misma firma y retorno que ScrapingService: (detalle, png_bytes)."""
+        if self.en_respaldo:
+            return self.selenium.abrir_ficha_y_extraer(placa)
+        try:
+            with medir_paso("api.ficha"):
+                datos = self._get_json(self.ruta_detalle, placa=placa)
+        except RuntApiError as e:
+            return self._respaldo_ficha(placa, str(e))
+        detalle: Dict[str, Any] = {"Placa": placa}
+        detalle.update(aplanar_json(datos))
+        logger.info("Campos extraídos (API): %d", len(detalle))
+        return (detalle, _evidencia_png(f"Información del vehículo {placa} (API)", detalle))
+
+    def volver_a_inicio(self):
+        # Sin navegación que deshacer salvo que el registro haya ido por Selenium
+        if self.en_respaldo:
+            return self.selenium.volver_a_inicio()
+        return True
+
+    def tomar_screenshot_bytes(self) -> bytes:
+        return self.selenium.tomar_screenshot_bytes()
+
+    def _respaldo_consulta(self, tipo_doc: str, numero_doc: str, nombre: str, motivo: str):
+        logger.warning(
+            "Consulta por API no disponible (%s); se usa Selenium para este registro", motivo
+        )
+        self.en_respaldo = True
+        return self.selenium.consultar_por_propietario(tipo_doc, numero_doc, nombre)
+
+    def _respaldo_ficha(self, placa: str, motivo: str):
+        """
+        La ficha no llegó por API: el navegador no está en la consulta (se la
+        saltó el motor API), así que se rehace por Selenium y se abre la placa
+        desde la lista. Las placas restantes del registro siguen por Selenium.
+        """
+        logger.warning("Ficha de %s por API no disponible (%s); se usa Selenium", placa, motivo)
+        self.en_respaldo = True
+        if self._consulta is None:
+            raise RuntApiError(f"Sin consulta en curso para abrir la placa {placa}")
+        self.selenium.consultar_por_propietario(*self._consulta)
+        return self.selenium.abrir_ficha_y_extraer(placa)
+
+
+def _evidencia_png(titulo: str, datos: Dict[str, Any]) -> bytes:
+    """
+    Evidencia en imagen para el PDF cuando no hay pantalla que capturar:
+    rótulo de transcripción, título y pares clave/valor en texto plano.
+    """
+    lineas: List[str] = [ROTULO_EVIDENCIA, titulo, ""] + [f"{k}: {v}" for k, v in datos.items()]
+    if len(lineas) > 120:
+        lineas = lineas[:119] + [f"... ({len(datos)} campos, ver detalle JSON)"]
+    alto = 40 + 18 * len(lineas)
+    img = Image.new("RGB", (1240, max(alto, 200)), "white")
+    dibujo = ImageDraw.Draw(img)
+    for i, linea in enumerate(lineas):
+        dibujo.text((30, 20 + 18 * i), linea[:180], fill="black")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
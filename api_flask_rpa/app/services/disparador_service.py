@@ -0,0 +1,80 @@
+"""
+Disparador de lotes con debounce.
+
+Los webhooks de NocoDB llegan en ráfagas (una carga masiva de Insumo genera
+un evento por fila). El disparador agrupa las notificaciones: espera
+``debounce`` segundos sin eventos nuevos (como máximo ``espera_maxima``
+desde el primero) y entonces ejecuta el callback en segundo plano. Si llegan
+eventos mientras el lote corre, se programa una sola ejecución más al final.
+"""
+import threading
+import time
+from typing import Callable, Optional
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("disparador_service")
+
+
+class DisparadorLotes:
+    def __init__(
+        self,
+        callback: Callable[[], None],
+        debounce: float = 1.0,
+        espera_maxima: float = 5.0,
+    ):
+        self.callback = callback
+        self.debounce = debounce
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._primer_evento: Optional[float] = None
+        self._ejecutando = False
+        self._repetir = False
+        self.eventos = 0
+
+    def notificar(self, motivo: str = "") -> None:
+        """Registra un evento; el lote arranca tras la ventana de debounce."""
+        with self._lock:
+            self.eventos += 1
+            if self._ejecutando:
+                # Lo nuevo se atiende con una ejecución extra al terminar
+                self._repetir = True
+                return
+            ahora = time.monotonic()
+            if self._primer_evento is None:
+                self._primer_evento = ahora
+            espera = min(self.debounce, self._primer_evento + self.espera_maxima - ahora)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(0.0, espera), self._disparar)
+            self._timer.daemon = True
+            self._timer.start()
+        logger.debug("Evento recibido (%s); lote en %.2fs", motivo, espera)
+
+    def _disparar(self):
+        with self._lock:
+            if self._ejecutando:
+                self._repetir = True
+                return
+            self._timer = None
+            self._primer_evento = None
+            self._ejecutando = True
+        threading.Thread(target=self._ejecutar, name="disparador-lotes", daemon=True).start()
+
+    def _ejecutar(self):
+        while True:
+            logger.info("Disparando lote por eventos de NocoDB")
+            try:
+                self.callback()
+            except Exception:
+                logger.exception("Error ejecutando lote disparado por webhook")
+            with self._lock:
+                if not self._repetir:
+                    self._ejecutando = False
+                    return
+                self._repetir = False
+
+    @property
+    def ejecutando(self) -> bool:
+        with self._lock:
+            return self._ejecutando
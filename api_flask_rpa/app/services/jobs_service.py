@@ -0,0 +1,147 @@
+"""
+Modelo de trabajos (jobs) asíncronos para los lotes de consulta.
+
+POST /api/gestion/ejecutar ya no ejecuta el lote dentro de la petición HTTP:
+crea un Job, lo envía a un ejecutor de un solo hilo y responde 202 con su
+id. El estado y los resultados por registro se consultan después.
+
+Single-flight: mientras haya un job en cola o en ejecución, ``lanzar``
+devuelve ese mismo job en lugar de crear otro, de modo que dos disparos
+(poller, webhook, usuario) nunca lanzan lotes solapados.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("jobs_service")
+
+# Estados del job
+EN_COLA = "en_cola"
+EJECUTANDO = "ejecutando"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+ESTADOS_ACTIVOS = (EN_COLA, EJECUTANDO)
+
+# Cuántos jobs terminados se conservan en memoria para consulta
+MAX_HISTORIAL = 50
+
+
+@dataclass
+class Job:
+    id: str
+    origen: str
+    estado: str = EN_COLA
+    creado: str = field(default_factory=lambda: datetime.now().isoformat())
+    iniciado: Optional[str] = None
+    terminado: Optional[str] = None
+    resultado: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def activo(self) -> bool:
+        return self.estado in ESTADOS_ACTIVOS
+
+    def esperar(self, timeout: Optional[float] = None):
+        """Bloquea hasta que el job termine (sin propagar su error)."""
+        if self.future is not None:
+            self.future.exception(timeout)
+
+    def resumen(self) -> Dict[str, Any]:
+        """Estado serializable, sin el detalle por registro."""
+        resultado = self.resultado or {}
+        return {
+            "id": self.id,
+            "origen": self.origen,
+            "estado": self.estado,
+            "creado": self.creado,
+            "iniciado": self.iniciado,
+            "terminado": self.terminado,
+            "procesados": resultado.get("procesados", resultado.get("processed")),
+            "errores": resultado.get("errores"),
+            "mensaje": resultado.get("mensaje", resultado.get("message")),
+            "total_resultados": len(resultado.get("detalles") or []),
+            "error": self.error,
+        }
+
+    def resultados(self, pagina: int, por_pagina: int) -> List[Dict[str, Any]]:
+        detalles = (self.resultado or {}).get("detalles") or []
+        inicio = (pagina - 1) * por_pagina
+        return detalles[inicio:inicio + por_pagina]
+
+
+class JobManager:
+    def __init__(self, tarea: Callable[[], Dict[str, Any]]):
+        self.tarea = tarea
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lote-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lanzar(self, origen: str = "api") -> Tuple[Job, bool]:
+        """
+        Encola un lote. Retorna (job, creado); si ya hay uno activo se
+        devuelve ese con ``creado`` en False.
+        """
+        with self._lock:
+            activo = self._activo()
+            if activo is not None:
+                logger.info("Lote ya activo (%s); se reutiliza para '%s'", activo.id, origen)
+                return activo, False
+            job = Job(id=uuid.uuid4().hex, origen=origen)
+            self._jobs[job.id] = job
+            self._recortar()
+            job.future = self._executor.submit(self._ejecutar, job)
+        logger.info("Job %s encolado (origen=%s)", job.id, origen)
+        return job, True
+
+    def obtener(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def listar(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _activo(self) -> Optional[Job]:
+        return next((j for j in self._jobs.values() if j.activo), None)
+
+    def _recortar(self):
+        terminados = [j.id for j in self._jobs.values() if not j.activo]
+        for job_id in terminados[: max(0, len(self._jobs) - MAX_HISTORIAL)]:
+            del self._jobs[job_id]
+
+    def _ejecutar(self, job: Job):
+        job.estado = EJECUTANDO
+        job.iniciado = datetime.now().isoformat()
+        try:
+            job.resultado = self.tarea()
+            job.estado = COMPLETADO
+        except Exception as e:
+            logger.exception("Job %s fallido: %s", job.id, e)
+            job.error = str(e)
+            job.estado = FALLIDO
+        finally:
+            job.terminado = datetime.now().isoformat()
+        logger.info("Job %s terminado: %s", job.id, job.estado)
+
+
+# Singleton helper
+_instance: Optional[JobManager] = None
+_instance_lock = threading.Lock()
+
+
+def get_job_manager(tarea: Callable[[], Dict[str, Any]]) -> JobManager:
+    """
+    Obtiene el gestor de jobs del proceso (Singleton).
+    ``tarea`` solo se usa al crearlo.
+    """
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = JobManager(tarea)
+    return _instance
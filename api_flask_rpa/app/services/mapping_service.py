@@ -0,0 +1,129 @@
+"""
+Mapeo de los campos extraídos de la ficha RUNT a columnas de NocoDB.
+
+Se usa en el modo de almacenamiento "ancho" de detalles de vehículo
+(DETALLE_STORAGE_MODE = json | columnas), donde cada placa es una sola fila
+en lugar de una fila por NombreDetalle/ValorDetalle (modo EAV).
+"""
+import hashlib
+import json
+import unicodedata
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Storage modes
+MODO_EAV = "eav"
+MODO_JSON = "json"
+MODO_COLUMNAS = "columnas"
+MODOS_VALIDOS = (MODO_EAV, MODO_JSON, MODO_COLUMNAS)
+
+# Columna donde se guarda el detalle completo (o lo no mapeado) como JSON
+COLUMNA_JSON = "DetalleJSON"
+
+# Hash del contenido de la ficha (columna en modo ancho, NombreDetalle en EAV)
+CAMPO_HASH = "HashDetalle"
+
+# Etiqueta RUNT (normalizada: sin tildes, minúsculas) -> columna tipada
+MAPEO_CAMPOS: Dict[str, str] = {
+    "placa": "Placa",
+    "placa del vehiculo": "Placa",
+    "nro. de licencia de transito": "LicenciaTransito",
+    "numero de licencia de transito": "LicenciaTransito",
+    "estado del vehiculo": "EstadoVehiculo",
+    "tipo de servicio": "TipoServicio",
+    "clase de vehiculo": "ClaseVehiculo",
+    "marca": "Marca",
+    "linea": "Linea",
+    "modelo": "Modelo",
+    "color": "Color",
+    "numero de serie": "NumeroSerie",
+    "numero de motor": "NumeroMotor",
+    "numero de chasis": "NumeroChasis",
+    "numero de vin": "NumeroVIN",
+    "cilindraje": "Cilindraje",
+    "tipo de carroceria": "TipoCarroceria",
+    "tipo combustible": "TipoCombustible",
+    "tipo de combustible": "TipoCombustible",
+    "fecha de matricula inicial": "FechaMatriculaInicial",
+    "autoridad de transito": "AutoridadTransito",
+    "gravamenes a la propiedad": "Gravamenes",
+    "clasico o antiguo": "ClasicoAntiguo",
+    "repotenciado": "Repotenciado",
+    "puertas": "Puertas",
+    "capacidad de carga": "CapacidadCarga",
+    "capacidad de pasajeros": "CapacidadPasajeros",
+    "peso bruto vehicular": "PesoBruto",
+    "numero de ejes": "NumeroEjes",
+}
+
+
+def normalizar_etiqueta(etiqueta: str) -> str:
+    """Etiqueta sin tildes, en minúsculas y sin ':' ni espacios extra."""
+    texto = unicodedata.normalize("NFKD", str(etiqueta))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.replace(":", "").lower().split())
+
+
+def columna_para(etiqueta: str) -> Optional[str]:
+    """Columna tipada para la etiqueta RUNT, o None si no está mapeada."""
+    return MAPEO_CAMPOS.get(normalizar_etiqueta(etiqueta))
+
+
+def mapear_detalle(detalle: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Separa el detalle extraído en (columnas mapeadas, campos sin mapear).
+    Los valores se guardan como texto, igual que ValorDetalle en modo EAV.
+    """
+    columnas: Dict[str, str] = {}
+    extras: Dict[str, str] = {}
+    for etiqueta, valor in detalle.items():
+        columna = columna_para(etiqueta)
+        if columna:
+            columnas[columna] = str(valor)
+        else:
+            extras[etiqueta] = str(valor)
+    return columnas, extras
+
+
+def campos_detalle(detalle: Dict[str, Any], modo: str) -> Dict[str, Any]:
+    """
+    Campos de detalle de la fila ancha según el modo:
+    - json: todo el detalle en DetalleJSON.
+    - columnas: lo mapeado en columnas tipadas; lo demás en DetalleJSON
+      para no perder campos nuevos que RUNT agregue a la ficha.
+    """
+    if modo == MODO_JSON:
+        return {COLUMNA_JSON: json.dumps(detalle, ensure_ascii=False)}
+    columnas, extras = mapear_detalle(detalle)
+    columnas[COLUMNA_JSON] = json.dumps(extras, ensure_ascii=False) if extras else None
+    return columnas
+
+
+def detalle_desde_eav(filas: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """Reconstruye el dict de detalle de una placa a partir de sus filas EAV."""
+    detalle: Dict[str, str] = {}
+    for fila in filas:
+        nombre = fila.get("NombreDetalle")
+        if nombre and nombre != CAMPO_HASH:
+            detalle[nombre] = fila.get("ValorDetalle")
+    return detalle
+
+
+def agrupar_eav_por_placa(filas: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Agrupa filas EAV por (NumUnicoProceso, Placa). Las filas deben venir
+    ordenadas por esas columnas: cada grupo (una fila ancha) se entrega en
+    cuanto termina, sin retener la tabla completa en memoria.
+    """
+    for _, grupo in groupby(filas, key=lambda f: (f.get("NumUnicoProceso"), f.get("Placa"))):
+        yield list(grupo)
+
+
+def hash_detalle(detalle: Dict[str, Any]) -> str:
+    """
+    Hash del contenido de la ficha de una placa (independiente del orden de
+    los campos). Sirve para detectar si cambió desde la última consulta.
+    """
+    normalizado = {normalizar_etiqueta(k): str(v).strip() for k, v in detalle.items()}
+    payload = json.dumps(normalizado, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,155 @@
+"""
+Servicio de Parámetros del sistema (tabla Parametros de NocoDB).
+
+Mantiene una caché a nivel de proceso con TTL configurable
+(PARAMETROS_TTL_SECONDS) y detecta cambios con un hash del último payload:
+mientras los valores no cambien se devuelve la misma instancia de
+Parametros, de modo que los consumidores pueden comparar ``version`` para
+decidir si reconstruyen sus objetos.
+"""
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from config import settings
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("parametros_service")
+
+DEFAULT_TTL_SECONDS = 300
+
+
+def _to_int(valor: Any, default: int) -> int:
+    try:
+        return int(valor) if valor not in (None, "") else default
+    except (TypeError, ValueError):
+        logger.warning("Valor de parámetro no numérico '%s', se usa %s", valor, default)
+        return default
+
+
+def _to_bool(valor: Any, default: bool) -> bool:
+    if valor in (None, ""):
+        return default
+    return str(valor).strip().lower() in ("1", "true", "si", "sí")
+
+
+@dataclass(frozen=True)
+class Parametros:
+    """Parámetros ya tipados; ``raw`` conserva el diccionario original."""
+    version: str
+    raw: Dict[str, Any] = field(repr=False)
+    email_recipients: List[str]
+    hora_inicio: str
+    hora_fin: str
+    limite_pendientes: int
+    reintentos_login: int
+    reintentos_proceso: int
+    delay_bajo: int
+    delay_medio: int
+    delay_alto: int
+    url_runt: str
+    usuario_runt: str
+    password_runt: str = field(repr=False)
+    escritura_unica: bool
+    motor_consulta: str
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any], version: str) -> "Parametros":
+        # Parsear la cadena (formato "correo1,correo2,correo3")
+        recipients = [
+            email.strip()
+            for email in str(raw.get("EmailRecipients", "") or "").split(",")
+            if email.strip()
+        ]
+        return cls(
+            version=version,
+            raw=raw,
+            email_recipients=recipients,
+            hora_inicio=raw.get("HoraInicio", "07:00") or "07:00",
+            hora_fin=raw.get("HoraFin", "18:00") or "18:00",
+            limite_pendientes=_to_int(raw.get("LimitePendientes"), 50),
+            reintentos_login=_to_int(raw.get("ReintentosLogin"), 2),
+            reintentos_proceso=_to_int(raw.get("ReintentosProceso"), 2),
+            delay_bajo=_to_int(raw.get("DelayBajo"), 5),
+            delay_medio=_to_int(raw.get("DelayMedio"), 10),
+            delay_alto=_to_int(raw.get("DelayAlto"), 15),
+            url_runt=raw.get("URLRUNT", "") or "",
+            usuario_runt=raw.get("UsuarioRUNT", "") or "",
+            password_runt=raw.get("PasswordRUNT", "") or "",
+            escritura_unica=_to_bool(raw.get("EscrituraUnicaDetalles"), False),
+            # "selenium" (navegador por registro) o "api" (backend RUNT directo)
+            motor_consulta=str(raw.get("MotorConsulta") or "selenium").strip().lower(),
+        )
+
+    def get(self, nombre: str, default: Any = None) -> Any:
+        """Acceso a parámetros sin campo tipado."""
+        return self.raw.get(nombre, default)
+
+
+class ParametrosService:
+    def __init__(self, source_repo: NocoDbSourceRepository, ttl: Optional[float] = None):
+        self.source_repo = source_repo
+        self.ttl = ttl if ttl is not None else _to_int(
+            settings.PARAMETROS_TTL_SECONDS, DEFAULT_TTL_SECONDS
+        )
+        self._parametros: Optional[Parametros] = None
+        self._leido_en = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(raw: Dict[str, Any]) -> str:
+        payload = json.dumps(raw, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()
+
+    def obtener(self, forzar: bool = False) -> Parametros:
+        """
+        Devuelve los parámetros vigentes. Solo consulta NocoDB si venció el TTL
+        o si ``forzar`` es True; si la lectura falla y hay una copia previa,
+        se sigue usando esa.
+        """
+        with self._lock:
+            vigente = time.monotonic() - self._leido_en < self.ttl
+            if self._parametros is not None and vigente and not forzar:
+                return self._parametros
+            try:
+                raw = self.source_repo.obtener_parametros()
+            except Exception as e:
+                if self._parametros is None:
+                    raise
+                logger.warning(
+                    "No se pudieron refrescar parámetros, se usa la copia en caché: %s", e
+                )
+                return self._parametros
+            self._leido_en = time.monotonic()
+            version = self._hash(raw)
+            if self._parametros is None or self._parametros.version != version:
+                logger.info("Parámetros cargados (versión %s)", version[:8])
+                self._parametros = Parametros.from_raw(raw, version)
+            return self._parametros
+
+    def refrescar(self) -> Parametros:
+        return self.obtener(forzar=True)
+
+    def invalidar(self):
+        with self._lock:
+            self._leido_en = 0.0
+
+
+# Singleton helper
+_instance: Optional[ParametrosService] = None
+_instance_lock = threading.Lock()
+
+
+def get_parametros_service(source_repo: NocoDbSourceRepository) -> ParametrosService:
+    """
+    Obtiene la instancia del servicio de parámetros (Singleton por proceso).
+    ``source_repo`` solo se usa al crearla.
+    """
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = ParametrosService(source_repo)
+    return _instance
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from app.infrastructure.pdf_builder import images_to_pdf
 from config import settings
@@ -9,12 +9,15 @@ class PDFService:
     def __init__(self, pdf_dir: str = settings.PDF_DIR):
         self.pdf_dir = pdf_dir
 
+    def build_pdf_path(self, correlation_id: str) -> str:
+        """Ruta determinística del PDF consolidado: PDF_DIR/fecha/{id}_{fecha}_ResumenPlacas.pdf"""
+        date = datetime.utcnow().strftime("%Y-%m-%d")
+        return str(Path(self.pdf_dir) / date / f"{correlation_id}_{date}_ResumenPlacas.pdf")
+
     def consolidate_images_to_pdf(
-        self, image_paths: List[str], correlation_id: str
+        self, image_paths: List[str], correlation_id: str, out_pdf: Optional[str] = None
     ) -> str:
-        date = datetime.utcnow().strftime("%Y-%m-%d")
-        out_folder = Path(self.pdf_dir) / date
-        out_folder.mkdir(parents=True, exist_ok=True)
-        out_pdf = out_folder / f"{correlation_id}_{date}_ResumenPlacas.pdf"
+        out_pdf = Path(out_pdf or self.build_pdf_path(correlation_id))
+        out_pdf.parent.mkdir(parents=True, exist_ok=True)
         images_to_pdf(image_paths, str(out_pdf))
         return str(out_pdf)
@@ -8,12 +8,76 @@ from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
 from app.utils.homologacion_utils import homologar_tipo_documento
 from app.utils.string_utils import normalizar_nombre
-import time
+from app.utils.timing import medir_paso
 import yaml
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 
 logger = get_logger("scraping_service")
 
+# Extracción en un solo execute_script: recorre los bloques de detalle y
+# retorna {etiqueta: valor} con la misma regla que el extractor por elementos
+# (primer <label> = clave sin ":", segundo = valor).
+JS_EXTRAER_DETALLE = """
+    var xpath = arguments[0], etiqueta = arguments[1], datos = {};
+    var r = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (var i = 0; i < r.snapshotLength; i++) {
+        var labels = r.snapshotItem(i).getElementsByTagName(etiqueta);
+        if (labels.length < 2) continue;
+        var clave = (labels[0].innerText || '').replace(/:/g, '').trim();
+        var valor = (labels[1].innerText || '').trim();
+        if (clave && valor) datos[clave] = valor;
+    }
+    return datos;
+"""
+
+# Textos de las opciones de la lista de placas en una sola llamada
+JS_TEXTOS_XPATH = """
+    var r = document.evaluate(
+        arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+    );
+    var textos = [];
+    for (var i = 0; i < r.snapshotLength; i++) {
+        textos.push((r.snapshotItem(i).innerText || '').trim());
+    }
+    return textos;
+"""
+
+
+def aplanar_json(datos: Any, prefijo: str = "") -> Dict[str, str]:
+    """
+    Aplana una respuesta JSON a {ruta: valor}: objetos anidados con "." y
+    listas con el índice ("propietarios.0.nombre"). Omite nulos y vacíos.
+    """
+    plano: Dict[str, str] = {}
+    if isinstance(datos, dict):
+        items = datos.items()
+    elif isinstance(datos, list):
+        items = ((str(i), v) for i, v in enumerate(datos))
+    else:
+        if datos not in (None, ""):
+            plano[prefijo] = str(datos)
+        return plano
+    for clave, valor in items:
+        ruta = f"{prefijo}.{clave}" if prefijo else str(clave)
+        plano.update(aplanar_json(valor, ruta))
+    return plano
+
+
+def placas_en_json(datos: Any) -> List[str]:
+    """Valores de las claves "placa" (sin importar mayúsculas) en cualquier nivel."""
+    placas: List[str] = []
+    if isinstance(datos, dict):
+        for clave, valor in datos.items():
+            if str(clave).lower() == "placa" and isinstance(valor, str) and valor.strip():
+                placas.append(valor.strip())
+            else:
+                placas.extend(placas_en_json(valor))
+    elif isinstance(datos, list):
+        for valor in datos:
+            placas.extend(placas_en_json(valor))
+    return list(dict.fromkeys(placas))
+
 
 class ScrapingService:
     """
@@ -33,10 +97,14 @@ class ScrapingService:
         url_runt: str = "",
         usuario_runt: str = "", 
         password_runt: str = "",
+        extraccion_js: bool = True,
     ):
         """
         Inicializa el servicio de scraping con el cliente web (Selenium)
         y carga los selectores desde el archivo YAML.
+        Los timeouts son topes de espera por condición, no pausas fijas.
+        Con extraccion_js la ficha y la lista de placas se leen con un único
+        execute_script; el extractor por elementos queda como respaldo.
         """
         self.web_client = web_client
         default_path = (
@@ -49,6 +117,7 @@ class ScrapingService:
         self.url_runt = url_runt
         self.usuario_runt = usuario_runt
         self.password_runt = password_runt
+        self.extraccion_js = extraccion_js
 
         try:
             with open(selectors_path, "r", encoding="utf-8") as f:
@@ -61,6 +130,10 @@ class ScrapingService:
             logger.error(f"Error cargando YAML de selectores: {e}")
             self.selectors = {}
 
+        # Modo captura: los datos salen del JSON de las XHR del portal
+        self.api_runt = self.selectors.get("api_runt") or {}
+        self.captura_xhr = bool(getattr(web_client, "captura_xhr", False) and self.api_runt)
+
     def login(self) -> bool:
         """
         Realiza el proceso de login en RUNT PRO.
@@ -96,46 +169,49 @@ class ScrapingService:
                     f"Error al verificar estado de sesión (no fatal): {e}. Se procede con login."
                 )
 
-            self.web_client.click_selector(s["boton_continuar"])
-            logger.info("Ingresando credenciales...")
-            self.web_client.send_keys_selector(s["input_usuario"], self.usuario_runt)
-            self.web_client.send_keys_selector(s["input_contrasena"], self.password_runt)
-            self.web_client.click_selector(s["boton_iniciar_sesion"])
+            with medir_paso("login.credenciales"):
+                self.web_client.click_selector(s["boton_continuar"])
+                logger.info("Ingresando credenciales...")
+                self.web_client.send_keys_selector(s["input_usuario"], self.usuario_runt)
+                self.web_client.send_keys_selector(s["input_contrasena"], self.password_runt)
+                self.web_client.click_selector(s["boton_iniciar_sesion"])
             logger.info("Iniciando sesión...")
-            time.sleep(self.timeout_bajo)
 
-            try:
-                # Verificar y manejar popup de sesiones
-                if self._handle_session_limit_popup():
-                    logger.info("Popup de sesiones manejado correctamente")
-                    time.sleep(
-                        self.timeout_bajo
-                    )  # Esperar a que cierre las sesiones anteriores
-            except Exception as e:
-                logger.error(f"Error manejando popup de sesiones: {e}")
-                return False
+            # Tras el submit aparece la bienvenida o el popup de sesiones:
+            # se espera lo primero que ocurra (timeout_medio es solo el tope).
+            with medir_paso("login.respuesta"):
+                resultado = self.web_client.wait_any_visible(
+                    [s_home["mensaje_bienvenida"], self.selectors["popup_sesiones"]["mensaje"]],
+                    timeout=self.timeout_medio,
+                )
+
+            if resultado == 1:
+                try:
+                    # Verificar y manejar popup de sesiones
+                    with medir_paso("login.popup_sesiones"):
+                        if self._handle_session_limit_popup():
+                            logger.info("Popup de sesiones manejado correctamente")
+                except Exception as e:
+                    logger.error(f"Error manejando popup de sesiones: {e}")
+                    return False
 
             # Verificar que el login fue exitoso
-            try:
-                # selector tu página principal después del login
-                s_home = self.selectors["home"]
+            with medir_paso("login.bienvenida"):
                 ok = self.web_client.wait_until_is_visible(
-                    s_home["mensaje_bienvenida"], timeout=self.timeout_bajo
+                    s_home["mensaje_bienvenida"], timeout=self.timeout_medio
                 )
-                if ok:
-                    cerrar_guia = self.web_client.wait_until_is_visible(
-                        s_home["cerrar_navegacion_guiada"], timeout=self.timeout_bajo
-                    )
-                    if cerrar_guia:
-                        self.web_client.click_selector(
-                            s_home["cerrar_navegacion_guiada"]
-                        )
-                    logger.info("Inicio de sesión exitoso.")
-                    return True
-            except TimeoutException:
+            if not ok:
                 logger.error("No se encontró el indicador de sesión exitosa")
                 return False
 
+            # La guía de navegación no siempre aparece: sondeo corto
+            if self.web_client.wait_until_is_visible(
+                s_home["cerrar_navegacion_guiada"], timeout=self.timeout_bajo
+            ):
+                self.web_client.click_selector(s_home["cerrar_navegacion_guiada"])
+            logger.info("Inicio de sesión exitoso.")
+            return True
+
         except Exception as e:
             logger.error("Error durante el login: %s", e)
             return False
@@ -172,9 +248,8 @@ class ScrapingService:
                             logger.info(
                                 "Clic en 'Cerrar sesiones' - cerrando sesiones anteriores"
                             )
-                            time.sleep(
-                                self.timeout_bajo
-                            )  # Esperar a que se cierren las sesiones
+                            # Esperar a que se cierre el popup
+                            self.web_client.wait_invisible(mensaje_sel, timeout=self.timeout_medio)
                             return True
 
                         except Exception as e:
@@ -187,7 +262,9 @@ class ScrapingService:
                                     btn_aceptar_sel, timeout=self.timeout_bajo
                                 )
                                 logger.info("Clic en 'Aceptar' como alternativa")
-                                time.sleep(self.timeout_bajo)
+                                self.web_client.wait_invisible(
+                                    mensaje_sel, timeout=self.timeout_medio
+                                )
                                 return True
                             except Exception as e2:
                                 logger.error(f"No se pudo cerrar el popup: {e2}")
@@ -235,9 +312,8 @@ class ScrapingService:
                             btn_aceptar_sel, timeout=self.timeout_bajo
                         )
                         logger.info("Popup de error de ruta cerrado")
-                        time.sleep(
-                            self.timeout_bajo
-                        )  # Esperar a que se cierre el popup
+                        # Esperar a que se cierre el popup
+                        self.web_client.wait_invisible(btn_aceptar_sel, timeout=self.timeout_bajo)
                         return True
 
                     except Exception as e:
@@ -257,66 +333,6 @@ class ScrapingService:
             logger.error(f"Error manejando popup de error de ruta: {e}")
             return False
 
-        """
-        1) Click en menú
-        2) Seleccionar consulta de automotores por propietario
-        3) Llenar tipo de documento y número
-        4) Click buscar
-        5) Leer lista de placas (retorna lista de strings)
-        """
-        # 1. ir al menu (si selector de menu existe)
-        try:
-            menu_sel = self.selectors["consulta"]["menu"]
-            self.web_client.find_element(By.CSS_SELECTOR, menu_sel).click()
-        except Exception:
-            # puede que ya estés en la página; no fatal
-            pass
-
-        # 2. diligenciar tipo y número (los selectores dependen del html)
-        input_sel = self.selectors["consulta"]["input_doc"]
-        input_el = self.web_client.find_element(By.CSS_SELECTOR, input_sel)
-        input_el.clear()
-        input_el.send_keys(numero)
-
-        # si hay un selector tipo_documento (select), manejarlo:
-        tipo_sel = self.selectors["consulta"].get("tipo_documento")
-        if tipo_sel:
-            try:
-                self.web_client.find_element(By.CSS_SELECTOR, tipo_sel).click()
-                # seleccionar la opción adecuada (por texto igual al tipo_documento)
-                opt_xpath = f"//mat-option//span[contains(., '{tipo_documento}')]"
-                self.web_client.find_element(By.XPATH, opt_xpath).click()
-            except Exception:
-                # continuar si no existe selector de tipo
-                pass
-
-        # 3. click buscar
-        boton_buscar = self.selectors["consulta"]["boton_buscar"]
-        self.web_client.find_element(By.CSS_SELECTOR, boton_buscar).click()
-
-        # 4. esperar resultados y parsear lista de placas
-        time.sleep(self.timeout_bajo)
-        placas = []
-        try:
-            placas_sel = self.selectors["consulta"]["lista_placas"]
-            elems = self.web_client.find_elements(By.CSS_SELECTOR, placas_sel)
-            for e in elems:
-                txt = e.text.strip()
-                if txt:
-                    placas.append(txt)
-        except Exception:
-            # posible caso "no encontrado"
-            # intentamos detectar modal SweetAlert2 con texto de "No hay resultados"
-            try:
-                # ejemplo SweetAlert2 class .swal2-popup
-                swal_sel = self.selectors.get("sweetalert_selector", ".swal2-popup")
-                el = self.web_client.find_element(By.CSS_SELECTOR, swal_sel, wait=False)
-                # si hay modal, no hay placas
-                return ([], b"")
-            except Exception:
-                return ([], b"")
-        return placas
-
     def consultar_por_propietario(self, tipo_doc: str, numero_doc: str, nombre: str):
         """
         Consulta las placas asociadas a un propietario en RUNT PRO.
@@ -328,18 +344,29 @@ class ScrapingService:
         navegacion_exitosa = False
 
         # 1. Intentar navegar por el menú (Prioridad)
-        if self._navegar_a_consulta_por_menu():
+        with medir_paso("consulta.navegacion"):
+            menu_ok = self._navegar_a_consulta_por_menu()
+        if menu_ok:
             navegacion_exitosa = True
         else:
             # 2. Si falla el menú, intentar navegar directo a la URL como alternativa
             logger.warning(
                 "Fallo al navegar por el menú. Intentando acceso directo a la URL..."
             )
-            self.web_client.open(s["url_consulta"])
-            time.sleep(self.timeout_bajo)
+            s_error = self.selectors["popup_error_ruta"]
+            with medir_paso("consulta.url_directa"):
+                self.web_client.open(s["url_consulta"])
+                self.web_client.wait_page_ready(
+                    timeout=self.timeout_medio, spinner=self.selectors["comunes"]["spinner"]
+                )
+                # Aparece el formulario o el popup de error de ruta/permisos
+                resultado = self.web_client.wait_any_visible(
+                    [s["select_tipo_documento"], s_error["mensaje"], s_error["mensaje_permisos"]],
+                    timeout=self.timeout_medio,
+                )
 
             # 2.1. Verificar si apareció popup de error de ruta/permisos
-            if self._handle_error_ruta_popup():
+            if resultado in (1, 2) and self._handle_error_ruta_popup():
                 logger.error(
                     "Popup de error de ruta detectado incluso con acceso directo. Abortando consulta."
                 )
@@ -359,41 +386,25 @@ class ScrapingService:
         try:
             tipo_doc = homologar_tipo_documento(tipo_doc)
             logger.info(f"Tipo de documento homologado: {tipo_doc}")
-            tipo_elem = self.web_client.find_by_selector(s["select_tipo_documento"])
-            tipo_elem.click()
-            time.sleep(self.timeout_bajo)
-
-            panel_selector = s["panel_opciones_tipo_doc"]
-            if panel_selector:
-                self.web_client.find_by_selector(
-                    panel_selector, timeout=self.timeout_bajo
-                )
-
-            opt_xpath = (
-                f"//mat-option//span[contains(normalize-space(.), '{tipo_doc}')]"
-            )
-            logger.info(f"Buscando opción de tipo_doc con XPATH: {opt_xpath}")
-            opcion = self.web_client.find_element(By.XPATH, opt_xpath)
-            opcion.click()
-            time.sleep(self.timeout_bajo)
-
-            self.web_client.send_keys_selector(s["input_numero_documento"], numero_doc)
-            self.web_client.click_selector(s["boton_consultar"])
+            with medir_paso("consulta.formulario"):
+                self._llenar_formulario_consulta(s, tipo_doc, numero_doc)
             logger.info("Se dio clic en consultar")
         except Exception as e:
             logger.error("Error ingresando datos de propietario: %s", e)
             raise
 
-        # 4. Esperar respuesta del servidor antes de verificar elementos
-        time.sleep(self.timeout_medio)  # Dar más tiempo para la respuesta
-        
+        # 4. Esperar la respuesta: alerta "sin placas", nombre del propietario
+        # o selector de placas, lo primero que aparezca (timeout_medio es el tope)
+        with medir_paso("consulta.respuesta"):
+            respuesta = self.web_client.wait_any_visible(
+                [s["alerta_modal"], s["input_nombre_propietario"], s["selector_placa"]],
+                timeout=self.timeout_medio,
+            )
+
         # 5. PRIMERO verificar si aparece el popup de "no tiene placas"
         popup_detectado = False
         try:
-            alerta_visible = self.web_client.wait_until_is_visible(
-                s["alerta_modal"], timeout=self.timeout_bajo
-            )
-            if alerta_visible:
+            if respuesta == 0:
                 popup_detectado = True
                 logger.warning(f"ID {numero_doc} - Popup de alerta detectado (sin placas asociadas)")
                 png_bytes = self.tomar_screenshot_bytes()
@@ -402,7 +413,7 @@ class ScrapingService:
                     self.web_client.click_selector(
                         s["alerta_boton_aceptar"], timeout=self.timeout_bajo
                     )
-                    time.sleep(self.timeout_bajo)
+                    self.web_client.wait_invisible(s["alerta_modal"], timeout=self.timeout_bajo)
                     logger.info("Popup cerrado exitosamente")
                 except Exception as e:
                     logger.error(f"Error al cerrar popup: {e}")
@@ -451,7 +462,6 @@ class ScrapingService:
             if not nombre_encontrado or nombre_plataforma_element is None:
                 logger.error(f"ID {numero_doc} - No se encontró el input de nombre del propietario después de múltiples intentos")
                 screenshot_fallo = self.tomar_screenshot_bytes()
-                time.sleep(self.timeout_bajo)
                 return ([], screenshot_fallo)
 
             # Extraer el nombre con manejo seguro de atributos
@@ -501,7 +511,6 @@ class ScrapingService:
             if nombre_plataforma_normalizado != nombre_noco_normalizado:
                 motivo = f"Nombre no coincide. Plataforma: '{nombre_plataforma}'. NocoDB: '{nombre}'."
                 screenshot_fallo = self.tomar_screenshot_bytes()
-                time.sleep(self.timeout_bajo)
                 logger.warning(f"ID {numero_doc} - {motivo}")
                 return ([], screenshot_fallo)
             else:
@@ -513,7 +522,6 @@ class ScrapingService:
                 screenshot_fallo = self.tomar_screenshot_bytes()
             except:
                 screenshot_fallo = b""
-            time.sleep(self.timeout_bajo)
             return ([], screenshot_fallo)
 
         # 7. Verificar y hacer clic en el selector de placas
@@ -538,14 +546,16 @@ class ScrapingService:
             if not elemento_encontrado:
                 logger.error(f"ID {numero_doc} - No se encontró el selector de placas")
                 png_bytes = self.tomar_screenshot_bytes()
-                time.sleep(self.timeout_bajo)
                 return ([], png_bytes)
             
             # Hacer clic en el selector para desplegar las placas
-            self.web_client.click_selector(
-                s["selector_placa"], timeout=self.timeout_bajo
-            )
-            time.sleep(self.timeout_bajo)
+            with medir_paso("consulta.placas"):
+                self.web_client.click_selector(
+                    s["selector_placa"], timeout=self.timeout_bajo
+                )
+                self.web_client.wait_until_is_visible(
+                    s["lista_placas"], timeout=self.timeout_bajo
+                )
             
         except Exception as e:
             logger.error(f"Error al interactuar con selector de placas: {e}")
@@ -554,17 +564,10 @@ class ScrapingService:
 
         # 8. Tomar captura de la lista de placas
         png_bytes = self.tomar_screenshot_bytes()
-        time.sleep(self.timeout_bajo)
 
         # 9. Obtener lista de placas
         try:
-            elementos = self.web_client.find_all_by_selector(s["lista_placas"])
-            placas = [
-                el.text.strip()
-                for el in elementos
-                if el.text.strip() and el.text.upper() != "SELECCIONE"
-            ]
-
+            placas = self._leer_placas(s["lista_placas"])
             logger.info(f"ID {numero_doc} - Placas encontradas: {placas}")
             return (placas, png_bytes)
             
@@ -581,22 +584,28 @@ class ScrapingService:
         try:
             logger.info("Intentando navegación por el menú...")
             # Abrir menú lateral
+            # (click_selector espera a que cada opción sea clicable)
             self.web_client.click_selector(
                 s_home["menu_consultas"], timeout=self.timeout_bajo
             )
-            time.sleep(self.timeout_bajo)
 
             # Click en "Consulta información"
             self.web_client.click_selector(
                 s_home["consultar_informacion"], timeout=self.timeout_bajo
             )
-            time.sleep(self.timeout_bajo)
 
             # Click en "Consulta de automotores por propietario"
             self.web_client.click_selector(
                 s_home["opcion_automotores_propietario"], timeout=self.timeout_bajo
             )
-            time.sleep(self.timeout_bajo)
+
+            # La navegación termina cuando el formulario de consulta es visible
+            if not self.web_client.wait_until_is_visible(
+                self.selectors["consulta_propietario"]["select_tipo_documento"],
+                timeout=self.timeout_medio,
+            ):
+                logger.warning("El formulario de consulta no apareció tras el menú")
+                return False
 
             logger.info("Navegación por menú exitosa.")
             return True
@@ -621,15 +630,19 @@ class ScrapingService:
             xpath_placa = (
                 f"{s_panel['value']}//mat-option[./span[contains(text(), '{placa}')]]"
             )
-            el = self.web_client.find_element("xpath", xpath_placa)
-            el.click()
-            time.sleep(self.timeout_bajo)
+            if self.captura_xhr:
+                self.web_client.limpiar_capturas()
+            with medir_paso("ficha.apertura"):
+                self.web_client.click_selector(
+                    {"by": "xpath", "value": xpath_placa}, timeout=self.timeout_bajo
+                )
 
-            # Esperar contenedor de detalle
-            contenedor = self.web_client.find_by_selector(
-                s_det["contenedor_detalle"], timeout=self.timeout_bajo
-            )
-            bloques = self.web_client.find_all_by_selector(s_det["bloque_detalle"])
+                # Esperar contenedor de detalle
+                contenedor = self.web_client.find_by_selector(
+                    s_det["contenedor_detalle"], timeout=self.timeout_medio
+                )
+            # Los bloques deben existir antes de extraer (con o sin JS)
+            self.web_client.find_all_by_selector(s_det["bloque_detalle"])
 
             formulario_consulta = self.web_client.find_by_selector(
                 s["formulario_consulta"], timeout=self.timeout_bajo
@@ -637,7 +650,6 @@ class ScrapingService:
             self.web_client.driver.execute_script(
                 "arguments[0].style.zoom = '20%';", formulario_consulta
             )
-            time.sleep(self.timeout_bajo)
 
             datos_generales = self.web_client.find_by_selector(
                 s["datos_generales"], timeout=self.timeout_bajo
@@ -645,7 +657,6 @@ class ScrapingService:
             self.web_client.driver.execute_script(
                 "arguments[0].style.zoom = '20%';", datos_generales
             )
-            time.sleep(1.0)
 
             footer = self.web_client.find_by_selector(
                 s["footer"], timeout=self.timeout_bajo
@@ -653,30 +664,27 @@ class ScrapingService:
             self.web_client.driver.execute_script(
                 "arguments[0].style.zoom = '20%';", footer
             )
-            time.sleep(1.0)
 
             self.web_client.driver.execute_script(
                 "arguments[0].style.zoom = '60%';", contenedor
             )
-            time.sleep(1.0)
             # Asegura bajar hasta el final
             self.web_client.driver.execute_script(
                 "arguments[0].scrollIntoView({block: 'center'});", contenedor
             )
-            time.sleep(1.0)
+            # Captura solo cuando el navegador ya pintó los cambios de zoom
+            self.web_client.wait_repaint()
 
             # Extraer pares clave-valor de los bloques de detalle
             png_bytes = self.tomar_screenshot_bytes()
             logger.info(f"Extrayendo datos de placa: {placa}")
-            for block in bloques:
-                labels = block.find_elements(
-                    By.TAG_NAME, s_det["etiquetas_datos"]["value"]
-                )
-                if len(labels) >= 2:
-                    key = labels[0].text.replace(":", "").strip()
-                    val = labels[1].text.strip()
-                    if key and val:
-                        detalle[key] = val
+            with medir_paso("ficha.extraccion"):
+                campos = self._detalle_desde_xhr() if self.captura_xhr else None
+                if campos is None and self.extraccion_js:
+                    campos = self._extraer_detalle_js(s_det)
+                if campos is None:
+                    campos = self._extraer_detalle_elementos(s_det)
+            detalle.update(campos)
 
             logger.info("Campos extraídos: %d", len(detalle))
 
@@ -710,6 +718,117 @@ class ScrapingService:
                 pass  # No pasa nada si el driver ya está roto o cerrado
             raise
 
+    def _detalle_desde_xhr(self) -> Optional[Dict[str, str]]:
+        """
+        Detalle tomado de la última respuesta JSON de la ficha (ya llegó
+        cuando el contenedor está pintado). None si no se capturó.
+        """
+        respuestas = self.web_client.respuestas_json(
+            self.api_runt.get("detalle_vehiculo", ""), timeout=self.timeout_bajo
+        )
+        if not respuestas:
+            logger.warning("No se capturó la respuesta JSON de la ficha; se extrae del DOM")
+            return None
+        url, datos = respuestas[-1]
+        campos = aplanar_json(datos)
+        logger.info("Detalle tomado de la respuesta XHR %s (%d campos)", url, len(campos))
+        return campos or None
+
+    def _placas_desde_xhr(self) -> Optional[List[str]]:
+        """Placas de la respuesta JSON de la consulta por propietario, o None."""
+        respuestas = self.web_client.respuestas_json(
+            self.api_runt.get("vehiculos_propietario", "")
+        )
+        placas = [p for _, datos in respuestas for p in placas_en_json(datos)]
+        return list(dict.fromkeys(placas)) or None
+
+    def _extraer_detalle_js(self, s_det: dict):
+        """
+        Lee todos los bloques de la ficha en una sola ida y vuelta.
+        Retorna None si el script falla o no encuentra campos (se usa el respaldo).
+        """
+        if s_det["bloque_detalle"].get("by", "xpath").lower() != "xpath":
+            return None
+        try:
+            campos = self.web_client.driver.execute_script(
+                JS_EXTRAER_DETALLE,
+                s_det["bloque_detalle"]["value"],
+                s_det["etiquetas_datos"]["value"],
+            )
+        except Exception as e:
+            logger.warning(
+                f"Extracción JS de la ficha falló, se usa el extractor por elementos: {e}"
+            )
+            return None
+        if not campos:
+            logger.warning("Extracción JS sin campos, se usa el extractor por elementos")
+            return None
+        return campos
+
+    def _extraer_detalle_elementos(self, s_det: dict) -> dict:
+        """Extractor por elementos WebDriver (varias llamadas por bloque)."""
+        campos = {}
+        for block in self.web_client.find_all_by_selector(s_det["bloque_detalle"]):
+            labels = block.find_elements(
+                By.TAG_NAME, s_det["etiquetas_datos"]["value"]
+            )
+            if len(labels) >= 2:
+                key = labels[0].text.replace(":", "").strip()
+                val = labels[1].text.strip()
+                if key and val:
+                    campos[key] = val
+        return campos
+
+    def _llenar_formulario_consulta(self, s: dict, tipo_doc: str, numero_doc: str):
+        """Elige el tipo de documento, escribe el número y pulsa Consultar."""
+        self.web_client.click_selector(s["select_tipo_documento"], timeout=self.timeout_medio)
+
+        panel_selector = s["panel_opciones_tipo_doc"]
+        if panel_selector:
+            self.web_client.wait_until_is_visible(panel_selector, timeout=self.timeout_bajo)
+
+        opt_xpath = f"//mat-option//span[contains(normalize-space(.), '{tipo_doc}')]"
+        logger.info(f"Buscando opción de tipo_doc con XPATH: {opt_xpath}")
+        self.web_client.click_selector(
+            {"by": "xpath", "value": opt_xpath}, timeout=self.timeout_bajo
+        )
+        if panel_selector:
+            # El panel se cierra al elegir la opción
+            self.web_client.wait_invisible(panel_selector, timeout=self.timeout_bajo)
+
+        self.web_client.send_keys_selector(s["input_numero_documento"], numero_doc)
+        if self.captura_xhr:
+            self.web_client.limpiar_capturas()
+        self.web_client.click_selector(s["boton_consultar"])
+
+    def _leer_placas(self, selector: dict) -> List[str]:
+        """
+        Placas de la lista desplegada: de la respuesta XHR capturada, con un
+        único execute_script o, como respaldo, elemento por elemento.
+        """
+        placas = self._placas_desde_xhr() if self.captura_xhr else None
+        if placas is None and self.extraccion_js:
+            placas = self._leer_placas_js(selector)
+        if placas is None:
+            elementos = self.web_client.find_all_by_selector(selector)
+            placas = [
+                el.text.strip()
+                for el in elementos
+                if el.text.strip() and el.text.upper() != "SELECCIONE"
+            ]
+        return placas
+
+    def _leer_placas_js(self, selector: dict):
+        """Placas de la lista desplegada en una sola llamada; None si el script falla."""
+        if selector.get("by", "xpath").lower() != "xpath":
+            return None
+        try:
+            textos = self.web_client.driver.execute_script(JS_TEXTOS_XPATH, selector["value"])
+        except Exception as e:
+            logger.warning(f"Lectura JS de placas falló, se usa la lectura por elementos: {e}")
+            return None
+        return [t for t in textos if t and t.upper() != "SELECCIONE"]
+
     def volver_a_inicio(self):
         """
         Navega de vuelta a la página principal haciendo clic en el logo.
@@ -722,7 +841,7 @@ class ScrapingService:
             )
             if visible:
                 self.web_client.click_selector(s_panel, timeout=self.timeout_bajo)
-                time.sleep(self.timeout_bajo)
+                self.web_client.wait_invisible(s_panel, timeout=self.timeout_bajo)
 
             s_home = self.selectors["home"]
             logo_xpath = (
@@ -731,8 +850,11 @@ class ScrapingService:
             logger.info(f"Volviendo a inicio con XPath indexado: {logo_xpath}")
 
             # Usar find_element en lugar de click_selector para el XPath indexado
-            self.web_client.find_element(By.XPATH, logo_xpath).click()
-            time.sleep(self.timeout_bajo)
+            with medir_paso("inicio.volver"):
+                self.web_client.find_element(By.XPATH, logo_xpath).click()
+                self.web_client.wait_page_ready(
+                    timeout=self.timeout_bajo, spinner=self.selectors["comunes"]["spinner"]
+                )
             return True
         except Exception as e:
             logger.warning(
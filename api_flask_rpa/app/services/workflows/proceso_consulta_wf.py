@@ -1,45 +1,99 @@
+import threading
 import uuid
 import os
-from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+from app.repositories.nocodb_source_repository import (
+    LEASE_SECONDS,
+    NocoDbSourceRepository,
+    worker_id_por_defecto,
+)
 from app.infrastructure.nocodb_client import NocoDBClient
+from app.infrastructure.nocodb_async_client import AsyncNocoDBClient
+from app.infrastructure.journal_local import get_journal
 from app.infrastructure.web_client import WebClient
+from app.infrastructure.driver_manager import DriverManager
+from app.infrastructure.runt_api_client import RuntApiClient
+from app.repositories.insumo_write_behind import InsumoWriteBehind
 from app.services.workflows.proceso_unitario_wf import ProcesoUnitarioWF
+from app.services.api_scraping_service import MOTOR_API, MOTOR_SELENIUM
 from app.services.notification_service import NotificationService
+from app.services.parametros_service import get_parametros_service
 from app.utils.horarios_utils import puede_ejecutar_en_fecha
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from app.utils.logging_utils import get_logger
+from config import settings
 
 logger = get_logger("proceso_consulta_wf")
 
 
 class ProcesoConsultaWF:
-    def __init__(self, nocodb_client: NocoDBClient, web_client: WebClient):
+    def __init__(
+        self,
+        nocodb_client: NocoDBClient,
+        web_client: Optional[WebClient],
+        async_client: Optional[AsyncNocoDBClient] = None,
+        driver_manager: Optional[DriverManager] = None,
+    ):
         self.nocodb_client = nocodb_client
         self.web_client = web_client
+        # Con gestor, el driver se toma (sano) por registro y se recicla por límites
+        self.driver_manager = driver_manager
+        self.async_client = async_client
         self.notifier = NotificationService()
-        self.source_repo = NocoDbSourceRepository(self.nocodb_client)
+        # Journal local opcional (JOURNAL_PATH): reanudación y spool de escrituras
+        self.journal = get_journal(settings.JOURNAL_PATH)
+        self.source_repo = NocoDbSourceRepository(
+            self.nocodb_client, async_client, journal=self.journal
+        )
+        # Reclamo con lease: permite varios workers sobre la misma tabla Insumo
+        self.leases = settings.LEASE_ENABLED == "True"
+        self.worker_id = worker_id_por_defecto()
+        self.lease_seconds = int(settings.LEASE_SECONDS or LEASE_SECONDS)
+        # Sesión RUNT viva entre lotes (solo cuando el WF se reutiliza, p. ej. en el worker)
+        self.sesion_activa = False
+        # Cliente del backend RUNT (motor "api"): token y conexiones entre registros
+        self.runt_api: Optional[RuntApiClient] = None
+        # Versión de Parametros ya aplicada a notifier y cliente RUNT
+        self._version_parametros: Optional[str] = None
+
+    def _aplicar_parametros(self, parametros) -> None:
+        """Reconstruye lo que depende de Parametros; solo cuando cambia su versión."""
+        # Asignar los destinatarios al NotificationService
+        self.notifier.set_recipients(parametros.email_recipients)
+        if self.runt_api is not None:
+            # UrlRunt pudo cambiar: el cliente se recrea en el próximo uso
+            self.runt_api.close()
+            self.runt_api = None
+        self._version_parametros = parametros.version
+
+    def _cliente_runt_api(self, motor: str, url_runt: str) -> Optional[RuntApiClient]:
+        """Cliente HTTP para el motor "api"; None si el lote va por Selenium."""
+        if motor != MOTOR_API:
+            if motor != MOTOR_SELENIUM:
+                logger.warning("MotorConsulta desconocido '%s'; se usa Selenium", motor)
+            return None
+        if settings.RUNT_API_ENABLED != "True":
+            logger.warning("MotorConsulta=api requiere RUNT_API_ENABLED=True; se usa Selenium")
+            return None
+        if self.runt_api is None:
+            self.runt_api = RuntApiClient(settings.RUNT_API_URL or url_runt or settings.RUNT_URL)
+        return self.runt_api
 
-    def ejecutar_lote(self):
+    def ejecutar_lote(self, detener: Optional[threading.Event] = None):
         """
         Ejecuta un lote de consultas pendientes según las HU definidas.
         Controla horario laboral y estados de gestión.
+
+        :param detener: Si se activa, el lote termina tras el registro en curso
+            (drenado ordenado del worker); los reclamados restantes vuelven a la cola.
         """
-        # 1) leer parámetros
-        parametros = self.source_repo.obtener_parametros()
-        # Buscar el registro de destinatarios.
-        recipients_str = parametros.get("EmailRecipients", "")
-
-        # Parsear la cadena (asumiendo formato "correo1,correo2,correo3")
-        recipients_list = [
-            email.strip()
-            for email in recipients_str.split(",")
-            if email.strip()  # Filtra cadenas vacías
-        ]
-        # Asignar los destinatarios al NotificationService
-        self.notifier.set_recipients(recipients_list)
+        # 1) leer parámetros (caché con TTL compartida por el proceso)
+        parametros = get_parametros_service(self.source_repo).obtener()
+        if parametros.version != self._version_parametros:
+            self._aplicar_parametros(parametros)
         ahora = datetime.now()
-        hora_inicio_str = parametros.get("HoraInicio", "07:00")
-        hora_fin_str = parametros.get("HoraFin", "18:00")
+        hora_inicio_str = parametros.hora_inicio
+        hora_fin_str = parametros.hora_fin
         if not puede_ejecutar_en_fecha(
             ahora.date(), ahora, hora_inicio=hora_inicio_str, hora_fin=hora_fin_str
         ):
@@ -51,113 +105,248 @@ class ProcesoConsultaWF:
                 "message": "Fuera de horario laboral o día no hábil.",
             }
 
+        # Reenviar escrituras que quedaron en el spool de una caída anterior
+        if self.journal is not None:
+            self.journal.reproducir(self.nocodb_client)
+
         # obtener pendientes
-        limit = int(parametros.get("LimitePendientes", 50) or 50)
-        pendientes = self.source_repo.obtener_pendientes(limit=limit)
+        pendientes = self._obtener_pendientes(parametros.limite_pendientes)
         logger.info("Pendientes encontrados: %d", len(pendientes))
         self.notifier.send_start_notification(total_pendientes=len(pendientes))
 
-        # parámetros comunes que pasaremos downstream
-        reintentos_login = int(parametros.get("ReintentosLogin", 2) or 2)
-        reintentos_proceso = int(parametros.get("ReintentosProceso", 2) or 2)
-        timeout_bajo = int(parametros.get("DelayBajo", 5) or 5)
-        timeout_medio = int(parametros.get("DelayMedio", 10) or 10)
-        timeout_largo = int(parametros.get("DelayAlto", 15) or 15)
-        url_runt = parametros.get("URLRUNT", "")
-        usuario_runt = parametros.get("UsuarioRUNT", "")
-        password_runt = parametros.get("PasswordRUNT", "")
+        # Write-behind opcional: los cambios de estado se fusionan y envían en
+        # bloque fuera del camino crítico del navegador
+        write_behind = (
+            InsumoWriteBehind(self.source_repo)
+            if settings.WRITE_BEHIND_ENABLED == "True"
+            else None
+        )
+        repo_estados = write_behind or self.source_repo
 
         # Contadores y resultados
-        ok_count, error_count = 0, 0
-        results = []
-        all_pdfs = []
+        lote = {"ok": 0, "errores": 0, "resultados": [], "pdfs": []}
+        try:
+            self._procesar_pendientes(pendientes, parametros, repo_estados, lote, detener)
+        finally:
+            # Aunque el lote se corte por una excepción, los estados pendientes
+            # deben llegar a NocoDB (o al spool) y el aviso de fin debe salir
+            self._cerrar_lote(repo_estados, write_behind, lote)
+        return {
+            "procesados": lote["ok"],
+            "errores": lote["errores"],
+            "mensaje": "Ejecución completada correctamente",
+            "detalles": lote["resultados"],
+            "pdfs_generados": lote["pdfs"],
+        }
+
+    def _obtener_pendientes(self, limit: int) -> List[Dict[str, Any]]:
+        if not self.leases:
+            return self.source_repo.obtener_pendientes(limit=limit)
+        self.source_repo.liberar_leases_vencidos()
+        return self.source_repo.reclamar_pendientes(limit, self.worker_id, self.lease_seconds)
 
-        is_logged_in = False
+    def _opciones_unitario(self, parametros) -> Dict[str, Any]:
+        """Parámetros comunes que pasamos downstream a cada ProcesoUnitarioWF."""
+        return {
+            "reintentos_login": parametros.reintentos_login,
+            "reintentos_proceso": parametros.reintentos_proceso,
+            "timeout_bajo": parametros.delay_bajo,
+            "timeout_medio": parametros.delay_medio,
+            "timeout_largo": parametros.delay_alto,
+            "url_runt": parametros.url_runt,
+            "usuario_runt": parametros.usuario_runt,
+            "password_runt": parametros.password_runt,
+            "escritura_unica": parametros.escritura_unica,
+            "runt_api": self._cliente_runt_api(parametros.motor_consulta, parametros.url_runt),
+        }
 
-        for record in pendientes:
-            corr_id = str(uuid.uuid4())
-            record_id = record.get("Id")
+    def _procesar_pendientes(
+        self,
+        pendientes: List[Dict[str, Any]],
+        parametros,
+        repo_estados,
+        lote: Dict[str, Any],
+        detener: Optional[threading.Event],
+    ) -> None:
+        opciones = self._opciones_unitario(parametros)
+        is_logged_in = self.sesion_activa
+        try:
+            for idx, record in enumerate(pendientes):
+                if self._debe_detenerse(pendientes, idx, detener):
+                    break
 
-            if not record_id:
-                logger.warning(f"Registro sin 'Id' válido: {record}")
-                continue
+                record_id = record.get("Id")
+                if not record_id:
+                    logger.warning(f"Registro sin 'Id' válido: {record}")
+                    continue
 
-            try:
-                # Ejecutar flujo unitario
-                wf_unit = ProcesoUnitarioWF(
-                    record=record,
-                    nocodb_client=self.nocodb_client,
-                    web_client=self.web_client,
-                    correlation_id=corr_id,
-                    notifier=self.notifier,
-                    session_active=is_logged_in,
-                    reintentos_login=reintentos_login,
-                    reintentos_proceso=reintentos_proceso,
-                    timeout_bajo=timeout_bajo,
-                    timeout_medio=timeout_medio,
-                    timeout_largo=timeout_largo,
-                    url_runt=url_runt,
-                    usuario_runt=usuario_runt,
-                    password_runt=password_runt,
+                if self.leases and not self.source_repo.renovar_lease(
+                    record, self.worker_id, self.lease_seconds
+                ):
+                    # Otro worker tomó el registro tras vencer nuestro lease
+                    continue
+
+                if self._reanudar_desde_journal(record, repo_estados, lote):
+                    continue
+
+                is_logged_in = self._procesar_registro(
+                    record, opciones, repo_estados, lote, is_logged_in
                 )
-                resultado = wf_unit.ejecutar()
-
-                # ACTUALIZAR EL ESTADO DE LA SESIÓN:
-                # Si el primer registro fue exitoso, el login fue exitoso.
-                if not is_logged_in and resultado.get("status") == "exitoso":
-                    is_logged_in = True
-                    logger.info(
-                        "Login exitoso en el primer registro, se activó la bandera para el resto del lote."
-                    )
-                # Si el primer registro falló el login, el estado 'is_logged_in' seguirá siendo False,
-                # forzando el login en el siguiente registro.
-                if resultado.get("status") == "login_failed":
+
+                if self.driver_manager is not None and self.driver_manager.registrar_registro():
                     is_logged_in = False
-                    logger.warning(
-                        "Fallo de login. La bandera de sesión activa se restableció."
-                    )
-
-                # Solo marcar como exitoso si el status es "exitoso"
-                if resultado.get("status") == "exitoso":
-                    ok_count += 1
-                    if resultado.get("pdf"):
-                        all_pdfs.append(resultado["pdf"])
-                else:
-                    # El workflow unitario ya marcó el estado apropiado (login_failed, no_encontrado, error)
-                    error_count += 1
-
-                results.append(resultado)
-            except Exception as e:
-                logger.exception(f"Error procesando registro {record_id}: {e}")
-                error_count += 1
-                screenshot = self.web_client.screenshot_save(f"./data/capturas/error_{record_id}.png")
-                self.notifier.send_failure_unexpected(
-                    record_id=str(record_id), error=str(e), last_screenshot=screenshot
-                )
-                try:
-                    self.source_repo.marcar_fallido(record, str(e))
-                except Exception as e2:
-                    logger.warning(f"No se pudo actualizar estado de error en NocoDB: {e2}")
-                results.append({"id": record_id, "error": str(e)})
+        finally:
+            self.sesion_activa = is_logged_in
+
+    def _debe_detenerse(
+        self, pendientes: List[Dict[str, Any]], idx: int, detener: Optional[threading.Event]
+    ) -> bool:
+        if detener is not None and detener.is_set():
+            logger.warning(
+                "Detención solicitada; %d registros sin despachar", len(pendientes) - idx
+            )
+            if self.leases:
+                self.source_repo.devolver_a_cola(pendientes[idx:])
+            return True
+
+        if not self.nocodb_client.disponible():
+            # NocoDB caído: no tiene sentido seguir consumiendo navegador
+            logger.error(
+                "Circuito NocoDB abierto; se detiene el lote con %d registros sin despachar",
+                len(pendientes) - idx,
+            )
+            return True
+        return False
+
+    def _reanudar_desde_journal(
+        self, record: Dict[str, Any], repo_estados, lote: Dict[str, Any]
+    ) -> bool:
+        """True si el registro ya terminó antes de una caída (solo se refleja su estado)."""
+        record_id = record.get("Id")
+        completado = self.journal.registro_completado(record_id) if self.journal else None
+        if not completado:
+            return False
+        # Terminado antes de una caída: solo falta reflejar el estado en Insumo
+        logger.info("Registro %s ya completado según el journal; se reanuda", record_id)
+        repo_estados.marcar_exitoso(record)
+        lote["ok"] += 1
+        if completado.get("pdf_path"):
+            lote["pdfs"].append(completado["pdf_path"])
+        lote["resultados"].append({
+            "id": record_id,
+            "status": "exitoso",
+            "pdf": completado.get("pdf_path"),
+            "reanudado": True,
+        })
+        return True
+
+    def _tomar_driver(self, is_logged_in: bool) -> bool:
+        """Toma el driver del gestor; retorna la sesión vigente (False si cambió)."""
+        if self.driver_manager is None:
+            return is_logged_in
+        web_client = self.driver_manager.obtener()
+        if web_client is not self.web_client:
+            # Driver nuevo (primer uso, reciclado o reemplazado): sin sesión RUNT
+            self.web_client = web_client
+            return False
+        return is_logged_in
+
+    def _procesar_registro(
+        self,
+        record: Dict[str, Any],
+        opciones: Dict[str, Any],
+        repo_estados,
+        lote: Dict[str, Any],
+        is_logged_in: bool,
+    ) -> bool:
+        """Ejecuta el flujo unitario de un registro. Retorna el estado de sesión."""
+        record_id = record.get("Id")
+        try:
+            # Dentro del try: si no hay navegador, solo falla este registro
+            is_logged_in = self._tomar_driver(is_logged_in)
+            # Ejecutar flujo unitario
+            wf_unit = ProcesoUnitarioWF(
+                record=record,
+                nocodb_client=self.nocodb_client,
+                web_client=self.web_client,
+                correlation_id=str(uuid.uuid4()),
+                notifier=self.notifier,
+                session_active=is_logged_in,
+                async_client=self.async_client,
+                source_repo=repo_estados,
+                journal=self.journal,
+                **opciones,
+            )
+            resultado = wf_unit.ejecutar()
+        except Exception as e:
+            logger.exception(f"Error procesando registro {record_id}: {e}")
+            lote["errores"] += 1
+            screenshot = self._captura_error(record_id)
+            self.notifier.send_failure_unexpected(
+                record_id=str(record_id), error=str(e), last_screenshot=screenshot
+            )
+            try:
+                repo_estados.marcar_fallido(record, str(e))
+            except Exception as e2:
+                logger.warning(f"No se pudo actualizar estado de error en NocoDB: {e2}")
+            lote["resultados"].append({"id": record_id, "error": str(e)})
+            return is_logged_in
+
+        # ACTUALIZAR EL ESTADO DE LA SESIÓN:
+        # Si el primer registro fue exitoso, el login fue exitoso.
+        if not is_logged_in and resultado.get("status") == "exitoso":
+            is_logged_in = True
+            logger.info(
+                "Login exitoso en el primer registro, se activó la bandera para el resto del lote."
+            )
+        # Si el primer registro falló el login, el estado 'is_logged_in' seguirá siendo False,
+        # forzando el login en el siguiente registro.
+        if resultado.get("status") == "login_failed":
+            is_logged_in = self.sesion_activa
+            logger.warning(
+                "Fallo de login. La bandera de sesión activa se restableció."
+            )
+
+        # Solo marcar como exitoso si el status es "exitoso"
+        if resultado.get("status") == "exitoso":
+            lote["ok"] += 1
+            if resultado.get("pdf"):
+                lote["pdfs"].append(resultado["pdf"])
+        else:
+            # El workflow unitario ya marcó el estado apropiado (login_failed, no_encontrado, error)
+            lote["errores"] += 1
+
+        lote["resultados"].append(resultado)
+        return is_logged_in
 
-        logger.info(f"Lote completado. OK={ok_count}, ERROR={error_count}")
+    def _captura_error(self, record_id) -> Optional[str]:
+        """Captura de pantalla del error, si todavía hay navegador utilizable."""
+        if self.web_client is None:
+            return None
+        try:
+            return self.web_client.screenshot_save(f"./data/capturas/error_{record_id}.png")
+        except Exception as e:
+            logger.warning("No se pudo capturar la pantalla del error: %s", e)
+            return None
+
+    def _cerrar_lote(self, repo_estados, write_behind, lote: Dict[str, Any]) -> None:
+        # Asegurar que los estados enviados en segundo plano quedaron en NocoDB
+        repo_estados.esperar_escrituras()
+        if write_behind:
+            write_behind.cerrar()
+        if self.journal is not None:
+            self.journal.reproducir(self.nocodb_client)
+        logger.info(f"Lote completado. OK={lote['ok']}, ERROR={lote['errores']}")
 
         # Determinar la ruta base de los PDFs
         pdf_base_path = None
-        if all_pdfs:
+        if lote["pdfs"]:
             # Extrae la ruta del directorio del primer PDF generado.
-            pdf_base_path = os.path.dirname(all_pdfs[0])
+            pdf_base_path = os.path.dirname(lote["pdfs"][0])
 
         self.notifier.send_end_notification(
-            exitosos=ok_count,
-            errores=error_count,
-            adjuntos=all_pdfs,  # Enviamos la lista de PDFs generados
+            exitosos=lote["ok"],
+            errores=lote["errores"],
+            adjuntos=lote["pdfs"],  # Enviamos la lista de PDFs generados
             pdf_base_path=pdf_base_path,
         )
-        return {
-            "procesados": ok_count,
-            "errores": error_count,
-            "mensaje": "Ejecución completada correctamente",
-            "detalles": results,
-            "pdfs_generados": all_pdfs,
-        }
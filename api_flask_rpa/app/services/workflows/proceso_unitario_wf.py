@@ -1,6 +1,10 @@
 from app.infrastructure.web_client import WebClient
 from app.infrastructure.nocodb_client import NocoDBClient
+from app.infrastructure.nocodb_async_client import AsyncNocoDBClient
+from app.infrastructure.journal_local import JournalLocal
+from app.infrastructure.runt_api_client import RuntApiClient
 from app.services.scraping_service import ScrapingService
+from app.services.api_scraping_service import ApiScrapingService
 from app.services.capture_service import CaptureService
 from app.services.pdf_service import PDFService
 from app.repositories.nocodb_target_repository import NocoDbTargetRepository
@@ -8,9 +12,11 @@ from app.repositories.nocodb_source_repository import NocoDbSourceRepository
 from app.utils.logging_utils import get_logger
 from app.utils.limpiar_nit import limpiar_nit_sin_dv
 from app.services.notification_service import NotificationService
+import os
 import time
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from typing import Any, Dict, List, Optional
 
 logger = get_logger("proceso_unitario_wf")
 
@@ -38,6 +44,11 @@ class ProcesoUnitarioWF:
         url_runt: str = "",
         usuario_runt: str = "",          # 💡 Nuevo: Aceptar credenciales
         password_runt: str = "",
+        escritura_unica: bool = False,
+        async_client: Optional[AsyncNocoDBClient] = None,
+        source_repo: Optional[NocoDbSourceRepository] = None,
+        journal: Optional[JournalLocal] = None,
+        runt_api: Optional[RuntApiClient] = None,
     ):
         self.record = record
         self.nocodb_client = nocodb_client
@@ -51,8 +62,12 @@ class ProcesoUnitarioWF:
         self.password_runt = password_runt
 
         # repos/services
-        self.source_repo = NocoDbSourceRepository(self.nocodb_client)
-        self.target_repo = NocoDbTargetRepository(self.nocodb_client)
+        self.source_repo = source_repo or NocoDbSourceRepository(
+            self.nocodb_client, async_client, journal=journal
+        )
+        self.target_repo = NocoDbTargetRepository(self.nocodb_client, async_client, journal=journal)
+        # Journal local opcional: progreso por placa para reanudar tras caídas
+        self.journal = journal
 
         # selectors: carga desde archivo YAML si lo necesitas;
         self.scraper = ScrapingService(
@@ -64,6 +79,9 @@ class ProcesoUnitarioWF:
             usuario_runt=self.usuario_runt,
             password_runt=self.password_runt,
         )
+        if runt_api is not None:
+            # Motor "api": mismo contrato; Selenium solo para login y respaldo
+            self.scraper = ApiScrapingService(self.scraper, runt_api)
         self.capture = CaptureService()
         self.pdf = PDFService()
         # self.email_client = EmailClient()
@@ -75,6 +93,8 @@ class ProcesoUnitarioWF:
         self.timeout_bajo = timeout_bajo
         self.timeout_medio = timeout_medio
         self.timeout_largo = timeout_largo
+        # True: detalles en buffer y una sola escritura con RutaPDF ya calculada
+        self.escritura_unica = escritura_unica
 
     def _attempt_login(self, user, password) -> bool:
         ultimo_error = None
@@ -94,6 +114,84 @@ class ProcesoUnitarioWF:
         logger.error("Login falló tras %d intentos: %s", self.reintentos_login, ultimo_error)
         return False
 
+    def _detalle_placa(self, record_id, placa: str) -> Dict[str, Any]:
+        """
+        Detalle de la placa: del journal si ya se extrajo hoy (lote reanudado
+        o reintento), si no desde RUNT.
+        """
+        previo = self.journal.placa_completada(record_id, placa) if self.journal else None
+        if previo and previo["png_path"] and os.path.exists(previo["png_path"]):
+            logger.info(f"Placa {placa} recuperada del journal local")
+            return previo
+        inicio_placa = now_co_str()
+        detalle, png = self.scraper.abrir_ficha_y_extraer(placa)
+        fin_placa = now_co_str()
+        saved = self.capture.save_screenshot_bytes(png, self.correlation_id, placa)
+        if self.journal:
+            self.journal.registrar_placa(
+                record_id, placa, detalle, saved, inicio_placa, fin_placa
+            )
+        return {
+            "detalle": detalle,
+            "png_path": saved,
+            "fecha_inicio": inicio_placa,
+            "fecha_fin": fin_placa,
+            "persistido": False,
+        }
+
+    def _procesar_placa(self, record_id, placa: str, detalles_pendientes: List[Dict]) -> str:
+        """
+        Extrae la placa y la persiste (o la deja en ``detalles_pendientes`` en
+        modo escritura única). Retorna la ruta de su captura.
+        """
+        info = self._detalle_placa(record_id, placa)
+        if info["persistido"]:
+            return info["png_path"]
+        if self.escritura_unica:
+            detalles_pendientes.append({
+                "detalle": info["detalle"],
+                "fecha_inicio": info["fecha_inicio"],
+                "fecha_fin": info["fecha_fin"],
+            })
+        else:
+            self.target_repo.upsert_vehicle_detail(
+                self.record,
+                vehicle_details=info["detalle"],
+                ruta_pdf=None,
+                fecha_inicio=info["fecha_inicio"],
+                fecha_fin=info["fecha_fin"]
+            )
+            if self.journal:
+                self.journal.marcar_placas_persistidas(record_id, [placa])
+        return info["png_path"]
+
+    def _cerrar_registro(
+        self, record_id, numero: str, image_paths: List[str], detalles_pendientes: List[Dict]
+    ) -> str:
+        """Genera el PDF, guarda los detalles pendientes y marca el registro exitoso."""
+        if self.escritura_unica:
+            # La RutaPDF se conoce de antemano; PDF primero: si falla, el
+            # reintento no duplica los detalles
+            ruta_pdf = self.pdf.build_pdf_path(numero)
+            pdf_path = self.pdf.consolidate_images_to_pdf(
+                image_paths, numero, out_pdf=ruta_pdf
+            )
+            self.target_repo.upsert_vehicle_details_batch(
+                self.record,
+                detalles_pendientes,
+                ruta_pdf=ruta_pdf.replace("\\", "/"),
+            )
+            if self.journal:
+                self.journal.marcar_placas_persistidas(record_id)
+            self.source_repo.marcar_exitoso(self.record)
+        else:
+            pdf_path = self.pdf.consolidate_images_to_pdf(image_paths, numero)
+            self.source_repo.marcar_exitoso(self.record)
+            self.target_repo.update_ruta_pdf_by_proceso(self.record, pdf_path)
+        if self.journal:
+            self.journal.registrar_registro(record_id, "exitoso", pdf_path)
+        return pdf_path
+
     def ejecutar(self):
         record_id = (
             self.record.get("Id") or self.record.get("ID") or self.record.get("id")
@@ -202,33 +300,22 @@ class ProcesoUnitarioWF:
                             "pdf": pdf_path,
                         }
 
+                    # En modo escritura única los detalles se guardan juntos
+                    # al final del registro.
+                    detalles_pendientes = []
+
                     # Por cada placa, medir inicio/fin en hora Colombia
                     for placa in placas:
-                        inicio_placa = now_co_str()
-                        detalle, png = self.scraper.abrir_ficha_y_extraer(placa)
-                        fin_placa = now_co_str()
-
-                        self.target_repo.upsert_vehicle_detail(
-                            self.record,
-                            vehicle_details=detalle,
-                            ruta_pdf=None,
-                            fecha_inicio=inicio_placa,
-                            fecha_fin=fin_placa
-                        )
-
-                        saved = self.capture.save_screenshot_bytes(
-                            png, self.correlation_id, placa
-                        )
+                        saved = self._procesar_placa(record_id, placa, detalles_pendientes)
                         image_paths.append(saved)
 
                     logger.info(
                         "Finalizo el guardado , se procede a devolucion a home de RUNT PRO"
                     )
                     self.scraper.volver_a_inicio()
-                    pdf_path = self.pdf.consolidate_images_to_pdf(image_paths, numero)
-                    self.source_repo.marcar_exitoso(self.record)
-                    self.target_repo.update_ruta_pdf_by_proceso(self.record, pdf_path)
-
+                    pdf_path = self._cerrar_registro(
+                        record_id, numero, image_paths, detalles_pendientes
+                    )
                     return {"id": record_id, "status": "exitoso", "pdf": pdf_path}
 
                 except Exception as e:
@@ -0,0 +1,41 @@
+"""
+Fixtures comunes: variables mínimas para importar config sin .env, un
+NocoDB falso en memoria (benchmarks/fake_nocodb.py) y un journal temporal.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("LOG_PATH", tempfile.mkdtemp(prefix="test_logs_"))
+os.environ.setdefault("NOCO_INSUMO_TABLE", "insumo")
+os.environ.setdefault("NOCO_BASE_TRABAJO_TABLE", "base_trabajo")
+# gestion_bp crea su cliente NocoDB al importarse; nunca se usa en las pruebas
+os.environ.setdefault("NOCODB_URL", "http://127.0.0.1:9")
+os.environ.setdefault("NOCO_XC_TOKEN", "token")
+
+import pytest  # noqa: E402
+
+from benchmarks.fake_nocodb import FakeNocoDB  # noqa: E402
+from app.infrastructure.journal_local import JournalLocal  # noqa: E402
+from app.infrastructure.nocodb_client import NocoDBClient  # noqa: E402
+
+
+@pytest.fixture
+def fake_nocodb():
+    fake = FakeNocoDB().start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def nocodb_client(fake_nocodb):
+    # Sin reintentos: cada fallo inyectado se ve en la primera respuesta
+    client = NocoDBClient(fake_nocodb.url, "token", max_retries=0)
+    yield client
+    client.session.close()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    j = JournalLocal(str(tmp_path / "journal.db"))
+    yield j
+    j.close()
@@ -0,0 +1,129 @@
+import pytest
+
+from config import settings
+from benchmarks.fake_runt_api import FakeRuntApi
+from app.infrastructure.runt_api_client import RuntApiClient
+from app.services.api_scraping_service import ApiScrapingService
+from app.services.scraping_service import ScrapingService
+from app.services.workflows.proceso_consulta_wf import ProcesoConsultaWF
+
+NOMBRE = "Pérez Gómez Juan Carlos"
+
+
+class _DriverConSesion:
+    """Lo mínimo que lee RuntApiClient de un WebDriver con sesión RUNT."""
+    def __init__(self, fake: FakeRuntApi):
+        self.fake = fake
+
+    def get_cookies(self):
+        return []
+
+    def execute_script(self, script, *args):
+        return self.fake.token
+
+
+class _WebClientFalso:
+    def __init__(self, fake: FakeRuntApi):
+        self.driver = _DriverConSesion(fake)
+
+
+class _SeleniumFalso(ScrapingService):
+    """Login sin navegador; las consultas por Selenium solo se registran."""
+    def __init__(self, web_client):
+        super().__init__(web_client=web_client)
+        self.logins = 0
+        self.llamadas = []
+
+    def login(self) -> bool:
+        self.logins += 1
+        return True
+
+    def consultar_por_propietario(self, tipo_doc, numero_doc, nombre):
+        self.llamadas.append(("consulta", numero_doc))
+        return (["ABC123"], b"png-selenium")
+
+    def abrir_ficha_y_extraer(self, placa):
+        self.llamadas.append(("ficha", placa))
+        return ({"Placa": placa, "origen": "selenium"}, b"png-selenium")
+
+
+@pytest.fixture
+def fake_runt():
+    fake = FakeRuntApi().start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def motor(fake_runt):
+    selenium = _SeleniumFalso(_WebClientFalso(fake_runt))
+    api = RuntApiClient(fake_runt.url)
+    motor = ApiScrapingService(selenium, api)
+    assert motor.login()
+    yield motor
+    api.close()
+
+
+def test_consulta_y_ficha_por_api(motor, fake_runt):
+    # La fixture está indexada por el tipo homologado ("Cédula Ciudadanía")
+    placas, png = motor.consultar_por_propietario("CC", "1032456789", NOMBRE)
+    detalle, _ = motor.abrir_ficha_y_extraer("ABC123")
+
+    assert placas == ["ABC123", "XYZ98F"]
+    assert png.startswith(b"\x89PNG")
+    assert detalle["Placa"] == "ABC123" and detalle["marca"] == "CHEVROLET"
+    assert motor.selenium.llamadas == []
+
+
+def test_token_vencido_renueva_sesion(motor, fake_runt):
+    fake_runt.expirar_token()
+
+    placas, _ = motor.consultar_por_propietario("CC", "1032456789", NOMBRE)
+
+    assert placas == ["ABC123", "XYZ98F"]
+    assert motor.selenium.logins == 2
+    assert motor.selenium.llamadas == []
+
+
+def test_error_del_backend_en_consulta_usa_selenium(motor, fake_runt):
+    fake_runt.fallar(500)
+
+    placas, _ = motor.consultar_por_propietario("CC", "1032456789", NOMBRE)
+    detalle, _ = motor.abrir_ficha_y_extraer("ABC123")
+
+    assert placas == ["ABC123"]
+    assert detalle["origen"] == "selenium"
+    assert motor.selenium.llamadas == [("consulta", "1032456789"), ("ficha", "ABC123")]
+
+
+def test_error_del_backend_en_ficha_rehace_la_consulta_por_selenium(motor, fake_runt):
+    motor.consultar_por_propietario("CC", "1032456789", NOMBRE)
+    fake_runt.fallar(500)
+
+    detalle, _ = motor.abrir_ficha_y_extraer("ABC123")
+
+    assert detalle["origen"] == "selenium"
+    assert motor.selenium.llamadas == [("consulta", "1032456789"), ("ficha", "ABC123")]
+
+
+def test_respuesta_sin_nombre_no_acepta_placas_sin_validar(motor, fake_runt):
+    placas, _ = motor.consultar_por_propietario("CC", "79000111", "Cualquier Nombre")
+
+    assert motor.en_respaldo
+    assert motor.selenium.llamadas == [("consulta", "79000111")]
+    assert placas == ["ABC123"]  # lo que valida Selenium
+
+
+def test_nombre_distinto_no_retorna_placas(motor, fake_runt):
+    placas, _ = motor.consultar_por_propietario("CC", "1032456789", "Otra Persona")
+    assert placas == []
+
+
+def test_motor_api_apagado_por_defecto(monkeypatch):
+    wf = ProcesoConsultaWF.__new__(ProcesoConsultaWF)
+    wf.runt_api = None
+    monkeypatch.setattr(settings, "RUNT_API_ENABLED", None)
+    assert wf._cliente_runt_api("api", "http://runt.invalid") is None
+
+    monkeypatch.setattr(settings, "RUNT_API_ENABLED", "True")
+    assert isinstance(wf._cliente_runt_api("api", "http://runt.invalid"), RuntApiClient)
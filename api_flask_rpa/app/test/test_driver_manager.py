@@ -0,0 +1,83 @@
+import pytest
+
+from app.infrastructure.driver_manager import DriverManager
+
+
+class _Driver:
+    def __init__(self):
+        self.vivo = True
+
+    @property
+    def title(self):
+        if not self.vivo:
+            raise RuntimeError("sesión cerrada")
+        return "RUNT"
+
+
+class _WebClientFalso:
+    def __init__(self):
+        self.driver = _Driver()
+        self.cerrado = False
+
+    def close(self):
+        self.cerrado = True
+
+
+@pytest.fixture
+def creados():
+    return []
+
+
+@pytest.fixture
+def gestor(creados):
+    def fabrica():
+        web = _WebClientFalso()
+        creados.append(web)
+        return web
+
+    gestor = DriverManager("http://runt.invalid", max_registros=3, max_rss_mb=500, fabrica=fabrica)
+    yield gestor
+    gestor.cerrar()
+
+
+def test_recicla_tras_max_registros(gestor, creados):
+    primero = gestor.obtener()
+
+    assert not gestor.registrar_registro()
+    assert not gestor.registrar_registro()
+    assert gestor.registrar_registro()
+
+    assert primero.cerrado
+    segundo = gestor.obtener()
+    assert segundo is not primero and segundo is creados[1]
+    # El conteo empieza de nuevo con el driver nuevo
+    assert not gestor.registrar_registro()
+
+
+def test_recicla_al_superar_el_limite_de_rss(gestor, creados, monkeypatch):
+    primero = gestor.obtener()
+    monkeypatch.setattr(gestor, "rss_mb", lambda: 499.0)
+    assert not gestor.registrar_registro()
+
+    monkeypatch.setattr(gestor, "rss_mb", lambda: 650.0)
+    assert gestor.registrar_registro()
+
+    assert primero.cerrado
+    assert gestor.obtener() is not primero
+
+
+def test_driver_sin_respuesta_se_reemplaza(gestor, creados):
+    primero = gestor.obtener()
+    primero.driver.vivo = False
+
+    assert gestor.obtener() is not primero
+    assert primero.cerrado and len(creados) == 2
+
+
+def test_cerrar_cierra_tambien_el_prearrancado(gestor, creados):
+    gestor.obtener()
+    gestor.reciclar()
+
+    gestor.cerrar()
+
+    assert all(web.cerrado for web in creados)
@@ -0,0 +1,38 @@
+import pytest
+
+from config import settings
+from app.blueprints import gestion_bp
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch, nocodb_client):
+    reloj = _Reloj()
+    monkeypatch.setattr(gestion_bp.time, "monotonic", reloj)
+    monkeypatch.setattr(gestion_bp, "nocodb", nocodb_client)
+    monkeypatch.setattr(gestion_bp, "PENDIENTES_CACHE_SECONDS", 10)
+    monkeypatch.setitem(gestion_bp._pendientes_cache, "valor", None)
+    monkeypatch.setitem(gestion_bp._pendientes_cache, "leido_en", 0.0)
+    return reloj
+
+
+def test_conteo_de_pendientes_se_cachea_hasta_el_ttl(fake_nocodb, reloj):
+    fake_nocodb.seed(settings.NOCO_INSUMO_TABLE, [{"EstadoGestion": "Sin Procesar"}] * 2)
+    fake_nocodb.reset_counters()
+
+    assert gestion_bp._contar_pendientes_cache() == 2
+    fake_nocodb.seed(settings.NOCO_INSUMO_TABLE, [{"EstadoGestion": "Sin Procesar"}])
+    reloj.ahora += 9
+    assert gestion_bp._contar_pendientes_cache() == 2
+    assert fake_nocodb.requests["GET"] == 1
+
+    reloj.ahora += 1
+    assert gestion_bp._contar_pendientes_cache() == 3
+    assert fake_nocodb.requests["GET"] == 2
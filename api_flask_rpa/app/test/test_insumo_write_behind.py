@@ -0,0 +1,38 @@
+import pytest
+
+from app.repositories.insumo_write_behind import MAX_INTENTOS_RECHAZO, InsumoWriteBehind
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+
+
+@pytest.fixture
+def write_behind(nocodb_client, fake_nocodb, journal):
+    repo = NocoDbSourceRepository(nocodb_client, journal=journal)
+    fake_nocodb.seed(repo.table_insumo, [{"EstadoGestion": "Sin Procesar"}])
+    # Intervalo largo: los envíos de la prueba son los flush explícitos
+    wb = InsumoWriteBehind(repo, intervalo=3600)
+    yield wb
+    wb.cerrar()
+
+
+def test_estado_rechazado_se_descarta_tras_max_intentos(write_behind, fake_nocodb, journal):
+    fake_nocodb.rechazar(lambda r: True)
+    write_behind.marcar_exitoso({"Id": 1})
+
+    for _ in range(MAX_INTENTOS_RECHAZO - 1):
+        assert write_behind.flush() == 0
+    assert write_behind.flush() == 1
+
+    assert write_behind.flush() == 0
+    assert journal.escrituras_descartadas() == 1
+
+
+def test_fallo_transitorio_se_reintenta_sin_limite(write_behind, fake_nocodb, journal):
+    fake_nocodb.fallar("PATCH", 503, veces=MAX_INTENTOS_RECHAZO)
+    write_behind.marcar_exitoso({"Id": 1})
+
+    for _ in range(MAX_INTENTOS_RECHAZO):
+        assert write_behind.flush() == 0
+    assert write_behind.flush() == 1
+
+    assert fake_nocodb.tables[write_behind.table_insumo][0]["EstadoGestion"] == "Exitoso"
+    assert journal.escrituras_descartadas() == 0
@@ -0,0 +1,30 @@
+import threading
+
+from app.services.jobs_service import COMPLETADO, JobManager
+
+
+def test_segundo_lanzamiento_reutiliza_el_job_activo():
+    liberar = threading.Event()
+    ejecuciones = []
+
+    def tarea():
+        ejecuciones.append(1)
+        liberar.wait(5)
+        return {"procesados": 1}
+
+    jobs = JobManager(tarea)
+    primero, creado = jobs.lanzar(origen="poller")
+    segundo, creado_otra_vez = jobs.lanzar(origen="webhook")
+
+    assert creado and not creado_otra_vez
+    assert segundo is primero
+
+    liberar.set()
+    primero.esperar(5)
+    assert primero.estado == COMPLETADO
+    assert ejecuciones == [1]
+
+    # Terminado el anterior, un nuevo disparo sí crea otro job
+    tercero, creado = jobs.lanzar(origen="poller")
+    tercero.esperar(5)
+    assert creado and tercero is not primero
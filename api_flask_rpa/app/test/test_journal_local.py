@@ -0,0 +1,39 @@
+from app.infrastructure.journal_local import MAX_INTENTOS_SPOOL, OP_CREATE
+
+TABLA = "base_trabajo"
+
+
+def test_entrada_rechazada_no_bloquea_el_spool(journal, nocodb_client, fake_nocodb):
+    journal.encolar_escritura(TABLA, OP_CREATE, [{"Placa": "MALA01"}])
+    journal.encolar_escritura(TABLA, OP_CREATE, [{"Placa": "BUENA1"}])
+    fake_nocodb.rechazar(lambda r: r.get("Placa") == "MALA01")
+
+    assert journal.reproducir(nocodb_client) == 1
+
+    assert journal.escrituras_pendientes() == 0
+    assert journal.escrituras_descartadas() == 1
+    assert [r["Placa"] for r in fake_nocodb.tables[TABLA]] == ["BUENA1"]
+
+
+def test_fallo_transitorio_detiene_el_reenvio_en_orden(journal, nocodb_client, fake_nocodb):
+    journal.encolar_escritura(TABLA, OP_CREATE, [{"Placa": "PRIM01"}])
+    journal.encolar_escritura(TABLA, OP_CREATE, [{"Placa": "SEGU01"}])
+    fake_nocodb.fallar("POST", 503)
+
+    assert journal.reproducir(nocodb_client) == 0
+    assert journal.escrituras_pendientes() == 2
+    assert TABLA not in fake_nocodb.tables
+
+    assert journal.reproducir(nocodb_client) == 2
+    assert [r["Placa"] for r in fake_nocodb.tables[TABLA]] == ["PRIM01", "SEGU01"]
+
+
+def test_entrada_que_agota_intentos_pasa_a_descartadas(journal, nocodb_client, fake_nocodb):
+    journal.encolar_escritura(TABLA, OP_CREATE, [{"Placa": "LENTA1"}])
+    fake_nocodb.fallar("POST", 503, veces=MAX_INTENTOS_SPOOL)
+
+    for _ in range(MAX_INTENTOS_SPOOL):
+        assert journal.reproducir(nocodb_client) == 0
+
+    assert journal.escrituras_pendientes() == 0
+    assert journal.escrituras_descartadas() == 1
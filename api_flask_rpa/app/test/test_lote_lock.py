@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import pytest
+
+from config import settings
+from app.utils.lote_lock import LoteEnCursoError, candado_lote
+
+# Otro proceso intenta el mismo flock sin esperar: sale con 1 si está tomado
+INTENTO_EXTERNO = """
+import fcntl, sys
+with open(sys.argv[1], "a") as f:
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        sys.exit(1)
+"""
+
+
+@pytest.fixture
+def sin_leases(monkeypatch):
+    monkeypatch.setattr(settings, "LEASE_ENABLED", None)
+
+
+def _otro_proceso_puede_tomarlo(ruta) -> bool:
+    return subprocess.run([sys.executable, "-c", INTENTO_EXTERNO, str(ruta)]).returncode == 0
+
+
+def test_lote_excluye_a_otros_procesos(tmp_path, sin_leases):
+    ruta = tmp_path / "lote.lock"
+
+    with candado_lote(str(ruta)):
+        assert not _otro_proceso_puede_tomarlo(ruta)
+        with pytest.raises(LoteEnCursoError):
+            with candado_lote(str(ruta)):
+                pass
+
+    assert _otro_proceso_puede_tomarlo(ruta)
+
+
+def test_con_leases_no_se_toma_el_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LEASE_ENABLED", "True")
+    ruta = tmp_path / "lote.lock"
+
+    with candado_lote(str(ruta)):
+        with candado_lote(str(ruta)):
+            assert _otro_proceso_puede_tomarlo(ruta)
@@ -0,0 +1,70 @@
+import pytest
+
+from app.infrastructure.nocodb_client import NocoDBBulkError
+
+TABLA = "vehiculos"
+
+
+@pytest.fixture
+def tabla(fake_nocodb):
+    fake_nocodb.seed(TABLA, [{"Placa": f"AAA{i:03d}"} for i in range(5)])
+    fake_nocodb.reset_counters()
+    return TABLA
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_records_recorre_todas_las_paginas(nocodb_client, fake_nocodb, tabla, prefetch):
+    filas = list(nocodb_client.iter_records(tabla, page_size=2, prefetch=prefetch))
+
+    assert [f["Placa"] for f in filas] == [f"AAA{i:03d}" for i in range(5)]
+    assert fake_nocodb.requests["GET"] == 3
+
+
+def test_iter_records_se_detiene_en_is_last_page(nocodb_client, fake_nocodb, tabla):
+    fake_nocodb.seed(tabla, [{"Placa": "AAA005"}])
+    fake_nocodb.reset_counters()
+
+    filas = list(nocodb_client.iter_records(tabla, page_size=3, prefetch=True))
+
+    assert len(filas) == 6
+    # La segunda página ya trae isLastPage: no se pide una tercera vacía
+    assert fake_nocodb.requests["GET"] == 2
+
+
+def test_iter_records_es_perezoso(nocodb_client, fake_nocodb, tabla):
+    filas = nocodb_client.iter_records(tabla, page_size=2)
+
+    assert next(filas)["Placa"] == "AAA000"
+    assert fake_nocodb.requests["GET"] == 1
+
+
+def test_create_records_bulk_envia_por_chunks(nocodb_client, fake_nocodb):
+    registros = [{"Placa": f"BBB{i:03d}"} for i in range(5)]
+
+    respuestas = nocodb_client.create_records_bulk(TABLA, registros, chunk_size=2)
+
+    assert fake_nocodb.requests["POST"] == 3
+    assert len(respuestas) == 5
+    assert [r["Placa"] for r in fake_nocodb.tables[TABLA]] == [r["Placa"] for r in registros]
+
+
+def test_create_records_bulk_reporta_solo_los_chunks_fallidos(nocodb_client, fake_nocodb):
+    registros = [{"Placa": f"BBB{i:03d}"} for i in range(5)]
+    fake_nocodb.rechazar(lambda r: r["Placa"] == "BBB003")
+
+    with pytest.raises(NocoDBBulkError) as error:
+        nocodb_client.create_records_bulk(TABLA, registros, chunk_size=2)
+
+    # El chunk rechazado no impide enviar el siguiente
+    assert [r["Placa"] for r in fake_nocodb.tables[TABLA]] == ["BBB000", "BBB001", "BBB004"]
+    assert error.value.registros(transitorios=False) == registros[2:4]
+    assert len(error.value.responses) == 3
+
+
+def test_count_records_cuenta_sin_descargar_filas(nocodb_client, fake_nocodb, tabla):
+    fake_nocodb.seed(tabla, [{"Placa": "ZZZ999", "Estado": "baja"}])
+    fake_nocodb.reset_counters()
+
+    assert nocodb_client.count_records(tabla) == 6
+    assert nocodb_client.count_records(tabla, where="Estado,eq,baja") == 1
+    assert fake_nocodb.requests["GET"] == 2
@@ -0,0 +1,113 @@
+from app.infrastructure.journal_local import OP_CREATE
+from app.repositories import nocodb_source_repository
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+
+
+def _sembrar_insumo(fake, repo):
+    fake.seed(repo.table_insumo, [
+        {"EstadoGestion": "Sin Procesar", "NombrePropietario": "A"},
+        {"EstadoGestion": "Sin Procesar", "NombrePropietario": "B"},
+        # Terminado en un lote anterior: conserva el WorkerId
+        {"EstadoGestion": "Exitoso", "NombrePropietario": "C", "WorkerId": "w1"},
+    ])
+
+
+def test_relectura_del_reclamo_solo_trae_filas_procesando(
+    nocodb_client, fake_nocodb, monkeypatch
+):
+    repo = NocoDbSourceRepository(nocodb_client)
+    _sembrar_insumo(fake_nocodb, repo)
+    releidas = []
+    iter_records = nocodb_client.iter_records
+
+    def espiar(*args, **kwargs):
+        for fila in iter_records(*args, **kwargs):
+            releidas.append(str(fila["Id"]))
+            yield fila
+
+    monkeypatch.setattr(nocodb_client, "iter_records", espiar)
+
+    reclamados = repo.reclamar_pendientes(10, "w1", espera_verificacion=0)
+
+    assert [r["NombrePropietario"] for r in reclamados] == ["A", "B"]
+    assert sorted(releidas) == sorted(str(r["Id"]) for r in reclamados)
+
+
+def test_reclamo_descarta_registros_ganados_por_otro_worker(
+    nocodb_client, fake_nocodb, monkeypatch
+):
+    repo = NocoDbSourceRepository(nocodb_client)
+    _sembrar_insumo(fake_nocodb, repo)
+
+    def otro_worker_escribe(_segundos):
+        fake_nocodb.tables[repo.table_insumo][1]["WorkerId"] = "w2"
+
+    monkeypatch.setattr(nocodb_source_repository.time, "sleep", otro_worker_escribe)
+
+    reclamados = repo.reclamar_pendientes(10, "w1")
+
+    assert [r["NombrePropietario"] for r in reclamados] == ["A"]
+
+
+def test_spool_de_otra_tabla_no_desvia_estados(nocodb_client, fake_nocodb, journal):
+    repo = NocoDbSourceRepository(nocodb_client, journal=journal)
+    _sembrar_insumo(fake_nocodb, repo)
+    journal.encolar_escritura("base_trabajo", OP_CREATE, [{"Placa": "ABC123"}])
+
+    repo.marcar_exitoso({"Id": 1})
+
+    assert fake_nocodb.tables[repo.table_insumo][0]["EstadoGestion"] == "Exitoso"
+    assert journal.escrituras_pendientes() == 1
+
+
+def test_estado_pendiente_del_mismo_id_conserva_el_orden(nocodb_client, fake_nocodb, journal):
+    repo = NocoDbSourceRepository(nocodb_client, journal=journal)
+    _sembrar_insumo(fake_nocodb, repo)
+    fake_nocodb.fallar("PATCH", 503)
+    repo.marcar_en_proceso({"Id": 1})
+
+    repo.marcar_exitoso({"Id": 1})
+
+    assert fake_nocodb.tables[repo.table_insumo][0]["EstadoGestion"] == "Sin Procesar"
+    assert journal.escrituras_pendientes(repo.table_insumo, "1") == 1
+    assert journal.reproducir(nocodb_client) == 1
+    assert fake_nocodb.tables[repo.table_insumo][0]["EstadoGestion"] == "Exitoso"
+
+
+def test_solo_se_liberan_leases_vencidos(nocodb_client, fake_nocodb):
+    repo = NocoDbSourceRepository(nocodb_client)
+    fake_nocodb.seed(repo.table_insumo, [
+        {"EstadoGestion": "Procesando", "LeaseExpira": "2000-01-01T00:00:00+00:00"},
+        {"EstadoGestion": "Procesando", "LeaseExpira": "2999-01-01T00:00:00+00:00"},
+        # Sin lease: lote sin leases en curso o registro heredado
+        {"EstadoGestion": "Procesando", "LeaseExpira": None},
+    ])
+
+    assert repo.liberar_leases_vencidos() == 1
+    assert [r["EstadoGestion"] for r in fake_nocodb.tables[repo.table_insumo]] == [
+        "Sin Procesar", "Procesando", "Procesando",
+    ]
+
+    assert repo.liberar_procesando_sin_lease() == 1
+    assert [r["EstadoGestion"] for r in fake_nocodb.tables[repo.table_insumo]] == [
+        "Sin Procesar", "Procesando", "Sin Procesar",
+    ]
+
+
+def test_lectura_delta_sin_cambios_no_retorna_nada(nocodb_client, fake_nocodb):
+    repo = NocoDbSourceRepository(nocodb_client)
+    fake_nocodb.seed(repo.table_insumo, [
+        {"EstadoGestion": "Exitoso", "UpdatedAt": "2024-05-01 10:00:00"},
+        {"EstadoGestion": "Sin Procesar", "UpdatedAt": "2024-05-01 10:00:05"},
+    ])
+
+    pendientes, marca = repo.cambios_desde(None)
+    assert (pendientes, marca) == (1, "2024-05-01 10:00:05")
+
+    # La fila de la marca no se vuelve a contar
+    assert repo.cambios_desde(marca) == (0, marca)
+
+    fake_nocodb.seed(repo.table_insumo, [
+        {"EstadoGestion": "Sin Procesar", "UpdatedAt": "2024-05-01 10:01:00"},
+    ])
+    assert repo.cambios_desde(marca) == (1, "2024-05-01 10:01:00")
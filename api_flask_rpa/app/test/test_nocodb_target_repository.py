@@ -0,0 +1,46 @@
+import pytest
+
+from config import settings
+from app.infrastructure.nocodb_client import NocoDBBulkError
+from app.repositories.nocodb_target_repository import NocoDbTargetRepository
+
+REGISTRO = {"Id": 7, "NumeroIdentificacion": "1032456789", "NombrePropietario": "Juan Pérez"}
+DETALLE = {"Placa": "ABC123", "marca": "MAZDA", "modelo": "2020"}
+
+
+def test_rechazo_4xx_no_va_al_spool(nocodb_client, fake_nocodb, journal):
+    repo = NocoDbTargetRepository(nocodb_client, journal=journal)
+    fake_nocodb.rechazar(lambda r: r.get("Placa") == "ABC123")
+
+    with pytest.raises(NocoDBBulkError):
+        repo.upsert_vehicle_detail(REGISTRO, DETALLE)
+
+    assert journal.escrituras_pendientes() == 0
+
+
+def test_fallo_transitorio_va_al_spool(nocodb_client, fake_nocodb, journal):
+    repo = NocoDbTargetRepository(nocodb_client, journal=journal)
+    fake_nocodb.fallar("POST", 503)
+
+    assert repo.upsert_vehicle_detail(REGISTRO, DETALLE) == []
+
+    assert journal.escrituras_pendientes() == 1
+    assert journal.reproducir(nocodb_client) == 1
+    assert len(fake_nocodb.tables[repo.table]) == len(DETALLE)
+
+
+def test_hash_no_se_cachea_si_falla_la_escritura(nocodb_client, fake_nocodb, monkeypatch):
+    monkeypatch.setattr(settings, "DETALLE_SOLO_CAMBIOS", "True")
+    repo = NocoDbTargetRepository(nocodb_client)
+    fake_nocodb.fallar("POST", 503)
+
+    with pytest.raises(NocoDBBulkError):
+        repo.upsert_vehicle_detail(REGISTRO, DETALLE)
+
+    # La ficha no llegó a NocoDB: el reintento la escribe completa (campos + hash)
+    repo.upsert_vehicle_detail(REGISTRO, DETALLE)
+    assert len(fake_nocodb.tables[repo.table]) == len(DETALLE) + 1
+
+    # Ya escrita, la misma ficha solo deja la marca "sin cambios"
+    repo.upsert_vehicle_detail(REGISTRO, DETALLE)
+    assert len(fake_nocodb.tables[repo.table]) == len(DETALLE) + 2
@@ -0,0 +1,80 @@
+import pytest
+import requests
+
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+from app.services import parametros_service
+from app.services.parametros_service import ParametrosService
+
+TABLA = "parametros"
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(parametros_service.time, "monotonic", reloj)
+    return reloj
+
+
+@pytest.fixture
+def servicio(nocodb_client, fake_nocodb):
+    repo = NocoDbSourceRepository(nocodb_client)
+    repo.table_parametros = TABLA
+    fake_nocodb.seed(TABLA, [
+        {"Nombre": "LimitePendientes", "Valor": "20"},
+        {"Nombre": "MotorConsulta", "Valor": "Selenium"},
+    ])
+    fake_nocodb.reset_counters()
+    return ParametrosService(repo, ttl=60)
+
+
+def _cambiar(fake, nombre, valor):
+    fila = next(f for f in fake.tables[TABLA] if f["Nombre"] == nombre)
+    fila["Valor"] = valor
+
+
+def test_cache_se_respeta_hasta_vencer_el_ttl(servicio, fake_nocodb, reloj):
+    primero = servicio.obtener()
+    reloj.ahora += 59
+    assert servicio.obtener() is primero
+    assert fake_nocodb.requests["GET"] == 1
+
+    reloj.ahora += 1
+    # Vencido el TTL se relee; sin cambios se conserva la misma instancia
+    assert servicio.obtener() is primero
+    assert fake_nocodb.requests["GET"] == 2
+    assert primero.limite_pendientes == 20 and primero.motor_consulta == "selenium"
+
+
+def test_cambio_de_valores_genera_nueva_version(servicio, fake_nocodb, reloj):
+    primero = servicio.obtener()
+    _cambiar(fake_nocodb, "LimitePendientes", "35")
+
+    assert servicio.obtener() is primero
+    reloj.ahora += 60
+    nuevo = servicio.obtener()
+
+    assert nuevo.version != primero.version
+    assert nuevo.limite_pendientes == 35
+
+
+def test_error_al_refrescar_usa_la_copia_previa(servicio, fake_nocodb, reloj):
+    primero = servicio.obtener()
+    reloj.ahora += 60
+    fake_nocodb.fallar("GET", 503)
+
+    assert servicio.obtener() is primero
+
+
+def test_error_sin_copia_previa_se_propaga(servicio, fake_nocodb):
+    fake_nocodb.fallar("GET", 503)
+
+    with pytest.raises(requests.HTTPError):
+        servicio.obtener()
@@ -0,0 +1,91 @@
+import pytest
+import requests
+
+from app.infrastructure.nocodb_client import NocoDBClient
+from app.utils import retry_utils
+from app.utils.retry_utils import CircuitBreaker, CircuitOpenError, RetryBudget
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(retry_utils.time, "monotonic", reloj)
+    return reloj
+
+
+def test_circuito_abre_pasa_a_half_open_y_cierra(reloj):
+    cb = CircuitBreaker("prueba", umbral_fallos=2, tiempo_recuperacion=30)
+
+    cb.registrar_fallo()
+    assert cb.estado == CircuitBreaker.CLOSED
+    cb.registrar_fallo()
+    assert cb.estado == CircuitBreaker.OPEN and not cb.permitir()
+
+    reloj.ahora += 30
+    assert cb.estado == CircuitBreaker.HALF_OPEN
+    # Una sola petición de prueba a la vez
+    assert cb.permitir() and not cb.permitir()
+
+    cb.registrar_exito()
+    assert cb.estado == CircuitBreaker.CLOSED and cb.permitir()
+
+
+def test_prueba_fallida_en_half_open_reabre(reloj):
+    cb = CircuitBreaker("prueba", umbral_fallos=1, tiempo_recuperacion=30)
+    cb.registrar_fallo()
+    reloj.ahora += 30
+    assert cb.permitir()
+
+    cb.registrar_fallo()
+
+    assert cb.estado == CircuitBreaker.OPEN
+    reloj.ahora += 29
+    assert not cb.permitir()
+
+
+def test_presupuesto_de_reintentos_se_agota_y_se_recarga():
+    presupuesto = RetryBudget(ratio=0.5, minimo=2)
+
+    assert presupuesto.consumir() and presupuesto.consumir()
+    assert not presupuesto.consumir()
+
+    presupuesto.registrar_peticion()
+    presupuesto.registrar_peticion()
+    assert presupuesto.consumir()
+    assert not presupuesto.consumir()
+
+
+def test_cliente_sin_presupuesto_no_reintenta(fake_nocodb, monkeypatch):
+    monkeypatch.setattr(retry_utils.time, "sleep", lambda _s: None)
+    cliente = NocoDBClient(fake_nocodb.url, "token", max_retries=3)
+    cliente.retry_budget = RetryBudget(ratio=0, minimo=0)
+    fake_nocodb.fallar("GET", 503, veces=3)
+
+    with pytest.raises(requests.HTTPError):
+        cliente.count_records("vehiculos")
+
+    assert fake_nocodb.requests["GET"] == 1
+
+
+def test_cliente_con_circuito_abierto_no_llama_al_servidor(fake_nocodb):
+    cliente = NocoDBClient(
+        fake_nocodb.url, "token", max_retries=0,
+        circuit_breaker=CircuitBreaker("nocodb", umbral_fallos=1),
+    )
+    fake_nocodb.fallar("GET", 503)
+
+    with pytest.raises(requests.HTTPError):
+        cliente.count_records("vehiculos")
+    with pytest.raises(CircuitOpenError):
+        cliente.count_records("vehiculos")
+
+    assert not cliente.disponible()
+    assert fake_nocodb.requests["GET"] == 1
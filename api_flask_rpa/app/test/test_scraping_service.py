@@ -0,0 +1,101 @@
+import pytest
+from selenium.common.exceptions import JavascriptException
+
+from app.services.scraping_service import (
+    JS_TEXTOS_XPATH,
+    ScrapingService,
+    aplanar_json,
+    placas_en_json,
+)
+
+LISTA = {"by": "xpath", "value": "//mat-option//span"}
+
+
+class _Elemento:
+    def __init__(self, texto):
+        self.text = texto
+
+
+class _Driver:
+    def __init__(self, textos=None, error=None):
+        self.textos = textos
+        self.error = error
+        self.scripts = []
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+        if self.error:
+            raise self.error
+        return self.textos
+
+
+class _WebClientFalso:
+    def __init__(self, driver, opciones):
+        self.driver = driver
+        self.opciones = opciones
+        self.busquedas = 0
+
+    def find_all_by_selector(self, selector):
+        self.busquedas += 1
+        return [_Elemento(t) for t in self.opciones]
+
+
+@pytest.fixture
+def opciones():
+    return ["SELECCIONE", "ABC123 ", "", "XYZ98F"]
+
+
+def test_lista_de_placas_en_una_sola_llamada(opciones):
+    web = _WebClientFalso(_Driver(textos=[t.strip() for t in opciones]), opciones)
+    servicio = ScrapingService(web)
+
+    assert servicio._leer_placas(LISTA) == ["ABC123", "XYZ98F"]
+    assert web.driver.scripts == [JS_TEXTOS_XPATH]
+    assert web.busquedas == 0
+
+
+def test_script_fallido_usa_la_lectura_por_elementos(opciones):
+    web = _WebClientFalso(_Driver(error=JavascriptException("XPath inválido")), opciones)
+    servicio = ScrapingService(web)
+
+    assert servicio._leer_placas(LISTA) == ["ABC123", "XYZ98F"]
+    assert web.busquedas == 1
+
+
+@pytest.mark.parametrize("extraccion_js, selector", [
+    (False, LISTA),
+    (True, {"by": "css", "value": "mat-option span"}),
+])
+def test_sin_js_o_sin_xpath_se_lee_por_elementos(opciones, extraccion_js, selector):
+    web = _WebClientFalso(_Driver(textos=["NO-USAR"]), opciones)
+    servicio = ScrapingService(web, extraccion_js=extraccion_js)
+
+    assert servicio._leer_placas(selector) == ["ABC123", "XYZ98F"]
+    assert web.driver.scripts == []
+
+
+def test_aplanar_json_usa_rutas_con_punto_e_indices():
+    datos = {
+        "placa": "ABC123",
+        "propietarios": [{"nombre": "Juan", "documento": None}],
+        "tecnico": {"motor": {"cilindraje": 1600}, "color": ""},
+    }
+
+    assert aplanar_json(datos) == {
+        "placa": "ABC123",
+        "propietarios.0.nombre": "Juan",
+        "tecnico.motor.cilindraje": "1600",
+    }
+
+
+def test_placas_en_json_busca_en_cualquier_nivel_sin_repetir():
+    datos = {
+        "data": [
+            {"Placa": "ABC123", "detalle": {"placa": "XYZ98F"}},
+            {"PLACA": " ABC123 "},
+            {"placa": ""},
+            {"placa": None, "otro": "DEF456"},
+        ]
+    }
+
+    assert placas_en_json(datos) == ["ABC123", "XYZ98F"]
@@ -0,0 +1,201 @@
+import json
+import os
+
+import pytest
+from selenium import webdriver
+from selenium.common.exceptions import JavascriptException, WebDriverException
+
+from app.infrastructure.web_client import PERFIL_LIGERO, URLS_BLOQUEADAS_DEFECTO, WebClient
+
+
+class _Timeouts:
+    def __init__(self):
+        self.script = 30
+
+
+class _DriverFalso:
+    """Driver mínimo: registra los timeouts de scripts que se fijan."""
+    def __init__(self, resultado=None, error=None):
+        self.timeouts = _Timeouts()
+        self.resultado = resultado
+        self.error = error
+        self.scripts_timeout = []
+
+    def set_script_timeout(self, segundos):
+        self.scripts_timeout.append(segundos)
+        self.timeouts.script = segundos
+
+    def execute_async_script(self, script, *args):
+        if self.error:
+            raise self.error
+        return self.resultado
+
+
+def test_esperas_js_apagadas_por_defecto(monkeypatch):
+    monkeypatch.delenv("SELENIUM_JS_WAITS", raising=False)
+    assert not WebClient("http://runt.invalid", browser=_DriverFalso()).js_waits
+
+    monkeypatch.setenv("SELENIUM_JS_WAITS", "True")
+    assert WebClient("http://runt.invalid", browser=_DriverFalso()).js_waits
+
+
+def test_wait_js_restaura_el_timeout_de_scripts():
+    driver = _DriverFalso(resultado="elemento")
+    web = WebClient("http://runt.invalid", browser=driver)
+
+    assert web.wait_js({"by": "id", "value": "placa"}, timeout=5) == "elemento"
+
+    assert driver.scripts_timeout == [7.0, 30]
+    assert driver.timeouts.script == 30
+
+
+def test_wait_js_restaura_el_timeout_aunque_falle_el_script():
+    driver = _DriverFalso(error=JavascriptException("la página navegó"))
+    web = WebClient("http://runt.invalid", browser=driver)
+
+    with pytest.raises(JavascriptException):
+        web.wait_js({"by": "id", "value": "placa"}, timeout=5)
+
+    assert driver.timeouts.script == 30
+
+
+def _evento(metodo, **params):
+    return {"message": json.dumps({"message": {"method": metodo, "params": params}})}
+
+
+class _DriverConLog:
+    """Entrega lotes de eventos del log de rendimiento y cuerpos por requestId."""
+    def __init__(self, lotes, cuerpos):
+        self.lotes = list(lotes)
+        self.cuerpos = cuerpos
+        self.cuerpos_pedidos = []
+
+    def get_log(self, tipo):
+        return self.lotes.pop(0) if self.lotes else []
+
+    def execute_cdp_cmd(self, comando, params):
+        self.cuerpos_pedidos.append(params["requestId"])
+        return {"body": self.cuerpos[params["requestId"]]}
+
+
+@pytest.fixture
+def captura(monkeypatch):
+    monkeypatch.setenv("SELENIUM_CAPTURA_XHR", "True")
+
+
+def test_cuerpo_json_se_pide_al_terminar_la_carga(captura):
+    json_ = {"mimeType": "application/json", "url": "https://runt/api/vehiculos?doc=1"}
+    driver = _DriverConLog(
+        lotes=[
+            [
+                _evento("Network.responseReceived", requestId="1", response=json_),
+                _evento("Network.responseReceived", requestId="2",
+                        response={"mimeType": "text/html", "url": "https://runt/"}),
+                _evento("Network.loadingFinished", requestId="2"),
+            ],
+            # El cuerpo del JSON termina de llegar en una lectura posterior
+            [{"message": "no es json"}, _evento("Network.loadingFinished", requestId="1")],
+        ],
+        cuerpos={"1": '{"placas": ["ABC123"]}'},
+    )
+    web = WebClient("http://runt.invalid", browser=driver)
+
+    assert web.respuestas_json("vehiculos") == []
+    assert driver.cuerpos_pedidos == []
+
+    assert web.respuestas_json("vehiculos") == [
+        ("https://runt/api/vehiculos?doc=1", {"placas": ["ABC123"]})
+    ]
+    assert web.respuestas_json("ficha") == []
+    assert driver.cuerpos_pedidos == ["1"]
+
+
+def test_carga_fallida_no_pide_el_cuerpo(captura):
+    json_ = {"mimeType": "application/json", "url": "https://runt/api/ficha"}
+    driver = _DriverConLog(
+        lotes=[[
+            _evento("Network.responseReceived", requestId="7", response=json_),
+            _evento("Network.loadingFailed", requestId="7"),
+            _evento("Network.loadingFinished", requestId="7"),
+        ]],
+        cuerpos={},
+    )
+    web = WebClient("http://runt.invalid", browser=driver)
+
+    assert web.respuestas_json("ficha") == []
+    assert driver.cuerpos_pedidos == []
+
+
+def test_sin_captura_no_se_lee_el_log(monkeypatch):
+    monkeypatch.delenv("SELENIUM_CAPTURA_XHR", raising=False)
+    driver = _DriverConLog(lotes=[[_evento("Network.loadingFinished", requestId="1")]], cuerpos={})
+    web = WebClient("http://runt.invalid", browser=driver)
+
+    assert web.respuestas_json(".*") == []
+    assert len(driver.lotes) == 1
+
+
+class _DriverCdp:
+    def __init__(self, error=None):
+        self.error = error
+        self.comandos = []
+
+    def execute_cdp_cmd(self, comando, params):
+        if self.error:
+            raise self.error
+        self.comandos.append((comando, params))
+
+    def quit(self):
+        pass
+
+
+def test_perfil_ligero_bloquea_las_urls_por_defecto(monkeypatch):
+    monkeypatch.delenv("SELENIUM_BLOCKED_URLS", raising=False)
+    driver = _DriverCdp()
+    web = WebClient("http://runt.invalid", browser=driver, perfil=PERFIL_LIGERO)
+
+    web._bloquear_urls(driver)
+
+    assert driver.comandos == [
+        ("Network.enable", {}),
+        ("Network.setBlockedURLs", {"urls": URLS_BLOQUEADAS_DEFECTO}),
+    ]
+
+
+def test_lista_de_urls_bloqueadas_configurable(monkeypatch):
+    monkeypatch.setenv("SELENIUM_BLOCKED_URLS", "*.mp4, *ads.example.com* ,")
+    driver = _DriverCdp()
+    web = WebClient("http://runt.invalid", browser=driver, perfil=PERFIL_LIGERO)
+
+    web._bloquear_urls(driver)
+
+    assert driver.comandos[-1] == (
+        "Network.setBlockedURLs", {"urls": ["*.mp4", "*ads.example.com*"]}
+    )
+
+
+def test_bloqueo_fallido_no_impide_usar_el_driver():
+    driver = _DriverCdp(error=WebDriverException("CDP no disponible"))
+    web = WebClient("http://runt.invalid", browser=driver, perfil=PERFIL_LIGERO)
+
+    web._bloquear_urls(driver)
+
+    assert driver.comandos == []
+
+
+def test_opciones_del_perfil_ligero_y_limpieza_del_perfil():
+    web = WebClient("http://runt.invalid", browser=_DriverCdp(), perfil="LIGERO")
+    opciones = webdriver.ChromeOptions()
+
+    web._aplicar_perfil_ligero(opciones)
+
+    assert web.perfil == PERFIL_LIGERO
+    assert opciones.page_load_strategy == "eager"
+    assert "--disable-extensions" in opciones.arguments
+    assert f"--user-data-dir={web._perfil_dir}" in opciones.arguments
+    perfil_dir = web._perfil_dir
+    assert os.path.isdir(perfil_dir)
+
+    web.close()
+
+    assert not os.path.exists(perfil_dir)
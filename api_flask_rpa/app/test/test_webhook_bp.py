@@ -0,0 +1,60 @@
+import pytest
+from flask import Flask
+
+from config import settings
+from app.blueprints import webhook_bp
+
+EVENTO = {"type": "records.after.insert", "data": {"rows": [{"Id": 1}]}}
+
+
+class _DisparadorFalso:
+    def __init__(self):
+        self.eventos = []
+
+    def notificar(self, origen):
+        self.eventos.append(origen)
+
+
+@pytest.fixture
+def disparador(monkeypatch):
+    falso = _DisparadorFalso()
+    monkeypatch.setattr(webhook_bp, "get_disparador", lambda: falso)
+    return falso
+
+
+@pytest.fixture
+def cliente():
+    app = Flask(__name__)
+    app.register_blueprint(webhook_bp.bp, url_prefix="/api/webhooks")
+    return app.test_client()
+
+
+def test_sin_secreto_configurado_se_rechaza(cliente, disparador, monkeypatch):
+    monkeypatch.setattr(settings, "NOCO_WEBHOOK_SECRET", None)
+
+    resp = cliente.post("/api/webhooks/nocodb/insumo", json=EVENTO)
+
+    assert resp.status_code == 503
+    assert disparador.eventos == []
+
+
+def test_token_invalido_se_rechaza(cliente, disparador, monkeypatch):
+    monkeypatch.setattr(settings, "NOCO_WEBHOOK_SECRET", "s3creto")
+
+    resp = cliente.post(
+        "/api/webhooks/nocodb/insumo", json=EVENTO, headers={"X-Webhook-Token": "otro"}
+    )
+
+    assert resp.status_code == 401
+    assert disparador.eventos == []
+
+
+def test_token_valido_despierta_al_disparador(cliente, disparador, monkeypatch):
+    monkeypatch.setattr(settings, "NOCO_WEBHOOK_SECRET", "s3creto")
+
+    resp = cliente.post(
+        "/api/webhooks/nocodb/insumo", json=EVENTO, headers={"X-Webhook-Token": "s3creto"}
+    )
+
+    assert resp.status_code == 202
+    assert disparador.eventos == ["records.after.insert"]
@@ -0,0 +1,54 @@
+"""
+Lock de lote entre procesos.
+
+Sin leases (LEASE_ENABLED != True) dos lotes simultáneos leen los mismos
+'Sin Procesar' y consultan dos veces cada registro. El lock en memoria de
+gestion_bp solo cubre su propio proceso; este lock de archivo (flock) lo
+comparten el API y ``python -m app.worker`` a través del volumen común
+(LOTE_LOCK_PATH, por defecto <LOG_PATH>/lote.lock).
+
+    with candado_lote():
+        wf.ejecutar_lote()
+
+El sistema operativo libera el flock si el proceso muere, así que no quedan
+locks huérfanos tras una caída.
+"""
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from config import settings
+
+
+class LoteEnCursoError(Exception):
+    """Ya hay un lote ejecutándose (en este u otro proceso)."""
+
+
+def ruta_candado() -> str:
+    if settings.LOTE_LOCK_PATH:
+        return settings.LOTE_LOCK_PATH
+    return os.path.join(settings.LOG_PATH or tempfile.gettempdir(), "lote.lock")
+
+
+@contextmanager
+def candado_lote(ruta: Optional[str] = None) -> Iterator[None]:
+    """
+    Toma el lock sin esperar durante el bloque. Lanza LoteEnCursoError si
+    otro proceso (o hilo) ya lo tiene. Con LEASE_ENABLED=True no hace nada:
+    los leases ya reparten los registros entre lotes concurrentes.
+    """
+    if settings.LEASE_ENABLED == "True":
+        yield
+        return
+    ruta = ruta or ruta_candado()
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "a") as archivo:
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise LoteEnCursoError(f"Ya hay un lote en ejecución (lock {ruta})")
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
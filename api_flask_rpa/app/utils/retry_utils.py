@@ -0,0 +1,155 @@
+"""
+Utilidades de resiliencia para clientes HTTP:
+- backoff exponencial con jitter
+- presupuesto de reintentos (evita tormentas de reintentos)
+- circuit breaker con estado consultable
+- clasificación de fallos transitorios (reintentables) vs. definitivos
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+import aiohttp
+import requests
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("retry_utils")
+
+
+def backoff_con_jitter(intento: int, base: float = 0.5, maximo: float = 10.0) -> float:
+    """
+    Segundos de espera para el intento N (1..n) con "full jitter":
+    aleatorio entre 0 y min(maximo, base * 2^(N-1)).
+    """
+    return random.uniform(0, min(maximo, base * (2 ** (intento - 1))))
+
+
+class RetryBudget:
+    """
+    Presupuesto de reintentos: cada petición deposita ``ratio`` fichas y cada
+    reintento consume una. Así los reintentos nunca superan ~ratio del tráfico
+    (más un mínimo fijo), aunque el servidor esté fallando en todas.
+    """
+
+    def __init__(self, ratio: float = 0.2, minimo: int = 10, maximo: int = 100):
+        self.ratio = ratio
+        self.maximo = maximo
+        self._fichas = float(minimo)
+        self._lock = threading.Lock()
+
+    def registrar_peticion(self):
+        with self._lock:
+            self._fichas = min(self.maximo, self._fichas + self.ratio)
+
+    def consumir(self) -> bool:
+        """True si hay presupuesto para un reintento (y lo descuenta)."""
+        with self._lock:
+            if self._fichas >= 1:
+                self._fichas -= 1
+                return True
+            return False
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Se lanza cuando el circuito está abierto y se rechaza la petición.
+    Es un ConnectionError para que los bulk la reporten por chunk como
+    cualquier otro fallo de conexión.
+    """
+
+
+def _status_transitorio(status: Optional[int]) -> bool:
+    return status is not None and (status >= 500 or status == 429)
+
+
+def es_fallo_transitorio(error: BaseException) -> bool:
+    """
+    True si el fallo puede resolverse reintentando más tarde: errores de
+    conexión o timeout (requests/aiohttp), respuestas 5xx o 429 y circuito
+    abierto. Un 4xx es un rechazo definitivo del payload: reenviarlo no sirve.
+    """
+    if isinstance(error, (CircuitOpenError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError):
+        return _status_transitorio(getattr(error.response, "status_code", None))
+    if isinstance(error, aiohttp.ClientResponseError):
+        return _status_transitorio(error.status)
+    return isinstance(
+        error,
+        (requests.exceptions.ConnectionError, requests.exceptions.Timeout, aiohttp.ClientError),
+    )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker clásico:
+    - closed: las peticiones pasan; ``umbral_fallos`` fallos seguidos lo abren.
+    - open: se rechazan sin llamar al servidor durante ``tiempo_recuperacion`` s.
+    - half_open: pasa una petición de prueba; si va bien cierra, si falla reabre.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, nombre: str, umbral_fallos: int = 5, tiempo_recuperacion: float = 30.0):
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_recuperacion = tiempo_recuperacion
+        self._estado = self.CLOSED
+        self._fallos = 0
+        self._abierto_desde: Optional[float] = None
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if (
+                self._estado == self.OPEN
+                and time.monotonic() - self._abierto_desde >= self.tiempo_recuperacion
+            ):
+                return self.HALF_OPEN
+            return self._estado
+
+    @property
+    def abierto(self) -> bool:
+        """True mientras se deben rechazar peticiones (no incluye half_open)."""
+        return self.estado == self.OPEN
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self._estado == self.CLOSED:
+                return True
+            if time.monotonic() - self._abierto_desde < self.tiempo_recuperacion:
+                return False
+            # half_open: solo una petición de prueba a la vez
+            if self._prueba_en_curso:
+                return False
+            self._prueba_en_curso = True
+            return True
+
+    def registrar_exito(self):
+        with self._lock:
+            if self._estado != self.CLOSED:
+                logger.info("Circuito '%s' cerrado: servicio recuperado", self.nombre)
+            self._estado = self.CLOSED
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            if self._prueba_en_curso or self._fallos >= self.umbral_fallos:
+                if self._estado != self.OPEN or self._prueba_en_curso:
+                    logger.error(
+                        "Circuito '%s' abierto tras %d fallos; se rechazan peticiones por %.0fs",
+                        self.nombre, self._fallos, self.tiempo_recuperacion,
+                    )
+                self._estado = self.OPEN
+                self._abierto_desde = time.monotonic()
+            self._prueba_en_curso = False
+
+    def snapshot(self) -> dict:
+        """Estado serializable (para health checks y logs)."""
+        return {"nombre": self.nombre, "estado": self.estado, "fallos": self._fallos}
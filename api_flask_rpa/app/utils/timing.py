@@ -0,0 +1,29 @@
+"""
+Medición de tiempos por paso del flujo Selenium.
+
+    with medir_paso("login.credenciales"):
+        ...
+
+Escribe en el log "timing" una línea por paso con su duración, de modo que
+se pueda comparar el costo de cada espera antes y después de un cambio.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("timing")
+
+
+@contextmanager
+def medir_paso(nombre: str) -> Iterator[None]:
+    inicio = time.perf_counter()
+    estado = "ok"
+    try:
+        yield
+    except Exception:
+        estado = "error"
+        raise
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        logger.info("Paso %s: %.0f ms (%s)", nombre, ms, estado)
@@ -0,0 +1,119 @@
+"""
+Worker en proceso: alternativa al par poller → HTTP → Flask.
+
+Lee los pendientes de Insumo y ejecuta el workflow directamente, manteniendo
+calientes entre lotes el navegador, los clientes NocoDB y la sesión RUNT.
+Mientras la cola tenga registros encadena lotes sin esperar; cuando queda
+vacía duerme POLLER_INTERVAL_SECONDS. SIGTERM/SIGINT terminan el registro en
+curso, devuelven a la cola los reclamados restantes y cierran el navegador.
+
+Uso (desde la carpeta del proyecto):
+
+    python -m app.worker
+"""
+import signal
+import threading
+from typing import Optional
+from config import settings
+from app.infrastructure.nocodb_client import NocoDBClient
+from app.infrastructure.nocodb_async_client import AsyncNocoDBClient
+from app.infrastructure.driver_manager import DriverManager
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+from app.services.workflows.proceso_consulta_wf import ProcesoConsultaWF
+from app.utils.logging_utils import get_logger
+from app.utils.lote_lock import LoteEnCursoError, candado_lote
+
+logger = get_logger("worker")
+
+
+class Worker:
+    def __init__(self, intervalo: Optional[float] = None):
+        self.intervalo = float(intervalo or settings.POLLER_INTERVAL_SECONDS or 60)
+        self.detener = threading.Event()
+        self.nocodb = NocoDBClient(base_url=settings.NOCODB_URL, api_key=settings.NOCO_XC_TOKEN)
+        self.nocodb_async = (
+            AsyncNocoDBClient(
+                base_url=settings.NOCODB_URL,
+                api_key=settings.NOCO_XC_TOKEN,
+                circuit_breaker=self.nocodb.circuit_breaker,
+            )
+            if settings.NOCO_ASYNC_WRITES == "True"
+            else None
+        )
+        self.source_repo = NocoDbSourceRepository(self.nocodb)
+        # Chrome caliente desde el arranque; se recicla por registros/RSS
+        self.drivers = DriverManager(settings.RUNT_URL)
+        self.drivers.calentar()
+        self.wf = ProcesoConsultaWF(
+            nocodb_client=self.nocodb,
+            web_client=None,
+            async_client=self.nocodb_async,
+            driver_manager=self.drivers,
+        )
+
+    def _descartar_navegador(self):
+        self.drivers.reciclar()
+
+    def ciclo(self) -> bool:
+        """
+        Ejecuta un lote si hay pendientes. Retorna True si conviene seguir de
+        inmediato (la cola puede tener más registros).
+        """
+        if settings.LEASE_ENABLED == "True":
+            self.source_repo.liberar_leases_vencidos()
+        pendientes = self.source_repo.contar_pendientes()
+        if not pendientes:
+            return False
+        logger.info("Pendientes en cola: %d", pendientes)
+        try:
+            with candado_lote():
+                resultado = self.wf.ejecutar_lote(detener=self.detener)
+        except LoteEnCursoError as e:
+            # Sin leases: el API (u otro worker) ya está drenando la cola
+            logger.info("%s; se espera al siguiente ciclo", e)
+            return False
+        # Fuera de horario el lote no procesa nada: esperar al siguiente ciclo
+        return bool(resultado.get("procesados") or resultado.get("errores"))
+
+    def ejecutar(self):
+        logger.info("Worker iniciado (intervalo en reposo=%ss)", self.intervalo)
+        while not self.detener.is_set():
+            seguir = False
+            try:
+                if not self.nocodb.disponible():
+                    logger.warning(
+                        "Circuito NocoDB abierto (%s); se espera",
+                        self.nocodb.circuit_breaker.snapshot(),
+                    )
+                else:
+                    seguir = self.ciclo()
+            except Exception as e:
+                # El navegador puede haber quedado en mal estado: se recrea
+                logger.exception("Error en ciclo del worker: %s", e)
+                self._descartar_navegador()
+            if not seguir:
+                # Tras el reposo la sesión RUNT pudo vencer: forzar login
+                self.wf.sesion_activa = False
+                self.detener.wait(self.intervalo)
+        self.cerrar()
+
+    def solicitar_detencion(self, signum=None, frame=None):
+        logger.info("Señal %s recibida: drenando y deteniendo el worker", signum)
+        self.detener.set()
+
+    def cerrar(self):
+        self.drivers.cerrar()
+        if self.nocodb_async is not None:
+            self.nocodb_async.close()
+        logger.info("Worker detenido")
+
+
+def main():
+    worker = Worker()
+    signal.signal(signal.SIGTERM, worker.solicitar_detencion)
+    signal.signal(signal.SIGINT, worker.solicitar_detencion)
+    worker.ejecutar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark / verificación offline del motor "api" (ApiScrapingService).
+
+Levanta el RUNT falso con respuestas sintéticas, simula la sesión Selenium
+(token en localStorage) y ejecuta N consultas completas (propietario + fichas).
+Valida los resultados, fuerza un vencimiento de token a mitad de la corrida
+y reporta tiempo por registro.
+
+Uso (desde api_flask_rpa/):
+    python -m benchmarks.bench_motor_api --registros 200 --latencia 0.05
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("LOG_PATH", tempfile.mkdtemp(prefix="bench_logs_"))
+
+from benchmarks.fake_runt_api import FakeRuntApi  # noqa: E402
+from app.infrastructure.runt_api_client import RuntApiClient  # noqa: E402
+from app.services.api_scraping_service import ApiScrapingService  # noqa: E402
+from app.services.scraping_service import ScrapingService  # noqa: E402
+
+
+class _DriverConSesion:
+    """Lo mínimo que lee RuntApiClient de un WebDriver con sesión RUNT."""
+    def __init__(self, fake: FakeRuntApi):
+        self.fake = fake
+
+    def get_cookies(self):
+        return []
+
+    def execute_script(self, script, *args):
+        return self.fake.token
+
+
+class _WebClientFalso:
+    def __init__(self, fake: FakeRuntApi):
+        self.driver = _DriverConSesion(fake)
+
+
+class _SeleniumFalso(ScrapingService):
+    """Login "exitoso" sin navegador: la sesión la provee el RUNT falso."""
+    logins = 0
+
+    def login(self) -> bool:
+        self.logins += 1
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--registros", type=int, default=100)
+    parser.add_argument("--latencia", type=float, default=0.05, help="segundos por petición")
+    args = parser.parse_args()
+
+    fake = FakeRuntApi(latency=args.latencia).start()
+    try:
+        selenium = _SeleniumFalso(web_client=_WebClientFalso(fake))
+        motor = ApiScrapingService(selenium, RuntApiClient(fake.url))
+        assert motor.login()
+
+        t0 = time.perf_counter()
+        for i in range(args.registros):
+            if i == args.registros // 2:
+                fake.expirar_token()  # debe renovarse con un re-login transparente
+            placas, png = motor.consultar_por_propietario(
+                "CC", "1032456789", "Pérez Gómez Juan Carlos"
+            )
+            assert placas == ["ABC123", "XYZ98F"] and png.startswith(b"\x89PNG"), placas
+            for placa in placas:
+                detalle, _ = motor.abrir_ficha_y_extraer(placa)
+                assert detalle["Placa"] == placa and detalle["marca"], detalle
+            motor.volver_a_inicio()
+        total = time.perf_counter() - t0
+
+        sin_placas, _ = motor.consultar_por_propietario(
+            "NIT", "900123456", "Transportes Ejemplo SAS"
+        )
+        assert sin_placas == []
+        no_coincide, _ = motor.consultar_por_propietario("CC", "1032456789", "Otra Persona")
+        assert no_coincide == []
+    finally:
+        fake.stop()
+
+    print(f"Registros:          {args.registros} (latencia simulada {args.latencia * 1000:.0f} ms)")
+    print(f"Peticiones:         {sum(fake.requests.values())}")
+    print(f"Logins navegador:   {selenium.logins}")
+    print(f"Tiempo total:       {total:.2f} s ({total / args.registros * 1000:.0f} ms/registro)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: perfil de Chrome "completo" vs "ligero" (SELENIUM_PERFIL).
+
+Para cada perfil arranca Chrome, abre N veces las páginas indicadas y mide:
+- arranque del driver,
+- retorno de driver.get (eager vs normal),
+- página lista (documento cargado + Angular estable + spinner oculto),
+- RSS del árbol chromedriver + Chrome al final (requiere psutil).
+
+Guarda una captura por perfil para revisar que la evidencia se vea igual.
+Requiere Chrome/ChromeDriver (CHROME_BIN, CHROMEDRIVER_PATH) y red hacia el portal.
+
+Uso (desde api_flask_rpa/):
+    python -m benchmarks.bench_perfil_chrome --url https://runtpro.runt.gov.co \\
+        --rutas / --repeticiones 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("LOG_PATH", tempfile.mkdtemp(prefix="bench_logs_"))
+
+from app.infrastructure.driver_manager import DriverManager  # noqa: E402
+from app.infrastructure.web_client import PERFIL_COMPLETO, PERFIL_LIGERO, WebClient  # noqa: E402
+
+SPINNER = {"by": "css", "value": ".mat-progress-spinner"}
+
+
+def medir(url: str, rutas, repeticiones: int, perfil: str, salida: str) -> dict:
+    t0 = time.perf_counter()
+    gestor = DriverManager(url, fabrica=lambda: WebClient(base_url=url, perfil=perfil))
+    web = gestor.obtener()
+    arranque = time.perf_counter() - t0
+    get_ms, listo_ms = [], []
+    try:
+        for _ in range(repeticiones):
+            for ruta in rutas:
+                t = time.perf_counter()
+                web.open(ruta)
+                get_ms.append((time.perf_counter() - t) * 1000)
+                web.wait_page_ready(timeout=30, spinner=SPINNER)
+                listo_ms.append((time.perf_counter() - t) * 1000)
+        web.screenshot_save(os.path.join(salida, f"evidencia_{perfil}.png"))
+        rss = gestor.rss_mb()
+    finally:
+        gestor.cerrar()
+    return {
+        "arranque_s": arranque,
+        "get_ms": statistics.median(get_ms),
+        "listo_ms": statistics.median(listo_ms),
+        "listo_p95_ms": sorted(listo_ms)[int(0.95 * (len(listo_ms) - 1))],
+        "rss_mb": rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.environ.get("RUNT_URL", "https://runtpro.runt.gov.co"))
+    parser.add_argument("--rutas", nargs="+", default=["/"])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default=tempfile.mkdtemp(prefix="bench_perfil_"))
+    args = parser.parse_args()
+
+    resultados = {
+        perfil: medir(args.url, args.rutas, args.repeticiones, perfil, args.salida)
+        for perfil in (PERFIL_COMPLETO, PERFIL_LIGERO)
+    }
+
+    print(
+        f"{'perfil':<10}{'arranque':>10}{'get p50':>10}"
+        f"{'listo p50':>11}{'listo p95':>11}{'RSS':>9}"
+    )
+    for perfil, r in resultados.items():
+        rss = f"{r['rss_mb']:.0f} MB" if r["rss_mb"] is not None else "n/d"
+        print(
+            f"{perfil:<10}{r['arranque_s']:>9.1f}s{r['get_ms']:>8.0f}ms"
+            f"{r['listo_ms']:>9.0f}ms{r['listo_p95_ms']:>9.0f}ms{rss:>9}"
+        )
+    print(f"Capturas para comparar en: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: actualización de RutaPDF por PATCH individual vs PATCH en bloque.
+
+Levanta un NocoDB falso en memoria, siembra N filas de detalle para un mismo
+NumUnicoProceso y compara número de peticiones y tiempo de ambas estrategias.
+
+Uso (desde api_flask_rpa/):
+    python -m benchmarks.bench_ruta_pdf --filas 400 --latencia 0.005
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("LOG_PATH", tempfile.mkdtemp(prefix="bench_logs_"))
+os.environ.setdefault("NOCO_BASE_TRABAJO_TABLE", "base_trabajo")
+
+from benchmarks.fake_nocodb import FakeNocoDB  # noqa: E402
+from app.infrastructure.nocodb_client import NocoDBClient  # noqa: E402
+from app.repositories.nocodb_target_repository import NocoDbTargetRepository  # noqa: E402
+
+TABLA = os.environ["NOCO_BASE_TRABAJO_TABLE"]
+
+
+def sembrar(fake: FakeNocoDB, num_unico: str, filas: int):
+    fake.tables[TABLA] = []
+    fake.seed(TABLA, (
+        {"NumUnicoProceso": num_unico, "NombreDetalle": f"Campo{i}", "RutaPDF": None}
+        for i in range(filas)
+    ))
+
+
+def por_fila(client: NocoDBClient, num_unico: str, ruta: str) -> int:
+    """Estrategia anterior: listar y luego un PATCH por Id."""
+    rows = client.list_records(TABLA, where=f"NumUnicoProceso,eq,{num_unico}", limit=1000)
+    for r in rows:
+        client.update_record_by_id(TABLA, r["Id"], {"RutaPDF": ruta})
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=400)
+    parser.add_argument("--latencia", type=float, default=0.005, help="segundos por petición")
+    args = parser.parse_args()
+
+    fake = FakeNocoDB(latency=args.latencia).start()
+    try:
+        client = NocoDBClient(fake.url, "token")
+        repo = NocoDbTargetRepository(client)
+        num_id = "900123456"
+        num_unico = f"{num_id}_{datetime.now().strftime('%Y-%m-%d')}"
+        ruta = "/opt/runt/data/pdfs/bench.pdf"
+
+        sembrar(fake, num_unico, args.filas)
+        fake.reset_counters()
+        t0 = time.perf_counter()
+        por_fila(client, num_unico, ruta)
+        t_fila = time.perf_counter() - t0
+        req_fila = dict(fake.requests)
+
+        sembrar(fake, num_unico, args.filas)
+        fake.reset_counters()
+        t0 = time.perf_counter()
+        repo.update_ruta_pdf_by_proceso({"NumeroIdentificacion": num_id}, ruta)
+        t_bulk = time.perf_counter() - t0
+        req_bulk = dict(fake.requests)
+        assert all(r["RutaPDF"] == ruta for r in fake.tables[TABLA])
+
+        print(f"Filas: {args.filas}  latencia simulada: {args.latencia * 1000:.1f} ms")
+        print(f"  por fila : {sum(req_fila.values()):5d} peticiones {req_fila}  {t_fila:.3f}s")
+        print(f"  en bloque: {sum(req_bulk.values()):5d} peticiones {req_bulk}  {t_bulk:.3f}s")
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
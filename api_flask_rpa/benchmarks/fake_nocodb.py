@@ -0,0 +1,207 @@
+"""
+Servidor NocoDB falso (API v2, en memoria) para benchmarks locales.
+
+Implementa lo mínimo que usa NocoDBClient:
+GET   /api/v2/tables/{table}/records        (limit, offset, filter, fields, sort)
+GET   /api/v2/tables/{table}/records/count  (filter)
+POST  /api/v2/tables/{table}/records        (objeto o array)
+PATCH /api/v2/tables/{table}/records        (objeto o array)
+
+Cuenta las peticiones recibidas por método para comparar estrategias.
+Para pruebas de resiliencia: fallar() responde un status de error a las
+siguientes peticiones de un método y rechazar() responde 422 a los POST/PATCH
+que incluyan algún registro que cumpla el predicado.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+_RUTA = re.compile(r"^/api/v2/tables/(?P<table>[^/]+)/records(?P<count>/count)?$")
+_FILTRO = re.compile(r"^\((?P<col>[^,]+),(?P<op>[^,]+),(?P<val>.*)\)$")
+_OPERADORES = {
+    "eq": lambda r, col, val: str(r.get(col)) == val,
+    "gt": lambda r, col, val: str(r.get(col) or "") > val,
+    "ge": lambda r, col, val: str(r.get(col) or "") >= val,
+    "lt": lambda r, col, val: str(r.get(col) or "") < val,
+}
+
+
+class FakeNocoDB:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables = {}
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._fallos = defaultdict(deque)
+        self._rechazos = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeNocoDB":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        self.requests.clear()
+
+    def fallar(self, method: str, status: int = 503, veces: int = 1):
+        """Las siguientes ``veces`` peticiones ``method`` responden ``status``."""
+        self._fallos[method].extend([status] * veces)
+
+    def rechazar(self, predicado):
+        """POST/PATCH con algún registro que cumpla ``predicado`` responden 422."""
+        self._rechazos.append(predicado)
+
+    def _fallo_inyectado(self, method: str, body=None):
+        with self._lock:
+            if self._fallos[method]:
+                return self._fallos[method].popleft()
+        registros = body if isinstance(body, list) else [body]
+        if any(p(r) for p in self._rechazos for r in registros if isinstance(r, dict)):
+            return 422
+        return None
+
+    def seed(self, table: str, rows):
+        for row in rows:
+            self._insert(table, dict(row))
+
+    def _insert(self, table: str, row: dict) -> dict:
+        with self._lock:
+            row["Id"] = self._next_id
+            self._next_id += 1
+            self.tables.setdefault(table, []).append(row)
+        return {"Id": row["Id"]}
+
+    def _update(self, table: str, row: dict) -> dict:
+        with self._lock:
+            for existing in self.tables.get(table, []):
+                if str(existing["Id"]) == str(row.get("Id")):
+                    existing.update(row)
+                    break
+        return {"Id": row.get("Id")}
+
+    def _filtrar(self, table: str, query: dict):
+        rows = self.tables.get(table, [])
+        filtro = query.get("filter", [None])[0]
+        for condicion in filtro.split("~and") if filtro else []:
+            m = _FILTRO.match(condicion)
+            if not m or m.group("op") not in _OPERADORES:
+                continue
+            col, val = m.group("col"), m.group("val")
+            if val.startswith("exactDate,"):
+                val = val[len("exactDate,"):]
+            rows = [r for r in rows if _OPERADORES[m.group("op")](r, col, val)]
+        sort = query.get("sort", [None])[0]
+        if sort:
+            col = sort.lstrip("-")
+            rows = sorted(
+                rows, key=lambda r: str(r.get(col) or "").zfill(12), reverse=sort.startswith("-")
+            )
+        return rows
+
+    def _pagina(self, rows, query: dict) -> dict:
+        limit = int(query.get("limit", [25])[0])
+        offset = int(query.get("offset", [0])[0])
+        page = rows[offset:offset + limit]
+        fields = query.get("fields", [None])[0]
+        if fields:
+            cols = fields.split(",")
+            page = [{c: r.get(c) for c in cols if c in r} for r in page]
+        return {
+            "list": page,
+            "pageInfo": {
+                "totalRows": len(rows),
+                "page": offset // limit + 1 if limit else 1,
+                "pageSize": limit,
+                "isFirstPage": offset == 0,
+                "isLastPage": offset + limit >= len(rows),
+            },
+        }
+
+    def _handler(self):
+        return type("Handler", (_Handler,), {"fake": self})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake: FakeNocoDB
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, method: str):
+        self.fake.requests[method] += 1
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        parsed = urlparse(self.path)
+        m = _RUTA.match(parsed.path)
+        if not m:
+            self._send(404, {"msg": "not found"})
+            return None, None, None
+        return m.group("table"), bool(m.group("count")), parse_qs(parsed.query)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _fallar_si_corresponde(self, method: str, body=None) -> bool:
+        status = self.fake._fallo_inyectado(method, body)
+        if status is None:
+            return False
+        self._send(status, {"msg": f"fallo inyectado ({status})"})
+        return True
+
+    def do_GET(self):
+        table, count, query = self._route("GET")
+        if table is None or self._fallar_si_corresponde("GET"):
+            return
+        rows = self.fake._filtrar(table, query)
+        if count:
+            self._send(200, {"count": len(rows)})
+        else:
+            self._send(200, self.fake._pagina(rows, query))
+
+    def do_POST(self):
+        table, _, _ = self._route("POST")
+        if table is None:
+            return
+        body = self._body()
+        if self._fallar_si_corresponde("POST", body):
+            return
+        if isinstance(body, list):
+            self._send(200, [self.fake._insert(table, dict(r)) for r in body])
+        else:
+            self._send(200, self.fake._insert(table, dict(body)))
+
+    def do_PATCH(self):
+        table, _, _ = self._route("PATCH")
+        if table is None:
+            return
+        body = self._body()
+        if self._fallar_si_corresponde("PATCH", body):
+            return
+        if isinstance(body, list):
+            self._send(200, [self.fake._update(table, r) for r in body])
+        else:
+            self._send(200, self.fake._update(table, body))
@@ -0,0 +1,124 @@
+"""
+Servidor RUNT PRO falso para el motor "api" (ApiScrapingService), sin red.
+
+Responde con las respuestas de benchmarks/fixtures/runt/. Son SINTÉTICAS,
+escritas a partir de las rutas supuestas en api_runt, no grabadas del portal:
+sirven para probar el motor, no para validar el contrato real de RUNT PRO.
+GET /api/consultas/propietario/vehiculos?tipoDocumento=&numeroDocumento=
+GET /api/consultas/vehiculo/informacion?placa=
+
+Exige "Authorization: Bearer <token>" (401 si falta o no coincide);
+expirar_token() simula el vencimiento de la sesión y fallar() responde un
+status de error a las siguientes peticiones.
+
+Uso manual (desde api_flask_rpa/):
+    python -m benchmarks.fake_runt_api --puerto 8099
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES = Path(__file__).parent / "fixtures" / "runt"
+TOKEN_POR_DEFECTO = "eyJhbGciOiJub25lIn0.eyJzdWIiOiJmYWtlIn0."
+
+
+def _leer_fixture(nombre: str):
+    return json.loads((FIXTURES / nombre).read_text(encoding="utf-8"))
+
+
+class FakeRuntApi:
+    def __init__(self, latency: float = 0.0, token: str = TOKEN_POR_DEFECTO, puerto: int = 0):
+        self.latency = latency
+        self.token = token
+        self.requests = Counter()
+        self._fallos = deque()
+        self.propietarios = _leer_fixture("vehiculos_propietario.json")
+        self.vehiculos = _leer_fixture("detalle_vehiculo.json")
+        self._server = ThreadingHTTPServer(("127.0.0.1", puerto), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeRuntApi":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def expirar_token(self, nuevo: str = TOKEN_POR_DEFECTO + "renovado"):
+        """Invalida el token actual; solo ``nuevo`` será aceptado."""
+        self.token = nuevo
+
+    def fallar(self, status: int = 503, veces: int = 1):
+        """Las siguientes ``veces`` peticiones responden ``status``."""
+        self._fallos.extend([status] * veces)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                fake.requests[parsed.path] += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake._fallos:
+                    self._send(fake._fallos.popleft(), {"mensaje": "fallo inyectado"})
+                    return
+                if self.headers.get("Authorization") != f"Bearer {fake.token}":
+                    self._send(401, {"mensaje": "Sesión no válida"})
+                    return
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if parsed.path == "/api/consultas/propietario/vehiculos":
+                    clave = f"{query.get('tipoDocumento')}:{query.get('numeroDocumento')}"
+                    # Documento sin registros: el portal responde lista vacía
+                    sin_registros = {"propietario": None, "vehiculos": []}
+                    self._send(200, fake.propietarios.get(clave, sin_registros))
+                elif parsed.path == "/api/consultas/vehiculo/informacion":
+                    detalle = fake.vehiculos.get(query.get("placa", ""))
+                    if detalle is None:
+                        self._send(404, {"mensaje": "Vehículo no encontrado"})
+                    else:
+                        self._send(200, detalle)
+                else:
+                    self._send(404, {"mensaje": "not found"})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--puerto", type=int, default=8099)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    args = parser.parse_args()
+    fake = FakeRuntApi(latency=args.latencia, puerto=args.puerto)
+    print(f"RUNT falso en {fake.url} (token: {fake.token})")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        fake._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
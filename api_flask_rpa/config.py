@@ -15,6 +15,14 @@ class Settings(BaseSettings):
 
     # Poller settings
     POLLER_INTERVAL_SECONDS: Optional[str] = os.getenv("POLLER_INTERVAL_SECONDS")
+    PENDIENTES_CACHE_SECONDS: Optional[str] = os.getenv("PENDIENTES_CACHE_SECONDS")
+    POLLER_RECONCILE_SECONDS: Optional[str] = os.getenv("POLLER_RECONCILE_SECONDS")
+    POLLER_WATERMARK_COLUMN: Optional[str] = os.getenv("POLLER_WATERMARK_COLUMN")
+
+    # Webhooks de NocoDB (after insert en Insumo)
+    NOCO_WEBHOOK_SECRET: Optional[str] = os.getenv("NOCO_WEBHOOK_SECRET")
+    WEBHOOK_DEBOUNCE_SECONDS: Optional[str] = os.getenv("WEBHOOK_DEBOUNCE_SECONDS")
+    WEBHOOK_MAX_WAIT_SECONDS: Optional[str] = os.getenv("WEBHOOK_MAX_WAIT_SECONDS")
 
     # NocoDB settings
     NOCODB_URL: Optional[str] = os.getenv("NOCODB_URL")
@@ -23,11 +31,37 @@ class Settings(BaseSettings):
     NOCO_PARAMETROS_TABLE: Optional[str] = os.getenv("NOCO_PARAMETROS_TABLE")
     NOCO_INSUMO_TABLE: Optional[str] = os.getenv("NOCO_INSUMO_TABLE")
     NOCO_BASE_TRABAJO_TABLE: Optional[str] = os.getenv("NOCO_BASE_TRABAJO_TABLE")
+    # Detalles de vehículo: eav (por defecto) | json | columnas (una fila por placa)
+    DETALLE_STORAGE_MODE: Optional[str] = os.getenv("DETALLE_STORAGE_MODE")
+    NOCO_DETALLE_VEHICULO_TABLE: Optional[str] = os.getenv("NOCO_DETALLE_VEHICULO_TABLE")
+    # Solo reescribir la ficha de una placa si cambió desde la última consulta
+    DETALLE_SOLO_CAMBIOS: Optional[str] = os.getenv("DETALLE_SOLO_CAMBIOS")
+    NOCO_ASYNC_WRITES: Optional[str] = os.getenv("NOCO_ASYNC_WRITES")
+    PARAMETROS_TTL_SECONDS: Optional[str] = os.getenv("PARAMETROS_TTL_SECONDS")
+    WRITE_BEHIND_ENABLED: Optional[str] = os.getenv("WRITE_BEHIND_ENABLED")
+
+    # Worker / leases (varios workers drenando Insumo)
+    LEASE_ENABLED: Optional[str] = os.getenv("LEASE_ENABLED")
+    LEASE_SECONDS: Optional[str] = os.getenv("LEASE_SECONDS")
+    WORKER_ID: Optional[str] = os.getenv("WORKER_ID")
+    # Lock de archivo compartido por API y workers (sin leases, un lote a la vez)
+    LOTE_LOCK_PATH: Optional[str] = os.getenv("LOTE_LOCK_PATH")
+    # Journal SQLite local (reanudación y spool ante caídas de NocoDB)
+    JOURNAL_PATH: Optional[str] = os.getenv("JOURNAL_PATH")
+
+    # WebDriver caliente (DriverManager)
+    DRIVER_PRESPAWN: Optional[str] = os.getenv("DRIVER_PRESPAWN")
+    DRIVER_MAX_RECORDS: Optional[str] = os.getenv("DRIVER_MAX_RECORDS")
+    DRIVER_MAX_RSS_MB: Optional[str] = os.getenv("DRIVER_MAX_RSS_MB")
 
     # RUNT settings
     RUNT_URL: Optional[str] = os.getenv("RUNT_URL")
     RUNT_USERNAME: Optional[str] = os.getenv("RUNT_USERNAME")
     RUNT_PASSWORD: Optional[str] = os.getenv("RUNT_PASSWORD")
+    # Backend de RUNT PRO para el motor "api" (por defecto, la URL del portal)
+    RUNT_API_URL: Optional[str] = os.getenv("RUNT_API_URL")
+    # El motor "api" solo se usa con RUNT_API_ENABLED=True (rutas sin validar)
+    RUNT_API_ENABLED: Optional[str] = os.getenv("RUNT_API_ENABLED")
 
     # Email settings
     CLIENT_ID: Optional[str] = os.getenv("CLIENT_ID")
@@ -0,0 +1,38 @@
+"""
+Paso único al activar LEASE_ENABLED=True: devuelve a 'Sin Procesar' los
+registros de Insumo que quedaron en 'Procesando' sin LeaseExpira (de
+ejecuciones sin leases: gestion_bp o un despliegue anterior).
+
+El barrido automático (liberar_leases_vencidos) ya no los toca porque no
+puede distinguirlos de un lote sin leases en curso: correr este script solo
+con el API, el poller y los workers detenidos.
+
+Uso (desde la carpeta del proyecto):
+
+    python liberar_procesando_sin_lease.py --dry-run    # solo cuenta
+    python liberar_procesando_sin_lease.py
+"""
+import argparse
+from config import settings
+from app.infrastructure.nocodb_client import NocoDBClient
+from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Devuelve a la cola los registros 'Procesando' sin lease."
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta los registros")
+    args = parser.parse_args()
+
+    client = NocoDBClient(base_url=settings.NOCODB_URL, api_key=settings.NOCO_XC_TOKEN)
+    repo = NocoDbSourceRepository(client)
+    if args.dry_run:
+        total = sum(1 for r in repo._procesando() if not r.get("LeaseExpira"))
+        print(f"Registros 'Procesando' sin lease: {total}")
+        return
+    print(f"Registros devueltos a 'Sin Procesar': {repo.liberar_procesando_sin_lease()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Migra / exporta los detalles de vehículo guardados en modo EAV (una fila
+de BaseTrabajo por NombreDetalle/ValorDetalle) al formato ancho: una fila
+por placa con el detalle en columnas mapeadas o en DetalleJSON.
+
+Uso (desde la carpeta del proyecto):
+
+    python migrar_detalles_eav.py --modo columnas
+    python migrar_detalles_eav.py --modo json --where "NumUnicoProceso,like,%2025-01%"
+    python migrar_detalles_eav.py --salida detalles.jsonl     # solo exporta
+    python migrar_detalles_eav.py --dry-run                   # solo cuenta
+
+Las filas EAV originales no se borran; la tabla destino es
+NOCO_DETALLE_VEHICULO_TABLE (o --tabla-destino).
+"""
+import argparse
+import json
+from itertools import islice
+from config import settings
+from app.infrastructure.nocodb_client import NocoDBClient
+from app.services.mapping_service import (
+    CAMPO_HASH,
+    MODO_COLUMNAS,
+    MODO_JSON,
+    agrupar_eav_por_placa,
+    campos_detalle,
+    detalle_desde_eav,
+)
+from app.utils.logging_utils import get_logger
+
+logger = get_logger("migrar_detalles_eav")
+
+# Columnas de contexto que se copian tal cual desde la primera fila EAV
+CAMPOS_CONTEXTO = [
+    "idBaseTrabajo",
+    "NumUnicoProceso",
+    "NumIdentificacion",
+    "NombrePropietario",
+    "Placa",
+    "FechaInsercion",
+    "Estado",
+    "Observacion",
+    "FechaHoraInicio",
+    "FechaHoraFin",
+    "RutaPDF",
+]
+# Orden de lectura: las filas de una misma placa llegan juntas
+ORDEN_EAV = "NumUnicoProceso,Placa,Id"
+# Filas anchas por escritura en la tabla destino
+LOTE_INSERCION = 1000
+
+
+def filas_anchas(filas_eav, modo: str):
+    """
+    Convierte filas EAV a filas anchas, una por placa. Las filas deben venir
+    ordenadas por NumUnicoProceso y Placa (ORDEN_EAV): cada placa se emite en
+    cuanto termina su grupo, sin cargar la tabla completa en memoria.
+    """
+    for grupo in agrupar_eav_por_placa(filas_eav):
+        base = {campo: grupo[0].get(campo) for campo in CAMPOS_CONTEXTO}
+        detalle = detalle_desde_eav(grupo)
+        fila = {**base, **campos_detalle(detalle, modo), "Placa": base["Placa"]}
+        huella = next(
+            (f["ValorDetalle"] for f in grupo if f.get("NombreDetalle") == CAMPO_HASH), None
+        )
+        if huella:
+            fila[CAMPO_HASH] = huella
+        yield fila
+
+
+def _en_lotes(filas, tamano: int):
+    filas = iter(filas)
+    while True:
+        lote = list(islice(filas, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _exportar(filas, salida: str) -> int:
+    total = 0
+    with open(salida, "w", encoding="utf-8") as f:
+        for fila in filas:
+            f.write(json.dumps(fila, ensure_ascii=False, default=str) + "\n")
+            total += 1
+    print(f"Exportado a {salida}")
+    return total
+
+
+def _insertar(client: NocoDBClient, tabla: str, filas) -> int:
+    total = 0
+    for lote in _en_lotes(filas, LOTE_INSERCION):
+        client.create_records_bulk(tabla, lote)
+        total += len(lote)
+        logger.info("Filas anchas insertadas en %s: %d", tabla, total)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra detalles EAV a filas anchas por placa.")
+    parser.add_argument("--modo", choices=[MODO_JSON, MODO_COLUMNAS], default=MODO_COLUMNAS)
+    parser.add_argument("--where", help="Filtro NocoDB 'col,op,val' sobre la tabla EAV")
+    parser.add_argument("--tabla-destino", default=settings.NOCO_DETALLE_VEHICULO_TABLE)
+    parser.add_argument("--salida", help="Archivo JSONL de exportación (no escribe en NocoDB)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta filas y placas")
+    args = parser.parse_args()
+    if not (args.dry_run or args.salida or args.tabla_destino):
+        parser.error("Defina NOCO_DETALLE_VEHICULO_TABLE o --tabla-destino")
+
+    client = NocoDBClient(base_url=settings.NOCODB_URL, api_key=settings.NOCO_XC_TOKEN)
+    leidas = 0
+
+    def filas_eav():
+        nonlocal leidas
+        for fila in client.iter_records(
+            settings.NOCO_BASE_TRABAJO_TABLE,
+            where=args.where,
+            page_size=1000,
+            fields=CAMPOS_CONTEXTO + ["NombreDetalle", "ValorDetalle"],
+            prefetch=True,
+            sort=ORDEN_EAV,
+        ):
+            leidas += 1
+            yield fila
+
+    filas = filas_anchas(filas_eav(), args.modo)
+    if args.dry_run:
+        total = sum(1 for _ in filas)
+    elif args.salida:
+        total = _exportar(filas, args.salida)
+    else:
+        total = _insertar(client, args.tabla_destino, filas)
+        print(f"Insertadas {total} filas en {args.tabla_destino}")
+    logger.info("Filas EAV leídas: %d -> filas anchas: %d", leidas, total)
+    print(f"Filas EAV: {leidas}  ->  filas por placa: {total}")
+
+
+if __name__ == "__main__":
+    main()
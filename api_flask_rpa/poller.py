@@ -1,16 +1,25 @@
 """
 Poller: revisa periódicamente la tabla Insumo en NocoDB y llama al endpoint
-POST /api/gestion/ejecutar cuando haya registros pendientes.
+POST /api/gestion/ejecutar cuando haya registros pendientes; luego sigue el
+job devuelto (GET /api/gestion/jobs/<id>) hasta que termine.
 
 Diseñado para ejecutarse como proceso separado (no dentro de Flask).
 Configurable mediante variable de entorno POLLER_INTERVAL_SECONDS.
+
+Entre reconciliaciones completas (POLLER_RECONCILE_SECONDS) solo consulta
+las filas con UpdatedAt posterior a la última marca de agua vista.
 """
 import time
 import requests
 import sys
+from dataclasses import dataclass
+from typing import Optional
 from config import settings
 from app.infrastructure.nocodb_client import NocoDBClient
-from app.repositories.nocodb_source_repository import NocoDbSourceRepository
+from app.repositories.nocodb_source_repository import (
+    COLUMNA_MARCA_AGUA,
+    NocoDbSourceRepository,
+)
 from app.utils.logging_utils import get_logger
 
 logger = get_logger("poller")
@@ -19,13 +28,47 @@ logger = get_logger("poller")
 INTERVAL = int(getattr(settings, "POLLER_INTERVAL_SECONDS", 60))
 FLASK_URL = getattr(settings, "FLASK_BASE_URL", "http://localhost:8080")
 EXECUTE_ENDPOINT = f"{FLASK_URL}/api/gestion/ejecutar"
+JOBS_ENDPOINT = f"{FLASK_URL}/api/gestion/jobs"
+JOB_POLL_SECONDS = 5
+# Cada cuánto se hace un conteo completo aunque la lectura delta no vea cambios
+RECONCILE_SECONDS = int(settings.POLLER_RECONCILE_SECONDS or 600)
+COLUMNA_DELTA = settings.POLLER_WATERMARK_COLUMN or COLUMNA_MARCA_AGUA
+
+
+@dataclass
+class EstadoDelta:
+    """Marca de agua del poller sobre Insumo."""
+    marca: Optional[str] = None
+    ultimo_completo: float = 0.0
+    # Tras despachar un lote pueden quedar pendientes que no cambian (no
+    # tocan la marca): el siguiente ciclo hace conteo completo
+    forzar_completo: bool = True
+
+    def requiere_completo(self) -> bool:
+        return (
+            self.forzar_completo
+            or self.marca is None
+            or time.monotonic() - self.ultimo_completo >= RECONCILE_SECONDS
+        )
 
 
-def check_nocodb_and_trigger(nocodb_client: NocoDBClient):
+def check_nocodb_and_trigger(nocodb_client: NocoDBClient, estado: Optional[EstadoDelta] = None):
     source_repo = NocoDbSourceRepository(nocodb_client)
     try:
-        pendientes = source_repo.obtener_pendientes(limit=1)
-        count = len(pendientes) if pendientes else 0
+        if settings.LEASE_ENABLED == "True":
+            # Devolver a la cola los registros de workers caídos
+            source_repo.liberar_leases_vencidos()
+        if estado is None:
+            count = source_repo.contar_pendientes()
+        elif estado.requiere_completo():
+            # Reconciliación: conteo completo y nueva marca de agua
+            count = source_repo.contar_pendientes()
+            estado.marca = source_repo.marca_agua_actual(COLUMNA_DELTA) or estado.marca
+            estado.ultimo_completo = time.monotonic()
+            estado.forzar_completo = False
+            logger.debug("Conteo completo; marca de agua=%s", estado.marca)
+        else:
+            count, estado.marca = source_repo.cambios_desde(estado.marca, COLUMNA_DELTA)
         logger.info("Pendientes encontrados: %d", count)
         return count
     except Exception as e:
@@ -33,17 +76,84 @@ def check_nocodb_and_trigger(nocodb_client: NocoDBClient):
         return None
 
 
+def esperar_job(job_id: str) -> bool:
+    """Consulta el estado del job hasta que termine. True si completó."""
+    url = f"{JOBS_ENDPOINT}/{job_id}"
+    while True:
+        time.sleep(JOB_POLL_SECONDS)
+        try:
+            r = requests.get(url, timeout=30)
+        except requests.exceptions.RequestException as e:
+            logger.warning("No se pudo consultar el job %s: %s", job_id, e)
+            continue
+        if r.status_code == 404:
+            # El API se reinició y perdió el job en memoria
+            logger.warning("Job %s no encontrado en el API", job_id)
+            return False
+        estado = r.json()
+        if estado.get("estado") not in ("en_cola", "ejecutando"):
+            logger.info(
+                "Job %s terminado: estado=%s procesados=%s errores=%s",
+                job_id, estado.get("estado"), estado.get("procesados"), estado.get("errores"),
+            )
+            return estado.get("estado") == "completado"
+
+
 def trigger_flask():
     try:
         logger.info("Llamando endpoint de ejecución: %s", EXECUTE_ENDPOINT)
-        r = requests.post(EXECUTE_ENDPOINT, timeout=600)
+        r = requests.post(
+            EXECUTE_ENDPOINT,
+            params={"origen": "poller"},
+            headers={"Accept": "application/json"},
+            timeout=30,
+        )
         logger.info("Endpoint respondió: %s (status=%s)", r.text[:200], r.status_code)
-        return True
+        r.raise_for_status()
+        # El lote corre como job en el API: esperar a que termine sin límite fijo
+        return esperar_job(r.json()["job_id"])
     except Exception as e:
         logger.error("Error llamando endpoint: %s", e)
         return False
 
 
+def ejecutar_ciclo(nocodb_client: NocoDBClient, estado: EstadoDelta, backoff: int) -> int:
+    """Un ciclo del poller (incluida su espera). Retorna el backoff para el siguiente."""
+    if not nocodb_client.disponible():
+        # Circuito abierto: NocoDB no está sano, no despachar trabajo
+        logger.warning(
+            "Circuito NocoDB abierto (%s); se omite el ciclo",
+            nocodb_client.circuit_breaker.snapshot(),
+        )
+        time.sleep(INTERVAL)
+        return backoff
+
+    count = check_nocodb_and_trigger(nocodb_client, estado)
+    if count is None:
+        # Error consultando NocoDB: aplicar backoff corto antes de reintentar
+        logger.warning("Aplicando backoff: %s segundos", backoff)
+        time.sleep(backoff)
+        return min(backoff * 2, 300)
+
+    if count > 0:
+        # Si hay pendientes, llamar al endpoint y esperar a que termine
+        ok = trigger_flask()
+        estado.forzar_completo = True
+        if not ok:
+            # si falla la llamada a flask, esperar y reintentar
+            logger.warning("Fallo al invocar endpoint, esperando antes de reintentar")
+            time.sleep(10)
+            return backoff
+        # ejecución exitosa, reset backoff; esperar un poco para permitir que
+        # el proceso termine de actualizar registros
+        time.sleep(max(5, INTERVAL))
+        return 1
+
+    # no hay pendientes: dormir el intervalo configurado
+    time.sleep(INTERVAL)
+    return backoff
+
+
 def main():
     logger.info("Iniciando poller (interval=%s seconds)", INTERVAL)
 
@@ -55,32 +165,10 @@ def main():
         sys.exit(1)
 
     backoff = 1
+    estado = EstadoDelta()
     while True:
         try:
-            count = check_nocodb_and_trigger(nocodb_client)
-            if count is None:
-                # Error consultando NocoDB: aplicar backoff corto antes de reintentar
-                logger.warning("Aplicando backoff: %s segundos", backoff)
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 300)
-                continue
-
-            if count > 0:
-                # Si hay pendientes, llamar al endpoint y esperar a que termine
-                ok = trigger_flask()
-                if not ok:
-                    # si falla la llamada a flask, esperar y reintentar
-                    logger.warning("Fallo al invocar endpoint, esperando antes de reintentar")
-                    time.sleep(10)
-                else:
-                    # ejecución exitosa, reset backoff
-                    backoff = 1
-                    # tras ejecutar, esperar un poco para permitir que el proceso termine de actualizar registros
-                    time.sleep(max(5, INTERVAL))
-            else:
-                # no hay pendientes: dormir el intervalo configurado
-                time.sleep(INTERVAL)
-
+            backoff = ejecutar_ciclo(nocodb_client, estado, backoff)
         except KeyboardInterrupt:
             logger.info("Poller detenido por usuario (KeyboardInterrupt)")
             break
@@ -2,6 +2,8 @@ from flask import Flask
 from config import settings
 from app.blueprints.gestion_bp import bp as gestion_bp
 from app.blueprints.health_bp import bp as health_bp
+from app.blueprints.webhook_bp import bp as webhook_bp
+from app.infrastructure.driver_manager import get_driver_manager
 import os
 
 
@@ -12,12 +14,17 @@ def create_app():
     # Register blueprints
     app.register_blueprint(health_bp)
     app.register_blueprint(gestion_bp, url_prefix="/api/gestion")
+    app.register_blueprint(webhook_bp, url_prefix="/api/webhooks")
 
     # ensure folders
     os.makedirs(settings.SCREENSHOT_PATH, exist_ok=True)
     os.makedirs(settings.PDF_DIR, exist_ok=True)
     os.makedirs(settings.LOG_PATH, exist_ok=True)
 
+    if settings.DRIVER_PRESPAWN == "True":
+        # Chrome listo antes del primer lote
+        get_driver_manager(settings.RUNT_URL).calentar()
+
     return app
 
 
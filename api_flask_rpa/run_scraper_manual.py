@@ -10,6 +10,7 @@ from app.repositories.nocodb_source_repository import NocoDbSourceRepository
 from app.repositories.nocodb_target_repository import NocoDbTargetRepository
 from app.services.capture_service import CaptureService
 from app.services.pdf_service import PDFService
+from app.services.parametros_service import get_parametros_service
 from app.utils.limpiar_nit import limpiar_nit_sin_dv
 from config import settings
 import time
@@ -31,11 +32,11 @@ def test_nocodb_connection():
             api_key=settings.NOCO_XC_TOKEN
         )
         source_repo = NocoDbSourceRepository(nocodb_client)
-        params = source_repo.obtener_parametros()
+        params = get_parametros_service(source_repo).obtener()
         print("✅ Conexión con NocoDB exitosa!")
-        print(f"   Parámetros cargados: {len(params)}")
+        print(f"   Parámetros cargados: {len(params.raw)}")
         logger.info("✅ Conexión con NocoDB exitosa!")
-        logger.info(f"   Parámetros cargados: {len(params)}")
+        logger.info(f"   Parámetros cargados: {len(params.raw)}")
         return nocodb_client, params
     except Exception as e:
         print(f"❌ Error conectando con NocoDB: {e}")
@@ -50,13 +51,13 @@ def main():
         print("⛔ No se puede continuar sin conexión a NocoDB")
         logger.critical("⛔ No se puede continuar sin conexión a NocoDB")
         return
-    runt_url = global_params.get("URLRUNT")
-    runt_username = global_params.get("UsuarioRUNT")
-    runt_password = global_params.get("PasswordRUNT")
-    # Puedes usar un valor por defecto si no está en NocoDB
-    runt_timeoutBajo = int(global_params.get("DelayBajo"))
-    runt_timeoutMedio = int(global_params.get("DelayMedio"))
-    runt_timeoutAlto = int(global_params.get("DelayAlto"))
+    runt_url = global_params.url_runt
+    runt_username = global_params.usuario_runt
+    runt_password = global_params.password_runt
+    # Los valores por defecto se aplican al tipar los parámetros
+    runt_timeoutBajo = global_params.delay_bajo
+    runt_timeoutMedio = global_params.delay_medio
+    runt_timeoutAlto = global_params.delay_alto
 
     # 2️⃣ Inicializar repositorios
     source_repo = NocoDbSourceRepository(nocodb_client)